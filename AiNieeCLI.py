@@ -0,0 +1,222 @@
+import os
+import sys
+import signal
+import argparse
+import tempfile
+import multiprocessing
+import warnings
+
+import rapidjson as json
+from rich import print
+
+
+# 过滤protobuf的警告信息
+warnings.filterwarnings(
+    action='ignore',
+    message=r'.*SymbolDatabase\.GetPrototype\(\) is deprecated.*',
+    category=UserWarning,
+    module=r'google\.protobuf\.symbol_database'
+)
+
+# 退出码
+EXIT_SUCCESS = 0        # 全部文本翻译完成
+EXIT_ERROR = 1          # 配置或项目数据错误
+EXIT_INCOMPLETE = 2     # 部分文本达到最大尝试次数仍未翻译
+EXIT_INTERRUPTED = 130  # 任务被中断
+
+
+# 解析命令行参数
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog = "AiNieeCLI",
+        description = "无界面运行翻译流程：读取项目文件、翻译并写出结果，使用界面中保存的配置文件。",
+    )
+    parser.add_argument("-c", "--config", default = "", help = "配置文件路径，默认为 Resource/config.json")
+    parser.add_argument("-i", "--input", default = "", help = "输入文件夹，覆盖配置中的 label_input_path")
+    parser.add_argument("-o", "--output", default = "", help = "输出文件夹，覆盖配置中的 label_output_path")
+    parser.add_argument("-t", "--project-type", default = "", help = "项目类型，覆盖配置中的 translation_project")
+    parser.add_argument("--continue", dest = "continue_task", action = "store_true", help = "从输出文件夹中的缓存继续上次的翻译")
+    parser.add_argument("--set", dest = "overrides", action = "append", default = [], metavar = "KEY=VALUE", help = "覆盖配置项，值按 JSON 解析，可以重复使用")
+    parser.add_argument("--no-plugins", action = "store_true", help = "不加载插件")
+    parser.add_argument("--tm-export", default = "", metavar = "FILE", help = "将翻译记忆库导出为 JSON Lines 文件后退出，不执行翻译")
+    parser.add_argument("--tm-import", default = "", metavar = "FILE", help = "从 JSON Lines 文件导入翻译记忆后退出，不执行翻译")
+    return parser.parse_args(argv)
+
+
+# 解析 --set 指定的配置项
+def parse_overrides(items: list[str]) -> dict:
+    overrides = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+
+# 生成本次任务使用的配置文件，有覆盖项时写入临时文件，不修改原配置文件
+def prepare_config(args: argparse.Namespace, config_path: str) -> tuple[str, str]:
+    overrides = parse_overrides(args.overrides)
+    if args.input:
+        overrides["label_input_path"] = args.input
+    if args.output:
+        overrides["label_output_path"] = args.output
+    if args.project_type:
+        overrides["translation_project"] = args.project_type
+
+    if not overrides:
+        return config_path, ""
+
+    with open(config_path, "r", encoding = "utf-8") as reader:
+        config = json.load(reader)
+    config.update(overrides)
+
+    temp_dir = tempfile.mkdtemp(prefix = "ainiee_cli_")
+    temp_path = os.path.join(temp_dir, "config.json")
+    with open(temp_path, "w", encoding = "utf-8") as writer:
+        json.dump(config, writer, ensure_ascii = False, indent = 4)
+    return temp_path, temp_dir
+
+
+# 导入或导出翻译记忆库，记忆库路径与容量使用配置中的设置
+def run_translation_memory(args: argparse.Namespace) -> int:
+    from Base.Base import Base
+    from ModuleFolders.TranslationMemory.TranslationMemory import TranslationMemory
+
+    base = Base()
+    config = base.load_config()
+    memory = TranslationMemory(
+        config.get("translation_memory_path", "") or TranslationMemory.DEFAULT_PATH,
+        config.get("translation_memory_max_entries", TranslationMemory.DEFAULT_MAX_ENTRIES),
+    )
+    try:
+        if args.tm_import:
+            count = memory.import_from_file(args.tm_import)
+            base.info(f"已从 {args.tm_import} 导入 {count} 个翻译记忆条目 ...")
+        if args.tm_export:
+            count = memory.export_to_file(args.tm_export)
+            base.info(f"已导出 {count} 个翻译记忆条目至 {args.tm_export} ...")
+    except Exception as e:
+        base.error("翻译记忆导入导出失败 ...", e)
+        return EXIT_ERROR
+    finally:
+        memory.close()
+
+    return EXIT_SUCCESS
+
+
+# 执行翻译流程
+def run(args: argparse.Namespace) -> int:
+    # 按需导入核心模块，不加载任何界面组件
+    from Base.Base import Base
+    from Base.PluginManager import PluginManager
+    from ModuleFolders.Cache.CacheItem import TranslationStatus
+    from ModuleFolders.Cache.CacheManager import CacheManager
+    from ModuleFolders.FileReader.FileReader import FileReader
+    from ModuleFolders.FileOutputer.FileOutputer import FileOutputer
+    from ModuleFolders.TaskExecutor.TaskExecutor import TaskExecutor
+
+    base = Base()
+    config = base.load_config()
+
+    # 创建插件管理器，与插件设置页一致，未设置过的插件使用默认启用状态
+    plugin_manager = PluginManager()
+    if not args.no_plugins:
+        plugin_manager.load_plugins_from_directory(os.path.join(".", "PluginScripts"))
+        plugins_enable = {name: plugin.default_enable for name, plugin in plugin_manager.get_plugins().items()}
+        plugins_enable.update(config.get("plugins_enable", {}))
+        plugin_manager.update_plugins_enable(plugins_enable)
+
+    cache_manager = CacheManager()
+    file_reader = FileReader()
+    file_writer = FileOutputer()
+    task_executor = TaskExecutor(plugin_manager, cache_manager, file_reader, file_writer)
+
+    # 读取项目数据
+    label_output_path = config.get("label_output_path", "./output")
+    try:
+        if args.continue_task:
+            cache_manager.load_from_file(label_output_path)
+        else:
+            project = file_reader.read_files(
+                config.get("translation_project", "AutoType"),
+                config.get("label_input_path", "./input"),
+                config.get("label_input_exclude_rule", ""),
+                config.get("reader_process_count", 1),
+            )
+            cache_manager.load_from_project(project)
+    except Exception as e:
+        base.error("翻译项目数据载入失败 ... 请检查是否正确设置项目类型与输入文件夹 ...", e)
+        return EXIT_ERROR
+
+    if cache_manager.get_item_count() == 0:
+        base.error("项目数据为空，可能是项目类型或输入文件夹设置不正确 ...")
+        return EXIT_ERROR
+
+    # 收到中断信号时停止任务，已完成的译文仍会写入缓存
+    interrupted = []
+    def stop(signum, frame) -> None:
+        interrupted.append(signum)
+        task_executor.task_stop(Base.EVENT.TASK_STOP, {})
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # 在当前线程中执行翻译，完成后写出结果
+    cache_manager.start_interval_saving(Base.EVENT.TASK_START, {})
+    try:
+        task_executor.translation_start_target(args.continue_task)
+    finally:
+        task_executor.tracer.close()
+        cache_manager.save_to_file_stop_flag = True
+        if getattr(cache_manager, "save_to_file_require_flag", False):
+            cache_manager.save_to_file_require_flag = False
+            cache_manager.save_to_file()
+
+    if interrupted:
+        return EXIT_INTERRUPTED
+    if cache_manager.get_item_count_by_status(TranslationStatus.UNTRANSLATED) > 0:
+        return EXIT_INCOMPLETE
+    return EXIT_SUCCESS
+
+
+def main(argv: list[str] = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    # 相对路径以调用时的工作目录为准
+    config_path = os.path.abspath(args.config) if args.config else ""
+    args.input = os.path.abspath(args.input) if args.input else ""
+    args.output = os.path.abspath(args.output) if args.output else ""
+    args.tm_export = os.path.abspath(args.tm_export) if args.tm_export else ""
+    args.tm_import = os.path.abspath(args.tm_import) if args.tm_import else ""
+
+    # 设置工作目录，资源文件与插件均以程序目录为基准
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(script_dir)
+    sys.path.append(script_dir)
+
+    config_path = config_path or os.path.abspath(os.path.join(".", "Resource", "config.json"))
+    if not os.path.isfile(config_path):
+        print(f"[[red]ERROR[/]] 配置文件不存在 - {config_path}")
+        return EXIT_ERROR
+
+    config_path, temp_dir = prepare_config(args, config_path)
+    try:
+        from Base.Base import Base
+        Base.CONFIG_PATH = config_path
+        if args.tm_export or args.tm_import:
+            return run_translation_memory(args)
+        return run(args)
+    finally:
+        # 写入任务中对配置的修改，之后再清理临时配置文件
+        from Base.ConfigStore import ConfigStore
+        ConfigStore.get_instance(config_path).flush()
+        if temp_dir:
+            os.remove(config_path)
+            os.rmdir(temp_dir)
+
+
+if __name__ == "__main__":
+    # 开启子进程支持
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,17 +1,15 @@
 import os
-import threading
 import traceback
+from enum import IntEnum
 
 import rapidjson as json
 from rich import print
-from PyQt5.QtCore import Qt
-from qfluentwidgets import InfoBar
-from qfluentwidgets import InfoBarPosition
 
+from Base.ConfigStore import ConfigStore
 from Base.EventManager import EventManager
 
 # 事件列表
-class Event():
+class Event(IntEnum):
 
     API_TEST_DONE = 100                             # API 测试完成
     API_TEST_START = 101                            # API 测试开始
@@ -25,6 +23,7 @@ class Event():
     TASK_CONTINUE_CHECK_DONE = 241           # 继续翻译状态检查完成
     TASK_MANUAL_EXPORT = 250                 # 翻译结果手动导出
     CACHE_FILE_AUTO_SAVE = 300                      # 缓存文件自动保存
+    CONFIG_UPDATE = 310                             # 配置更新，数据中的 keys 为发生变化的配置项
 
 
     APP_UPDATE_CHECK: int = 600                             # 检查更新
@@ -53,6 +52,9 @@ class Event():
 
     APP_SHUT_DOWN = 99999                          # 应用关闭
 
+# 高频事件的合并投递间隔（秒），任务线程频繁触发时界面与插件每秒最多处理 4 次
+EventManager.set_coalesce_interval(Event.TASK_UPDATE, 0.25)
+
 # 软件运行状态列表
 class Status():
 
@@ -68,7 +70,7 @@ class Status():
 class Base():
 
     # 事件列表
-    EVENT = Event()
+    EVENT = Event
 
     # 状态列表
     STATUS = Status()
@@ -76,9 +78,6 @@ class Base():
     # 配置文件路径
     CONFIG_PATH = os.path.join(".", "Resource", "config.json")
 
-    # 类线程锁
-    CONFIG_FILE_LOCK = threading.Lock()
-
     # 多语言界面配置信息 (类变量)
     multilingual_interface_dict = {}
 
@@ -105,9 +104,6 @@ class Base():
         # 默认配置
         self.default = {}
 
-        # 获取事件管理器单例
-        self.event_manager_singleton = EventManager()
-
         # 类变量
         Base.work_status = Base.STATUS.IDLE if not hasattr(Base, "work_status") else Base.work_status
 
@@ -180,9 +176,13 @@ class Base():
                 return self.window
         return None
 
-    # Toast
-    def info_toast(self, title: str, content: str) -> None:
-        InfoBar.info(
+    # Toast，界面组件只在界面中使用，按需导入以免无界面运行时依赖 Qt
+    def show_toast(self, level: str, title: str, content: str) -> None:
+        from PyQt5.QtCore import Qt
+        from qfluentwidgets import InfoBar
+        from qfluentwidgets import InfoBarPosition
+
+        getattr(InfoBar, level)(
             title = title,
             content = content,
             parent = self.get_parent_window(),
@@ -192,84 +192,42 @@ class Base():
             isClosable = True,
         )
 
+    # Toast
+    def info_toast(self, title: str, content: str) -> None:
+        self.show_toast("info", title, content)
+
     # Toast
     def error_toast(self, title: str, content: str) -> None:
-        InfoBar.error(
-            title = title,
-            content = content,
-            parent = self.get_parent_window(),
-            duration = 2500,
-            orient = Qt.Horizontal,
-            position = InfoBarPosition.TOP,
-            isClosable = True,
-        )
+        self.show_toast("error", title, content)
 
     # Toast
     def success_toast(self, title: str, content: str) -> None:
-        InfoBar.success(
-            title = title,
-            content = content,
-            parent = self.get_parent_window(),
-            duration = 2500,
-            orient = Qt.Horizontal,
-            position = InfoBarPosition.TOP,
-            isClosable = True,
-        )
+        self.show_toast("success", title, content)
 
     # Toast
     def warning_toast(self, title: str, content: str) -> None:
-        InfoBar.warning(
-            title = title,
-            content = content,
-            parent = self.get_parent_window(),
-            duration = 2500,
-            orient = Qt.Horizontal,
-            position = InfoBarPosition.TOP,
-            isClosable = True,
-        )
+        self.show_toast("warning", title, content)
 
-    # 载入配置文件
+    # 载入配置文件，返回可以自由修改的副本，配置只在首次使用时从磁盘读取
     def load_config(self) -> dict:
-        config = {}
+        store = ConfigStore.get_instance(Base.CONFIG_PATH)
+        if not store.exists:
+            self.warning("配置文件不存在 ...")
 
-        with Base.CONFIG_FILE_LOCK:
-            if os.path.exists(Base.CONFIG_PATH):
-                with open(Base.CONFIG_PATH, "r", encoding = "utf-8") as reader:
-                    config = json.load(reader)
-            else:
-                self.warning("配置文件不存在 ...")
-
-        return config
+        return store.get()
 
-    # 保存配置文件
-    def save_config(self, new: dict) -> None:
-        old = {}
+    # 获取配置的只读快照，配置未变化时直接复用，适合频繁读取配置的场景
+    def get_config_snapshot(self) -> dict:
+        return ConfigStore.get_instance(Base.CONFIG_PATH).snapshot()
 
-        # 读取配置文件
-        with Base.CONFIG_FILE_LOCK:
-            if os.path.exists(Base.CONFIG_PATH):
-                with open(Base.CONFIG_PATH, "r", encoding = "utf-8") as reader:
-                    old = json.load(reader)
+    # 保存配置文件，合并顶层配置项后延迟写入磁盘，并通知发生变化的配置项
+    def save_config(self, new: dict) -> dict:
+        config, changed = ConfigStore.get_instance(Base.CONFIG_PATH).update(new)
 
-        # 对比新旧数据是否一致，一致则跳过后续步骤
-        # 当字典中包含子字典或子列表时，使用 == 运算符仍然可以进行比较
-        # Python 会递归地比较所有嵌套的结构，确保每个层次的键值对都相等
-        if old == new:
-            return old
+        if changed:
+            self.emit(Base.EVENT.CONFIG_UPDATE, {"keys": sorted(changed)})
 
-        # 更新配置数据
-        for k, v in new.items():
-            if k not in old.keys():
-                old[k] = v
-            else:
-                old[k] = new[k]
-
-        # 写入配置文件
-        with Base.CONFIG_FILE_LOCK:
-            with open(Base.CONFIG_PATH, "w", encoding = "utf-8") as writer:
-                writer.write(json.dumps(old, indent = 4, ensure_ascii = False))
-
-        return old
+        return config
 
     # 更新合并配置
     def fill_config(self, old: dict, new: dict) -> dict:
@@ -306,13 +264,13 @@ class Base():
         return config
 
     # 触发事件
-    def emit(self, event: int, data: dict) -> None:
+    def emit(self, event: Event, data: dict) -> None:
         EventManager.get_singleton().emit(event, data)
 
     # 订阅事件
-    def subscribe(self, event: int, hanlder: callable) -> None:
+    def subscribe(self, event: Event, hanlder: callable) -> None:
         EventManager.get_singleton().subscribe(event, hanlder)
 
     # 取消订阅事件
-    def unsubscribe(self, event: int, hanlder: callable) -> None:
+    def unsubscribe(self, event: Event, hanlder: callable) -> None:
         EventManager.get_singleton().unsubscribe(event, hanlder)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import atexit
+import os
+import threading
+from types import MappingProxyType
+
+import rapidjson as json
+
+
+# 进程内共享的配置存储
+class ConfigStore:
+    """配置文件的内存副本
+
+    每个配置文件只在首次使用时读取一次，之后的读取直接从内存中的副本生成，
+    修改在内存中立即生效，并在短暂延迟后合并写入磁盘，写入时先写临时文件再替换原文件，
+    中途退出不会留下不完整的配置文件，进程退出时写入尚未写入的修改
+    """
+
+    # 修改后延迟写入的时间（秒），期间的多次修改合并为一次写入
+    WRITE_DELAY = 0.5
+
+    _instances: dict[str, "ConfigStore"] = {}
+    _instances_lock = threading.Lock()
+
+    # 获取配置文件对应的共享实例
+    @classmethod
+    def get_instance(cls, path: str) -> "ConfigStore":
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            instance = cls._instances.get(path)
+            if instance is None:
+                instance = cls(path)
+                cls._instances[path] = instance
+            return instance
+
+    # 写入全部实例尚未写入的修改
+    @classmethod
+    def flush_all(cls) -> None:
+        with cls._instances_lock:
+            instances = list(cls._instances.values())
+        for instance in instances:
+            instance.flush()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+
+        # 配置数据，以序列化后的文本保存，读取时生成副本，调用者无法修改存储中的数据
+        self.text = "{}"
+        self.data = {}
+        self.exists = False
+
+        # 只读快照，配置变化后重新生成
+        self.snapshot_cache = None
+
+        # 延迟写入
+        self.dirty = False
+        self.timer = None
+
+        self.load()
+
+    # 从文件读取配置
+    def load(self) -> None:
+        data = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding = "utf-8") as reader:
+                data = json.load(reader)
+
+        with self.lock:
+            self.exists = os.path.exists(self.path)
+            self.text = json.dumps(data, indent = 4, ensure_ascii = False)
+            self.data = json.loads(self.text)
+            self.snapshot_cache = None
+
+    # 获取配置的副本，可以自由修改
+    def get(self) -> dict:
+        return json.loads(self.text)
+
+    # 获取配置的只读快照，配置不变时所有调用者共享同一个快照，不应修改其中的列表与字典
+    def snapshot(self) -> MappingProxyType:
+        with self.lock:
+            if self.snapshot_cache is None:
+                self.snapshot_cache = MappingProxyType(json.loads(self.text))
+            return self.snapshot_cache
+
+    # 合并顶层配置项，返回合并后配置的副本与发生变化的配置项
+    def update(self, new: dict) -> tuple[dict, set[str]]:
+        with self.lock:
+            changed = {k for k, v in new.items() if k not in self.data or self.data[k] != v}
+            if changed:
+                data = dict(self.data)
+                for k in changed:
+                    data[k] = new[k]
+
+                self.text = json.dumps(data, indent = 4, ensure_ascii = False)
+                self.data = json.loads(self.text)
+                self.snapshot_cache = None
+                self.schedule_write()
+
+            return json.loads(self.text), changed
+
+    # 安排延迟写入，调用时需持有锁
+    def schedule_write(self) -> None:
+        self.dirty = True
+        if self.timer is None:
+            self.timer = threading.Timer(self.WRITE_DELAY, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    # 立即写入尚未写入的修改
+    def flush(self) -> None:
+        with self.write_lock:
+            with self.lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.dirty:
+                    return
+                self.dirty = False
+                text = self.text
+
+            try:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding = "utf-8") as writer:
+                    writer.write(text)
+                    writer.flush()
+                    os.fsync(writer.fileno())
+                os.replace(temp_path, self.path)
+                self.exists = True
+            except OSError as e:
+                print(f"[WARNING] 配置文件写入失败 - {self.path} ... {e}")
+
+
+# 进程退出时写入尚未写入的修改
+atexit.register(ConfigStore.flush_all)
@@ -1,47 +1,158 @@
-from PyQt5.QtCore import Qt
-from PyQt5.QtCore import QObject
-from PyQt5.QtCore import pyqtSignal
+import queue
+import threading
+import time
 
-class EventManager(QObject):
+# 界面依赖为可选项，无界面运行时不需要安装 PyQt5
+try:
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtCore import QObject
+    from PyQt5.QtCore import QCoreApplication
+    from PyQt5.QtCore import pyqtSignal
+except ImportError:
+    QObject = None
+
+
+if QObject is not None:
+
+    # 通过 Qt 信号把事件投递到主线程处理
+    class QtEventBridge(QObject):
+
+        # 自定义信号
+        # 字典类型或者其他复杂对象应该使用 object 作为信号参数类型，这样可以传递任意 Python 对象，包括 dict
+        signal = pyqtSignal(int, object)
+
+        def __init__(self, handler: callable, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.signal.connect(handler, Qt.QueuedConnection)
+
+
+class EventManager:
+    """事件总线
+
+    存在 Qt 应用对象时通过 Qt 的队列连接在主线程中处理事件，
+    否则（命令行或无界面环境）由后台的事件分发线程按触发顺序处理事件，
+    两种方式下触发事件都不会阻塞触发者
+
+    高频事件按固定间隔合并投递，间隔内多次触发的字典数据按键合并，后触发的值覆盖先触发的值，
+    触发其他事件前会先投递尚未投递的合并事件，保证事件的先后顺序不变
+    """
 
     # 单一实例
     _singleton = None
+    _singleton_lock = threading.Lock()
+
+    # 合并投递的事件与最短投递间隔（秒），在首次使用时由 Base 注册
+    coalesce_intervals = {}
 
-    # 自定义信号
-    # 字典类型或者其他复杂对象应该使用 object 作为信号参数类型，这样可以传递任意 Python 对象，包括 dict
-    signal = pyqtSignal(int, object)
+    def __init__(self):
+        self.lock = threading.Lock()
 
-    # 事件列表
-    event_callbacks = {}
+        # 事件列表，订阅变化时整体替换处理函数列表，投递时无需加锁
+        self.event_callbacks = {}
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.signal.connect(self.process_event, Qt.QueuedConnection)
+        # 等待合并投递的事件数据与上次投递的时间
+        self.pending = {}
+        self.last_delivery = {}
+
+        self.bridge = None
+        self.queue = None
+        self.thread = None
+
+        if QObject is not None and QCoreApplication.instance() is not None:
+            self.bridge = QtEventBridge(self.process_event)
+        else:
+            self.queue = queue.SimpleQueue()
+            self.thread = threading.Thread(target = self.dispatch_forever, name = "event_dispatcher", daemon = True)
+            self.thread.start()
 
     # 获取单例
     def get_singleton():
-        if EventManager._singleton == None:
-            EventManager._singleton = EventManager()
+        if EventManager._singleton is None:
+            with EventManager._singleton_lock:
+                if EventManager._singleton is None:
+                    EventManager._singleton = EventManager()
 
         return EventManager._singleton
 
+    # 设置事件的合并投递间隔，间隔为 0 时不合并
+    @classmethod
+    def set_coalesce_interval(cls, event: int, interval: float) -> None:
+        if interval > 0:
+            cls.coalesce_intervals[event] = interval
+        else:
+            cls.coalesce_intervals.pop(event, None)
+
+    # 无界面时在后台线程中依次处理事件
+    def dispatch_forever(self):
+        while True:
+            event, data = self.queue.get()
+            try:
+                self.process_event(event, data)
+            except Exception as e:
+                print(f"[ERROR] 事件处理错误 - {event} ... {e}")
+
     # 处理事件
     def process_event(self, event: int, data: dict):
-        if event in self.event_callbacks:
-            for hanlder in self.event_callbacks[event]:
-                hanlder(event, data)
+        for hanlder in self.event_callbacks.get(event, ()):
+            hanlder(event, data)
+
+    # 投递事件
+    def deliver(self, event: int, data: dict):
+        if self.bridge is not None:
+            self.bridge.signal.emit(event, data)
+        else:
+            self.queue.put((event, data))
 
     # 触发事件
     def emit(self, event: int, data: dict):
-        self.signal.emit(event, data)
+        interval = self.coalesce_intervals.get(event)
+        if interval is None:
+            if self.pending:
+                self.flush_all()
+            self.deliver(event, data)
+            return
+
+        with self.lock:
+            scheduled = event in self.pending
+            previous = self.pending.get(event)
+            if isinstance(previous, dict) and isinstance(data, dict):
+                data = {**previous, **data}
+            self.pending[event] = data
+            if scheduled:
+                return
+            delay = self.last_delivery.get(event, 0.0) + interval - time.monotonic()
+
+        # 距上次投递已超过间隔时立即投递，否则在间隔结束时投递合并后的数据
+        if delay <= 0:
+            self.flush(event)
+        else:
+            timer = threading.Timer(delay, self.flush, (event,))
+            timer.daemon = True
+            timer.start()
+
+    # 投递等待合并的事件
+    def flush(self, event: int):
+        with self.lock:
+            if event not in self.pending:
+                return
+            data = self.pending.pop(event)
+            self.last_delivery[event] = time.monotonic()
+        self.deliver(event, data)
+
+    # 投递全部等待合并的事件
+    def flush_all(self):
+        for event in list(self.pending):
+            self.flush(event)
 
     # 订阅事件
     def subscribe(self, event: int, hanlder: callable):
-        if event not in self.event_callbacks:
-            self.event_callbacks[event] = []
-        self.event_callbacks[event].append(hanlder)
+        with self.lock:
+            self.event_callbacks[event] = [*self.event_callbacks.get(event, ()), hanlder]
 
     # 取消订阅事件
     def unsubscribe(self, event: int, hanlder: callable):
-        if event in self.event_callbacks:
-            self.event_callbacks[event].remove(hanlder)
+        with self.lock:
+            callbacks = list(self.event_callbacks.get(event, ()))
+            if hanlder in callbacks:
+                callbacks.remove(hanlder)
+                self.event_callbacks[event] = callbacks
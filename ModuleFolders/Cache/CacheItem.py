@@ -1,10 +1,8 @@
 from dataclasses import dataclass, field
-from functools import cache
 from typing import Any
 
-import tiktoken
-
 from ModuleFolders.Cache.BaseCache import ExtraMixin, ThreadSafeCache
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
 
 
 class TranslationStatus:
@@ -57,9 +55,8 @@ class CacheItem(ThreadSafeCache, ExtraMixin):
         return self.get_token_count(self.source_text)
 
     @classmethod
-    @cache
     def get_token_count(cls, text) -> int:
-        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+        return TokenCounter.get_instance().count(text)
 
     def get_lang_code(self, default_lang=None):
         """获取语言代码，可选择使用默认值"""
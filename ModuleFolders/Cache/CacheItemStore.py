@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+from typing import Iterable
+
+from ModuleFolders.Cache.CacheItem import CacheItem
+
+
+class CacheItemStore:
+    """基于SQLite的条目索引存储
+
+    只保存条目所在的文件、文件内位置与翻译状态，文本仍只存在于内存中的条目对象里，
+    以 (storage_path, translation_status) 和 text_index 建立索引，使状态统计与待翻译片段选取可以走索引查询，
+    而不必每次遍历全部条目
+    """
+
+    def __init__(self, db_path: str = "") -> None:
+        # 空路径时SQLite会创建私有的临时磁盘数据库，关闭连接后自动删除
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock:
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    text_index INTEGER PRIMARY KEY,
+                    storage_path TEXT NOT NULL,
+                    file_order INTEGER NOT NULL,
+                    translation_status INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_path_status
+                    ON items (storage_path, translation_status, file_order);
+                CREATE INDEX IF NOT EXISTS idx_items_status
+                    ON items (translation_status);
+                """
+            )
+
+    # 关闭连接
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    # 用项目的全部条目重建索引
+    def rebuild(self, files: Iterable) -> None:
+        """text_index 作为主键，本身即为索引"""
+        def rows():
+            for file in files:
+                with file.atomic_scope():
+                    items = list(file.items)
+                for file_order, item in enumerate(items):
+                    yield (item.text_index, file.storage_path, file_order, item.translation_status)
+
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.execute("DELETE FROM items")
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)", rows()
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    # 同步变化的条目
+    def update_items(self, items: Iterable[CacheItem]) -> None:
+        rows = [(item.translation_status, item.text_index) for item in items]
+        if not rows:
+            return
+
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    "UPDATE items SET translation_status = ? WHERE text_index = ?",
+                    rows,
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    # 统计条目数量
+    def count_items(self, status: int = None) -> int:
+        with self.lock:
+            if status is None:
+                row = self.connection.execute("SELECT COUNT(*) FROM items").fetchone()
+            else:
+                row = self.connection.execute(
+                    "SELECT COUNT(*) FROM items WHERE translation_status = ?", (status,)
+                ).fetchone()
+        return row[0]
+
+    # 是否存在某状态的条目
+    def has_status(self, status: int) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM items WHERE translation_status = ? LIMIT 1", (status,)
+            ).fetchone()
+        return row is not None
+
+    # 按文件内顺序获取某文件中某状态的条目id
+    def select_text_indexes(self, storage_path: str, status: int) -> list[int]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT text_index FROM items WHERE storage_path = ? AND translation_status = ? ORDER BY file_order",
+                (storage_path, status),
+            ).fetchall()
+        return [row[0] for row in rows]
@@ -3,6 +3,8 @@ import os
 import re
 import threading
 import time
+import unicodedata
+import uuid
 from dataclasses import fields
 from typing import Dict, List, Tuple
 
@@ -13,14 +15,27 @@ from Base.Base import Base
 from ModuleFolders.TaskConfig.TaskType import TaskType
 from ModuleFolders.Cache.CacheFile import CacheFile
 from ModuleFolders.Cache.CacheItem import CacheItem, TranslationStatus
+from ModuleFolders.Cache.CacheItemStore import CacheItemStore
 from ModuleFolders.Cache.CacheProject import (
     CacheProject,
     CacheProjectStatistics
 )
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
 
 
 class CacheManager(Base):
     SAVE_INTERVAL = 8  # 缓存保存间隔（秒）
+    COMPACT_INTERVAL = 300  # 日志压缩为快照的最短间隔（秒）
+    COMPACT_JOURNAL_SIZE = 32 * 1024 * 1024  # 日志文件超过该大小（字节）时压缩为快照
+
+    CACHE_FILE_NAME = "AinieeCacheData.json"
+    JOURNAL_FILE_NAME = "AinieeCacheData.journal"
+
+    # 日志中记录的条目属性，均为任务或编辑过程中可能变化的属性
+    JOURNAL_ITEM_FIELDS = ("translation_status", "model", "source_text", "translated_text", "polished_text")
+
+    # 快照中记录日志代号的 extra 键
+    JOURNAL_GENERATION_KEY = "journal_generation"
 
     def __init__(self) -> None:
         super().__init__()
@@ -28,6 +43,18 @@ class CacheManager(Base):
         # 线程锁
         self.file_lock = threading.Lock()
 
+        # 待写入日志的记录
+        self.journal_lock = threading.Lock()
+        self.journal_pending = []
+        self.compact_require_flag = True
+        self.last_compact_time = time.time()
+
+        # 条目索引在批量修改后需要重建
+        self.item_store_dirty = False
+
+        # 最近一次生成片段时的重复条目，{代表条目的text_index: [重复条目]}
+        self.duplicate_items = {}
+
         # 注册事件
         self.subscribe(Base.EVENT.TASK_START, self.start_interval_saving)
         self.subscribe(Base.EVENT.APP_SHUT_DOWN, self.app_shut_down)
@@ -43,7 +70,42 @@ class CacheManager(Base):
 
     # 保存缓存到文件
     def save_to_file(self) -> None:
-        """保存缓存到文件，缓存结构：
+        """保存缓存到文件
+
+        平时只把变化的条目追加到日志文件 AinieeCacheData.journal 中，
+        当日志过大、距离上次压缩过久或项目结构发生变化时，才重写完整的快照文件 AinieeCacheData.json
+        """
+        path = os.path.join(self.save_to_file_require_path, "cache", self.CACHE_FILE_NAME)
+        journal_path = os.path.join(self.save_to_file_require_path, "cache", self.JOURNAL_FILE_NAME)
+        with self.file_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            if self.need_compact(path, journal_path):
+                self.compact_to_file(path, journal_path)
+            else:
+                self.append_to_journal(journal_path)
+
+            # 写入项目整体翻译状态文件
+            total_line = self.project.stats_data.total_line # 获取需翻译总行数
+            line = self.project.stats_data.line # 获取已翻译行数
+            project_name = self.project.project_name # 获取项目名字
+            json_data = {"total_line": total_line, "line": line, "project_name": project_name }
+
+            json_path = os.path.join(self.save_to_file_require_path, "cache", "ProjectStatistics.json")
+            with open(json_path, "w", encoding="utf-8") as writer:
+                json.dump(json_data, writer, ensure_ascii=False, indent=4)  # 直接写入 JSON 数据
+
+    # 判断是否需要把日志压缩为快照
+    def need_compact(self, path: str, journal_path: str) -> bool:
+        if self.compact_require_flag or not os.path.isfile(path):
+            return True
+        if time.time() - self.last_compact_time >= self.COMPACT_INTERVAL:
+            return True
+        return os.path.isfile(journal_path) and os.path.getsize(journal_path) >= self.COMPACT_JOURNAL_SIZE
+
+    # 写入完整快照，并清空日志
+    def compact_to_file(self, path: str, journal_path: str) -> None:
+        """
         {
             "project_id": "aaa",
             "project_type": "Type",
@@ -60,22 +122,40 @@ class CacheManager(Base):
             }
         }
         """
-        path = os.path.join(self.save_to_file_require_path, "cache", "AinieeCacheData.json")
-        with self.file_lock:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            content_bytes = msgspec.json.encode(self.project)
-            with open(path, "wb") as writer:
-                writer.write(content_bytes)
+        # 快照包含全部最新数据，此前排队的日志记录可以直接丢弃
+        with self.journal_lock:
+            self.journal_pending = []
+            self.compact_require_flag = False
 
-            # 写入项目整体翻译状态文件
-            total_line = self.project.stats_data.total_line # 获取需翻译总行数
-            line = self.project.stats_data.line # 获取已翻译行数
-            project_name = self.project.project_name # 获取项目名字
-            json_data = {"total_line": total_line, "line": line, "project_name": project_name }
+        # 快照与日志带有相同的代号，读取时只重放与快照代号相同的日志
+        # 替换快照后、清空日志前崩溃时，残留的旧日志与新快照代号不同，不会覆盖新快照中的条目
+        generation = uuid.uuid4().hex
+        self.project.set_extra(self.JOURNAL_GENERATION_KEY, generation)
+        content_bytes = msgspec.json.encode(self.project)
 
-            json_path = os.path.join(self.save_to_file_require_path, "cache", "ProjectStatistics.json")
-            with open(json_path, "w", encoding="utf-8") as writer:
-                json.dump(json_data, writer, ensure_ascii=False, indent=4)  # 直接写入 JSON 数据
+        # 先写临时文件再替换，避免写入中途崩溃导致快照损坏
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as writer:
+            writer.write(content_bytes)
+        os.replace(temp_path, path)
+
+        # 以新代号开始新的日志
+        with open(journal_path, "wb") as writer:
+            writer.write(msgspec.json.encode({"generation": generation}) + b"\n")
+
+        self.last_compact_time = time.time()
+
+    # 追加变化的条目到日志
+    def append_to_journal(self, journal_path: str) -> None:
+        with self.journal_lock:
+            records, self.journal_pending = self.journal_pending, []
+
+        # 监控数据体积很小，每次都一并记录
+        if self.project.stats_data is not None:
+            records.append({"stats_data": self.project.stats_data.to_dict()})
+
+        with open(journal_path, "ab") as writer:
+            writer.write(b"".join(msgspec.json.encode(record) + b"\n" for record in records))
 
     # 保存缓存到文件的定时任务
     def save_to_file_tick(self) -> None:
@@ -83,26 +163,82 @@ class CacheManager(Base):
         while not self.save_to_file_stop_flag:
             time.sleep(self.SAVE_INTERVAL)
             if getattr(self, "save_to_file_require_flag", False):
-                self.save_to_file()
                 self.save_to_file_require_flag = False
+                self.save_to_file()
 
     # 请求保存缓存到文件
-    def require_save_to_file(self, output_path: str) -> None:
-        """请求保存缓存"""
+    def require_save_to_file(self, output_path: str, changed_items: list[CacheItem] = None) -> None:
+        """请求保存缓存，传入变化的条目时只记录这些条目，否则下次保存时写入完整快照"""
+        if changed_items is None:
+            self.compact_require_flag = True
+            self.item_store_dirty = True
+        else:
+            self.record_changed_items(changed_items)
         self.save_to_file_require_path = output_path
         self.save_to_file_require_flag = True
 
+    # 记录变化的条目，等待写入日志
+    def record_changed_items(self, changed_items: list[CacheItem]) -> None:
+        records = []
+        for item in changed_items:
+            with item.atomic_scope():
+                record = {field_name: getattr(item, field_name) for field_name in self.JOURNAL_ITEM_FIELDS}
+                record["text_index"] = item.text_index
+            records.append(record)
+
+        with self.journal_lock:
+            self.journal_pending.extend(records)
+
+        # 同步到条目索引
+        item_store = self.project.item_store
+        if item_store is not None and not self.item_store_dirty:
+            item_store.update_items(changed_items)
+
+    # 按配置为项目挂载SQLite条目索引
+    def setup_item_store(self) -> None:
+        if self.get_config_snapshot().get("cache_storage_backend", "memory") == "sqlite":
+            self.project.attach_item_store(CacheItemStore())
+        self.item_store_dirty = False
+
+    # 获取条目索引，条目被批量修改过时先重建
+    def get_item_store(self) -> CacheItemStore | None:
+        item_store = self.project.item_store
+        if item_store is not None and self.item_store_dirty:
+            self.item_store_dirty = False
+            item_store.rebuild(self.project.files.values())
+        return item_store
+
     # 从项目中加载
     def load_from_project(self, data: CacheProject):
+        self.release_item_store()
         self.project = data
+        self.setup_item_store()
+
+        # 新项目与输出目录中的旧缓存无关，下次保存时需要写入完整快照
+        with self.journal_lock:
+            self.journal_pending = []
+            self.compact_require_flag = True
 
     # 从缓存文件读取数据
     def load_from_file(self, output_path: str) -> None:
         """从文件加载数据"""
-        path = os.path.join(output_path, "cache", "AinieeCacheData.json")
+        path = os.path.join(output_path, "cache", self.CACHE_FILE_NAME)
         with self.file_lock:
             if os.path.isfile(path):
+                self.release_item_store()
                 self.project = self.read_from_file(path)
+                self.setup_item_store()
+
+                # 读取时已经重放了日志，下次保存时合并为新的快照
+                with self.journal_lock:
+                    self.journal_pending = []
+                    self.compact_require_flag = True
+
+    # 释放旧项目的条目索引
+    def release_item_store(self) -> None:
+        project = getattr(self, "project", None)
+        if project is not None:
+            project.detach_item_store()
 
     @classmethod
     def read_from_file(cls, cache_path) -> CacheProject:
@@ -110,13 +246,55 @@ class CacheManager(Base):
             content_bytes = reader.read()
         try:
             # 反序列化严格按照dataclass定义，如source_text这种非optional类型不能为None，否则反序列化失败
-            return msgspec.json.decode(content_bytes, type=CacheProject)
+            project = msgspec.json.decode(content_bytes, type=CacheProject)
         except msgspec.ValidationError:
             content = json.loads(content_bytes.decode('utf-8'))
             if isinstance(content, dict):
-                return CacheProject.from_dict(content)
+                project = CacheProject.from_dict(content)
             else:
-                return cls._read_from_old_content(content)
+                project = cls._read_from_old_content(content)
+
+        # 重放快照之后追加的日志
+        journal_path = os.path.join(os.path.dirname(cache_path), cls.JOURNAL_FILE_NAME)
+        if os.path.isfile(journal_path):
+            cls._replay_journal(project, journal_path)
+
+        return project
+
+    @classmethod
+    def _replay_journal(cls, project: CacheProject, journal_path: str) -> None:
+        items_dict = {item.text_index: item for item in project.items_iter()}
+
+        with open(journal_path, "rb") as reader:
+            # 日志首行记录代号，与快照代号不同的日志属于更早的快照，不能重放
+            # 旧版本的快照与日志都没有代号，仍然重放
+            first_line = reader.readline()
+            try:
+                first_record = msgspec.json.decode(first_line) if first_line else {}
+            except msgspec.DecodeError:
+                first_record = {}
+            generation = first_record.get("generation") if isinstance(first_record, dict) else None
+            if generation != project.get_extra(cls.JOURNAL_GENERATION_KEY):
+                return
+            reader.seek(0 if generation is None else len(first_line))
+
+            for line in reader:
+                try:
+                    record = msgspec.json.decode(line)
+                except msgspec.DecodeError:
+                    # 最后一行可能因为写入中途崩溃而不完整，直接跳过
+                    continue
+
+                if "stats_data" in record:
+                    project.stats_data = CacheProjectStatistics.from_dict(record["stats_data"])
+                    continue
+
+                item = items_dict.get(record.get("text_index"))
+                if item is None:
+                    continue
+                for field_name in cls.JOURNAL_ITEM_FIELDS:
+                    if field_name in record:
+                        setattr(item, field_name, record[field_name])
 
     @classmethod
     def _read_from_old_content(cls, content: list) -> CacheProject:
@@ -170,15 +348,21 @@ class CacheManager(Base):
     # 获取缓存内全部文本对数量
     def get_item_count(self) -> int:
         """获取总缓存项数量"""
+        self.get_item_store()
         return self.project.count_items()
 
     # 获取某翻译状态的条目数量
     def get_item_count_by_status(self, status: int) -> int:
+        self.get_item_store()
         return self.project.count_items(status)
 
     # 检测是否存在需要翻译的条目
     def get_continue_status(self) -> bool:
         """检查是否存在可继续翻译的状态"""
+        item_store = self.get_item_store()
+        if item_store is not None:
+            return item_store.has_status(TranslationStatus.TRANSLATED) and item_store.has_status(TranslationStatus.UNTRANSLATED)
+
         has_translated = False
         has_untranslated = False
         for item in self.project.items_iter():
@@ -213,30 +397,84 @@ class CacheManager(Base):
 
         return collected
 
+    # 获取文件中指定条目之前的上文条目
+    def get_previous_items(self, storage_path: str, item: CacheItem, previous_line_count: int) -> List[CacheItem]:
+        file = self.project.get_file(storage_path)
+        if file is None:
+            return []
+        return self.generate_previous_chunks(file.items, previous_line_count, file.index_of(item.text_index))
+
+    # 原文去重时使用的归一化文本
+    @staticmethod
+    def normalize_source_text(text: str) -> str:
+        return unicodedata.normalize("NFC", text.replace("\r\n", "\n"))
+
+    # 按归一化原文分组，每组只保留首个条目作为代表
+    def group_duplicate_items(self, file_items: list[tuple[CacheFile, list[CacheItem]]]) -> dict[int, list[CacheItem]]:
+        representatives = {}
+        duplicate_items = defaultdict(list)
+        for _, items in file_items:
+            for item in items:
+                key = self.normalize_source_text(item.source_text)
+                representative = representatives.setdefault(key, item)
+                if representative is not item:
+                    duplicate_items[representative.text_index].append(item)
+        return dict(duplicate_items)
+
     # 生成待翻译片段
-    def generate_item_chunks(self, limit_type: str, limit_count: int, previous_line_count: int, task_mode) -> \
+    def generate_item_chunks(self, limit_type: str, limit_count: int, previous_line_count: int, task_mode, token_counter: TokenCounter = None, deduplicate: bool = False) -> \
             Tuple[List[List[CacheItem]], List[List[CacheItem]], List[str]]:
+        """deduplicate 为真时，翻译模式下重复的原文只发送一次，重复条目记录在 duplicate_items 中，由任务完成时回填"""
         chunks, previous_chunks, file_paths = [], [], []  # 添加 file_paths 初始化
+        item_store = self.get_item_store()
 
-        # 遍历所有文件
-        for file in self.project.files.values():
+        # 按行数切分时不需要加载编码器
+        if limit_type == "token":
+            token_counter = token_counter or TokenCounter.get_instance()
 
-            # 根据任务模式筛选条目
-            if task_mode == TaskType.TRANSLATION : # 选取未翻译条目
-                items = [item for item in file.items if item.translation_status == TranslationStatus.UNTRANSLATED]
-            elif task_mode == TaskType.POLISH: # 选取已翻译条目
-                items = [item for item in file.items if item.translation_status == TranslationStatus.TRANSLATED]
+        # 根据任务模式筛选条目
+        if task_mode == TaskType.TRANSLATION : # 选取未翻译条目
+            status = TranslationStatus.UNTRANSLATED
+        elif task_mode == TaskType.POLISH: # 选取已翻译条目
+            status = TranslationStatus.TRANSLATED
+
+        # 获取各文件的待处理条目
+        file_items = []
+        for file in self.project.files.values():
+            if item_store is not None:
+                items = [file.get_item(text_index) for text_index in item_store.select_text_indexes(file.storage_path, status)]
+            else:
+                items = [item for item in file.items if item.translation_status == status]
 
             # 如果没有需要翻译的条目，则跳过
-            if not items:
+            if items:
+                file_items.append((file, items))
+
+        # 全项目范围内去重
+        if deduplicate and task_mode == TaskType.TRANSLATION:
+            self.duplicate_items = self.group_duplicate_items(file_items)
+        else:
+            self.duplicate_items = {}
+        duplicate_ids = {id(item) for items in self.duplicate_items.values() for item in items}
+
+        # 遍历所有文件
+        for file, items in file_items:
+
+            # 重复条目不发送，上文仍使用完整的条目列表
+            send_items = [item for item in items if id(item) not in duplicate_ids] if duplicate_ids else items
+            if not send_items:
                 continue
 
             current_chunk, current_length = [], 0
 
+            # 计算各条目的长度，按 Tokens 计算时整个文件批量编码
+            if limit_type == "token":
+                item_lengths = token_counter.count_batch(item.source_text for item in send_items)
+            else:
+                item_lengths = [1] * len(send_items)
+
             # 遍历该文件的所有条目
-            for item in items:
-                # 计算当前条目的长度
-                item_length = item.get_token_count(item.source_text) if limit_type == "token" else 1
+            for item, item_length in zip(send_items, item_lengths):
 
                 # 如果当前片段长度加上当前条目长度超过限制，则将当前片段添加到结果列表中，并重置当前片段
                 if current_chunk and (current_length + item_length > limit_count):
@@ -336,6 +574,11 @@ class CacheManager(Base):
                 print(f"Error: 不支持更新字段 {field_name}")
                 return
 
+        # 记录变化的条目，等待下次保存时写入日志
+        self.record_changed_items([item_to_update])
+        if getattr(self, "save_to_file_require_path", None):
+            self.save_to_file_require_flag = True
+
     # 缓存重编排方法
     def reformat_and_splice_cache(self, file_path: str, formatted_data: dict, selected_item_indices: list[int]) -> list[CacheItem] | None:
         """
@@ -403,6 +646,10 @@ class CacheManager(Base):
             if hasattr(cache_file, "items_index_dict"):
                 del cache_file.items_index_dict # 清除旧缓存，以便重新计算
 
+            # 条目结构发生变化，日志无法表达，下次保存时写入完整快照
+            self.compact_require_flag = True
+            self.item_store_dirty = True
+
             return final_items
 
     # 缓存全搜索方法
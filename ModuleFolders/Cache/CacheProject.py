@@ -38,7 +38,9 @@ class CacheProjectStatistics(ThreadSafeCache):
     line: int = 0
     token: int = 0
     total_completion_tokens: int = 0
+    cached_tokens: int = 0  # 命中提示词缓存的 Tokens 数量
     time: float = 0.0
+    dedup_line: int = 0  # 由重复原文回填的行数
 
 
 @dataclass(repr=False)
@@ -75,8 +77,28 @@ class CacheProject(ThreadSafeCache, ExtraMixin):
                     for item in file.items:
                         yield item
 
+    # 挂载SQLite条目索引，挂载后状态统计走索引查询
+    def attach_item_store(self, item_store) -> None:
+        with self._lock:
+            self.detach_item_store()
+            item_store.rebuild(self.files.values())
+            self._item_store = item_store
+
+    def detach_item_store(self) -> None:
+        with self._lock:
+            item_store = getattr(self, "_item_store", None)
+            if item_store is not None:
+                self._item_store = None
+                item_store.close()
+
+    @property
+    def item_store(self):
+        return getattr(self, "_item_store", None)
+
     def count_items(self, status=None):
         with self._lock:
+            if self.item_store is not None:
+                return self.item_store.count_items(status)
             if status is None:
                 return sum(len(file.items) for file in self.files.values())
             else:
@@ -1,8 +1,15 @@
 import fnmatch
+import multiprocessing.util
+import os
+import pickle
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
+import rich
+
+from ModuleFolders.Cache.CacheFile import CacheFile
 from ModuleFolders.Cache.CacheItem import CacheItem
 from ModuleFolders.Cache.CacheProject import CacheProject
 from ModuleFolders.FileReader import ReaderUtil
@@ -10,9 +17,45 @@ from ModuleFolders.FileReader.BaseReader import BaseSourceReader
 from ModuleFolders.FileReader.ReaderUtil import make_final_detect_text
 
 
+# 工作进程中的读取器，每个进程各自持有读取器与语言检测器
+_WORKER_READER: BaseSourceReader | None = None
+
+
+# 初始化工作进程
+def _init_read_worker(create_reader: Callable[[], BaseSourceReader]):
+    global _WORKER_READER
+
+    # fork 启动时可能继承主进程的检测器，不能跨进程使用，由子进程重新加载
+    ReaderUtil._LANG_DETECTOR_INSTANCE = None
+
+    _WORKER_READER = create_reader()
+    _WORKER_READER.__enter__()
+
+    # 进程退出时释放读取器与语言检测器
+    multiprocessing.util.Finalize(None, _close_read_worker, exitpriority=10)
+
+
+# 释放工作进程的资源
+def _close_read_worker():
+    global _WORKER_READER
+    try:
+        if _WORKER_READER is not None:
+            _WORKER_READER.__exit__(None, None, None)
+    finally:
+        _WORKER_READER = None
+        ReaderUtil.close_lang_detector()
+
+
+# 在工作进程中读取单个文件
+def _read_file_in_worker(file_path: Path) -> tuple[CacheFile, str]:
+    cache_file = _WORKER_READER.read_source_file(file_path)
+    return cache_file, _WORKER_READER.get_file_project_type(file_path)
+
+
 class DirectoryReader:
-    def __init__(self, create_reader: Callable[[], BaseSourceReader], exclude_rules: list[str]):
+    def __init__(self, create_reader: Callable[[], BaseSourceReader], exclude_rules: list[str], max_workers: int = 1):
         self.create_reader = create_reader  # 工厂函数
+        self.max_workers = max_workers  # 并行读取的进程数，1为逐个读取，0为按CPU核心数
 
         self.exclude_files = set()
         self.exclude_paths = set()
@@ -31,6 +74,54 @@ class DirectoryReader:
             return True
         return False
 
+    # 获取并行读取使用的进程数
+    def _get_worker_count(self, file_count: int) -> int:
+        max_workers = self.max_workers if self.max_workers > 0 else (os.cpu_count() or 1)
+        max_workers = min(max_workers, file_count)
+        if max_workers <= 1:
+            return 1
+
+        # 工厂函数需要传递给子进程
+        try:
+            pickle.dumps(self.create_reader)
+        except Exception as e:
+            rich.print(f"[[yellow]WARNING[/]] 读取器无法在子进程中创建，将逐个读取文件: {e}")
+            return 1
+        return max_workers
+
+    # 读取全部文件，按传入的顺序返回结果
+    def _read_files(self, reader: BaseSourceReader, file_paths: list[Path]) -> Iterator[tuple[Path, CacheFile, str]]:
+        max_workers = self._get_worker_count(len(file_paths))
+
+        if max_workers <= 1:
+            for file_path in file_paths:
+                cache_file = reader.read_source_file(file_path)
+                yield file_path, cache_file, reader.get_file_project_type(file_path)
+            return
+
+        rich.print(f"[[green]INFO[/]] 使用 {max_workers} 个进程并行读取 {len(file_paths)} 个文件...")
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_read_worker,
+            initargs=(self.create_reader,),
+        )
+        try:
+            # map 按提交顺序返回结果，文件与条目的顺序和逐个读取时一致
+            results = executor.map(_read_file_in_worker, file_paths)
+            for file_path, (cache_file, file_project_type) in zip(file_paths, results):
+                yield file_path, cache_file, file_project_type
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    # 收集需要读取的文件
+    def _collect_files(self, reader: BaseSourceReader, source_directory: Path) -> Iterable[Path]:
+        for root, _, files in source_directory.walk():  # 递归遍历文件夹
+            for file in files:
+                file_path = root / file
+                # 检查是否被排除，以及是否是目标类型文件
+                if not self.is_exclude(file_path, source_directory) and reader.can_read(file_path):
+                    yield file_path
+
     # 树状读取文件夹内同类型文件
     def read_source_directory(self, source_directory: Path) -> CacheProject:
         """
@@ -56,44 +147,41 @@ class DirectoryReader:
             self._update_exclude_rules(reader.exclude_rules)
             cache_project.project_type = reader.get_project_type()
 
-            for root, _, files in source_directory.walk():  # 递归遍历文件夹
-                for file in files:
-                    file_path = root / file
-                    # 检查是否被排除，以及是否是目标类型文件
-                    if not self.is_exclude(file_path, source_directory) and reader.can_read(file_path):
-
-                        # 读取单个文件的文本信息，并添加其他信息
-                        cache_file = reader.read_source_file(file_path)
-                        cache_file.storage_path = str(file_path.relative_to(source_directory))
-                        cache_file.file_project_type = reader.get_file_project_type(file_path)
-                        for item in cache_file.items:
-                            item.text_index = text_index
-                            item.model = 'none'
-                            text_index += 1
-
-                            # 统计每行的语言信息
-                            lang_code = item.lang_code
-                            # 只统计检测到有效语言代码的item行
-                            if lang_code:
-                                lang_confidence = lang_code[1]
-                                # 更新语言统计：[计数, 累计置信度]
-                                stats = language_stats[cache_file.storage_path][lang_code[0]]
-                                stats[0] += 1  # 增加计数
-                                stats[1] += lang_confidence  # 累加置信度
-                                # 累计有效项目总数
-                                file_valid_items_count[cache_file.storage_path] += 1
-
-                                # 添加行至后续使用
-                                final_detect_text = make_final_detect_text(item)
-                                if final_detect_text:
-                                    source_texts[cache_file.storage_path].append(final_detect_text)
-
-                        # 补充缺失的字典项
-                        if not language_stats[cache_file.storage_path]:
-                            language_stats[cache_file.storage_path] = defaultdict(lambda: [0, 0.0])
-
-                        if cache_file.items:
-                            cache_project.add_file(cache_file)
+            # 先收集全部文件，再按遍历顺序读取，text_index 在主进程中按顺序分配
+            file_paths = list(self._collect_files(reader, source_directory))
+
+            for file_path, cache_file, file_project_type in self._read_files(reader, file_paths):
+                # 添加其他信息
+                cache_file.storage_path = str(file_path.relative_to(source_directory))
+                cache_file.file_project_type = file_project_type
+                for item in cache_file.items:
+                    item.text_index = text_index
+                    item.model = 'none'
+                    text_index += 1
+
+                    # 统计每行的语言信息
+                    lang_code = item.lang_code
+                    # 只统计检测到有效语言代码的item行
+                    if lang_code:
+                        lang_confidence = lang_code[1]
+                        # 更新语言统计：[计数, 累计置信度]
+                        stats = language_stats[cache_file.storage_path][lang_code[0]]
+                        stats[0] += 1  # 增加计数
+                        stats[1] += lang_confidence  # 累加置信度
+                        # 累计有效项目总数
+                        file_valid_items_count[cache_file.storage_path] += 1
+
+                        # 添加行至后续使用
+                        final_detect_text = make_final_detect_text(item)
+                        if final_detect_text:
+                            source_texts[cache_file.storage_path].append(final_detect_text)
+
+                # 补充缺失的字典项
+                if not language_stats[cache_file.storage_path]:
+                    language_stats[cache_file.storage_path] = defaultdict(lambda: [0, 0.0])
+
+                if cache_file.items:
+                    cache_project.add_file(cache_file)
 
         # 处理语言统计结果
         language_counter = defaultdict(list)
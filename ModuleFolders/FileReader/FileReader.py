@@ -67,23 +67,36 @@ class FileReader():
             reader_factory = partial(reader_class, **init_kwargs) if init_kwargs else reader_class
             self.reader_factory_dict[reader_class.get_project_type()] = reader_factory
 
-    def _get_reader_init_params(self, project_type, label_input_path):
+    # 不引用实例，使绑定了参数的工厂可以传递给读取子进程
+    @staticmethod
+    def _get_reader_init_params(project_type, label_input_path):
         input_config = InputConfig(Path(label_input_path))
         if project_type == AutoTypeReader.get_project_type():
-            reader_init_params_factory = partial(self._get_reader_init_params, label_input_path=label_input_path)
+            reader_init_params_factory = partial(FileReader._get_reader_init_params, label_input_path=label_input_path)
             return ReaderInitParams(input_config=input_config, reader_init_params_factory=reader_init_params_factory)
         return ReaderInitParams(input_config=input_config)
 
+    def _get_reader_factory(self, translation_project):
+        reader_factory = self.reader_factory_dict[translation_project]
+        if translation_project == AutoTypeReader.get_project_type():
+            # 注册时绑定的是字典视图，无法序列化，这里换成其他reader工厂的列表
+            reader_factories = [
+                factory for project_type, factory in self.reader_factory_dict.items()
+                if project_type != AutoTypeReader.get_project_type()
+            ]
+            reader_factory = partial(AutoTypeReader, reader_factories=reader_factories)
+        return reader_factory
+
     # 根据文件类型读取文件，并返回缓存对象
-    def read_files (self,translation_project,label_input_path, exclude_rule_str):
+    def read_files (self,translation_project,label_input_path, exclude_rule_str, max_workers=1):
         # 检查传入的项目类型是否已经被注册。
         if translation_project in self.reader_factory_dict:
             # 获取初始化参数
             reader_init_params = self._get_reader_init_params(translation_project, label_input_path)
             # 绑定配置，使工厂变成无参
-            reader_factory = partial(self.reader_factory_dict[translation_project], **reader_init_params)
-            # 创建对象，接收配置好、无参数的 reader_factory
-            reader = DirectoryReader(reader_factory, exclude_rule_str.split(','))
+            reader_factory = partial(self._get_reader_factory(translation_project), **reader_init_params)
+            # 创建对象，接收配置好、无参数的 reader_factory，max_workers 大于1时使用多进程并行读取
+            reader = DirectoryReader(reader_factory, exclude_rule_str.split(','), max_workers)
             # 再次获取路径对象
             source_directory = Path(label_input_path)
             # 读取整个输入目录,生成缓存对象
@@ -1,7 +1,6 @@
 import os
 import pathlib
 import re
-import sys
 import time
 from typing import Union
 
@@ -9,14 +8,12 @@ import chardet
 import charset_normalizer
 import rich
 from bs4 import BeautifulSoup
-from mediapipe.tasks.python import text, BaseOptions
-from mediapipe.tasks.python.text import LanguageDetector
 
 from ModuleFolders.Cache.CacheFile import CacheFile
 from ModuleFolders.Cache.CacheItem import CacheItem
 
-_LANG_DETECTOR_INSTANCE: LanguageDetector | None = None
-"""语言检测器单例实现"""
+_LANG_DETECTOR_INSTANCE = None
+"""语言检测器单例实现，MediaPipe 在首次检测语言时才导入"""
 
 VARIOUS_LETTERS_RANGE = r'a-zA-Z\uFF21-\uFF3A\uFF41-\uFF5A'
 """标准字母与全角字母的范围"""
@@ -78,9 +75,8 @@ def get_lang_detector():
         # Record start time
         start_time = time.time()
 
-        # 设置模型目录
-        script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-        model_path = os.path.join(script_dir, "Resource", "Models", "mediapipe", "language_detector.tflite")
+        # 设置模型目录，与其他资源文件一样相对于工作目录，不依赖启动脚本的位置
+        model_path = os.path.join(".", "Resource", "Models", "mediapipe", "language_detector.tflite")
 
         if not os.path.exists(model_path):
             rich.print(f"[[red]ERROR[/]] 模型文件不存在于: {model_path}")
@@ -88,6 +84,8 @@ def get_lang_detector():
             raise FileNotFoundError(f"在预期位置未找到模型文件: {model_path}")
 
         try:
+            from mediapipe.tasks.python import text, BaseOptions
+
             # 使用 Python 的 open 函数读取模型文件到缓冲区后加载模型，兼容路径有中文的情况
             with open(model_path, "rb") as f:  # "rb" 表示二进制读取模式
                 model_buffer = f.read()
@@ -1,5 +1,6 @@
 from Base.Base import Base
 from ModuleFolders.LLMRequester.LLMClientFactory import LLMClientFactory
+from ModuleFolders.ResponseExtractor.StreamExtractor import StreamExtractor
 
 
 def is_claude3_model(model_name):
@@ -14,27 +15,12 @@ class AnthropicRequester(Base):
 
     # 发起请求
     def request_anthropic(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
-        try:
-            model_name = platform_config.get("model_name")
-            request_timeout = platform_config.get("request_timeout", 60)
-            temperature = platform_config.get("temperature", 1.0)
-            top_p = platform_config.get("top_p", 1.0)
-            think_switch = platform_config.get("think_switch")
-            think_depth = platform_config.get("think_depth")
-
-
-
-            # 参数基础配置
-            base_params = {
-                "model": model_name,
-                "system": system_prompt,
-                "messages": messages,
-                "temperature": temperature,
-                "top_p": top_p,
-                "timeout": request_timeout,
-                "max_tokens": 4096 if is_claude3_model(model_name) else 20000
-            }
+        if platform_config.get("stream_switch"):
+            return self.request_anthropic_stream(messages, system_prompt, platform_config)
 
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
 
             # 从工厂获取客户端
             client = LLMClientFactory().get_anthropic_client(platform_config)
@@ -48,9 +34,150 @@ class AnthropicRequester(Base):
             response_content = response.content[0].text
 
         except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(getattr(response, "usage", None))
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起异步请求
+    async def request_anthropic_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        if platform_config.get("stream_switch"):
+            return await self.request_anthropic_stream_async(messages, system_prompt, platform_config)
+
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
+
+            # 从工厂获取异步客户端
+            client = LLMClientFactory().get_async_anthropic_client(platform_config)
+
+            # 发送请求
+            response = await client.messages.create(**base_params)
+
+            # 提取回复的文本内容
+            response_think = ""
+            response_content = response.content[0].text
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
 
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(getattr(response, "usage", None))
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起流式请求，回复明显异常时提前中止
+    def request_anthropic_stream(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
+            base_params["stream"] = True
+
+            # 从工厂获取客户端
+            client = LLMClientFactory().get_anthropic_client(platform_config)
+
+            # 逐个接收回复事件
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage = [0, 0, 0]
+            with client.messages.create(**base_params) as stream:
+                for event in stream:
+                    abort_reason = self.feed_stream_event(extractor, event, usage)
+                    if abort_reason:
+                        break
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        platform_config["cached_tokens"] = usage[2]
+
+        return False, extractor.think, extractor.content, usage[0], usage[1]
+
+    # 发起异步流式请求，回复明显异常时提前中止
+    async def request_anthropic_stream_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
+            base_params["stream"] = True
+
+            # 从工厂获取异步客户端
+            client = LLMClientFactory().get_async_anthropic_client(platform_config)
+
+            # 逐个接收回复事件
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage = [0, 0, 0]
+            async with await client.messages.create(**base_params) as stream:
+                async for event in stream:
+                    abort_reason = self.feed_stream_event(extractor, event, usage)
+                    if abort_reason:
+                        break
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        platform_config["cached_tokens"] = usage[2]
+
+        return False, extractor.think, extractor.content, usage[0], usage[1]
+
+    # 将回复事件交给流式解析器，并记录 Tokens 消耗，返回中止原因
+    def feed_stream_event(self, extractor: StreamExtractor, event, usage: list[int]) -> str:
+        if event.type == "message_start":
+            usage[0] = getattr(event.message.usage, "input_tokens", 0) or 0
+            usage[2] = self.extract_cached_tokens(event.message.usage)
+        elif event.type == "message_delta":
+            usage[1] = getattr(event.usage, "output_tokens", 0) or 0
+        elif event.type == "content_block_delta":
+            if event.delta.type == "thinking_delta":
+                return extractor.feed_think(event.delta.thinking)
+            elif event.delta.type == "text_delta":
+                return extractor.feed(event.delta.text)
+
+        return ""
+
+    # 构建请求参数
+    def build_request_params(self, messages, system_prompt, platform_config) -> dict:
+        model_name = platform_config.get("model_name")
+        request_timeout = platform_config.get("request_timeout", 60)
+        temperature = platform_config.get("temperature", 1.0)
+        top_p = platform_config.get("top_p", 1.0)
+
+        # 开启提示词缓存时，在系统提示词末尾设置缓存断点
+        system = system_prompt
+        if platform_config.get("prompt_cache_switch") and system_prompt:
+            system = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+        # 参数基础配置
+        return {
+            "model": model_name,
+            "system": system,
+            "messages": messages,
+            "temperature": temperature,
+            "top_p": top_p,
+            "timeout": request_timeout,
+            "max_tokens": 4096 if is_claude3_model(model_name) else 20000
+        }
+
+    # 提取 Tokens 消耗
+    def extract_usage(self, response) -> tuple[int, int]:
         # 获取指令消耗
         try:
             prompt_tokens = int(response.usage.prompt_tokens)
@@ -63,4 +190,11 @@ class AnthropicRequester(Base):
         except Exception:
             completion_tokens = 0
 
-        return False, response_think, response_content, prompt_tokens, completion_tokens
+        return prompt_tokens, completion_tokens
+
+    # 提取命中提示词缓存的 Tokens 数量
+    def extract_cached_tokens(self, usage) -> int:
+        try:
+            return int(getattr(usage, "cache_read_input_tokens", 0) or 0)
+        except Exception:
+            return 0
@@ -43,6 +43,7 @@ class CohereRequester(Base):
             # 提取回复的文本内容
             response_content = response.message.content[0].text
         except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
 
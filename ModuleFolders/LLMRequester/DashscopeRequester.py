@@ -88,6 +88,7 @@ class DashscopeRequester(Base):
                 response_content = message.content
 
         except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
 
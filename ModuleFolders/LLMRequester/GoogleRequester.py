@@ -1,93 +1,332 @@
+import hashlib
+import threading
+import time
+
 from google.genai import types
 from google.genai.types import Content, HarmCategory, Part
 
 from Base.Base import Base
 from ModuleFolders.LLMRequester.LLMClientFactory import LLMClientFactory
+from ModuleFolders.ResponseExtractor.StreamExtractor import StreamExtractor
 
 
 # 接口请求器
 class GoogleRequester(Base):
+
+    # 系统提示词显式缓存的有效期（秒）
+    CACHED_CONTENT_TTL = 3600
+
+    # 已创建的显式缓存，{(接口地址, 密钥, 模型, 系统提示词哈希): (缓存名称, 过期时间)}
+    # 正在创建或创建失败时缓存名称为空字符串，期间直接发送系统提示词
+    cached_contents = {}
+    cached_contents_lock = threading.Lock()
+
     def __init__(self) -> None:
         pass
 
     # 发起请求
     def request_google(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
-        try:
-            model_name = platform_config.get("model_name")
-            temperature = platform_config.get("temperature", 1.0)
-            top_p = platform_config.get("top_p", 1.0)
-            presence_penalty = platform_config.get("presence_penalty", 0.0)
-            frequency_penalty = platform_config.get("frequency_penalty", 0.0)
-            think_switch = platform_config.get("think_switch")
-            thinking_budget = platform_config.get("thinking_budget")
-
-            # 重新处理openai格式的消息为google格式
-            processed_messages = [
-                Content(
-                    role="model" if m["role"] == "assistant" else m["role"],
-                    parts=[Part.from_text(text=m["content"])]
-                )
-                for m in messages if m["role"] != "system"
-            ]
+        if platform_config.get("stream_switch"):
+            return self.request_google_stream(messages, system_prompt, platform_config)
 
+        try:
             # 创建 Gemini Developer API 客户端（非 Vertex AI API）
             client = LLMClientFactory().get_google_client(platform_config)
 
-            # 构建基础配置
-            gen_config = types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                max_output_tokens=65536 if model_name.startswith("gemini-2.5") else 8192,
-                temperature=temperature,
-                top_p=top_p,
-                presence_penalty=presence_penalty,
-                frequency_penalty=frequency_penalty,
-                safety_settings=[
-                    types.SafetySetting(category=category, threshold='BLOCK_NONE')
-                    for category in HarmCategory
-                    if category not in [HarmCategory.HARM_CATEGORY_UNSPECIFIED, HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY]
-                ]
-            )
+            # 构建请求参数，开启提示词缓存时使用系统提示词的显式缓存
+            cached_content = self.get_cached_content(client, system_prompt, platform_config)
+            request_params = self.build_request_params(messages, system_prompt, platform_config, cached_content)
+
+            # 生成文本内容
+            response = client.models.generate_content(**request_params)
+
+            # 提取回复内容
+            response_think, response_content = self.extract_response_content(response)
 
-            # 如果开启了思考模式，则添加思考配置
-            if think_switch:
-                gen_config.thinking_config = types.ThinkingConfig(
-                    include_thoughts=True,
-                    thinking_budget=thinking_budget
-                )
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(response)
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起异步请求
+    async def request_google_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        if platform_config.get("stream_switch"):
+            return await self.request_google_stream_async(messages, system_prompt, platform_config)
+
+        try:
+            # 异步客户端按事件循环创建，任务结束时随事件循环关闭
+            client = LLMClientFactory().get_async_google_client(platform_config)
+
+            # 构建请求参数，开启提示词缓存时使用系统提示词的显式缓存
+            cached_content = await self.get_cached_content_async(client, system_prompt, platform_config)
+            request_params = self.build_request_params(messages, system_prompt, platform_config, cached_content)
 
             # 生成文本内容
-            response = client.models.generate_content(
-                model=model_name,
-                contents=processed_messages,
-                config=gen_config,
-            )
+            response = await client.models.generate_content(**request_params)
+
+            # 提取回复内容
+            response_think, response_content = self.extract_response_content(response)
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(response)
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起流式请求，回复明显异常时提前中止
+    def request_google_stream(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 创建 Gemini Developer API 客户端（非 Vertex AI API）
+            client = LLMClientFactory().get_google_client(platform_config)
+
+            # 构建请求参数，开启提示词缓存时使用系统提示词的显式缓存
+            cached_content = self.get_cached_content(client, system_prompt, platform_config)
+            request_params = self.build_request_params(messages, system_prompt, platform_config, cached_content)
+
+            # 逐块接收回复
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage_chunk = None
+            stream = client.models.generate_content_stream(**request_params)
+            try:
+                for chunk in stream:
+                    usage_chunk = chunk if chunk.usage_metadata else usage_chunk
+                    abort_reason = self.feed_stream_chunk(extractor, chunk)
+                    if abort_reason:
+                        break
+            finally:
+                stream.close()
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(usage_chunk)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(usage_chunk)
+
+        return False, extractor.think, extractor.content, prompt_tokens, completion_tokens
+
+    # 发起异步流式请求，回复明显异常时提前中止
+    async def request_google_stream_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 异步客户端按事件循环创建，任务结束时随事件循环关闭
+            client = LLMClientFactory().get_async_google_client(platform_config)
+
+            # 构建请求参数，开启提示词缓存时使用系统提示词的显式缓存
+            cached_content = await self.get_cached_content_async(client, system_prompt, platform_config)
+            request_params = self.build_request_params(messages, system_prompt, platform_config, cached_content)
 
-            # 初始化思考内容和回复内容
-            response_think = ""
-            response_content = ""
-
-            # 根据Google API文档，思考内容和回复内容在不同的 "parts" 中
-            # 遍历这些 parts 来分别提取它们
-            if response.candidates and response.candidates[0].content.parts:
-                for part in response.candidates[0].content.parts:
-                    if not part.text:
-                        continue
-                    # 检查 part 是否包含思考内容 (part.thought is True)
-                    # 使用 hasattr 增加代码健壮性
-                    if hasattr(part, 'thought') and part.thought:
-                        response_think += part.text
-                    else:
-                        # 否则，这是常规的回复内容
-                        response_content += part.text
-            else:
-                # 作为后备方案，如果 response.candidates[0].content.parts 不存在或为空
-                # 尝试直接获取 .text 属性，这通常只包含最终回复
-                response_content = response.text
+            # 逐块接收回复
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage_chunk = None
+            stream = await client.models.generate_content_stream(**request_params)
+            try:
+                async for chunk in stream:
+                    usage_chunk = chunk if chunk.usage_metadata else usage_chunk
+                    abort_reason = self.feed_stream_chunk(extractor, chunk)
+                    if abort_reason:
+                        break
+            finally:
+                await stream.aclose()
 
         except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
-        
+
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(usage_chunk)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(usage_chunk)
+
+        return False, extractor.think, extractor.content, prompt_tokens, completion_tokens
+
+    # 将回复块交给流式解析器，返回中止原因
+    def feed_stream_chunk(self, extractor: StreamExtractor, chunk) -> str:
+        # 每个回复块的结构与完整回复相同
+        if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+            return ""
+
+        response_think, response_content = self.extract_response_content(chunk)
+        return extractor.feed_think(response_think) or extractor.feed(response_content)
+
+    # 获取显式缓存的索引，未开启提示词缓存时返回 None
+    def get_cached_content_key(self, system_prompt, platform_config) -> tuple:
+        if not platform_config.get("prompt_cache_switch") or not system_prompt:
+            return None
+
+        return (
+            platform_config.get("api_url"),
+            platform_config.get("api_key"),
+            platform_config.get("model_name"),
+            hashlib.blake2b(system_prompt.encode("utf-8"), digest_size = 16).hexdigest(),
+        )
+
+    # 查找可用的显式缓存，没有记录时预留该索引并返回 None，由调用方创建缓存
+    def reserve_cached_content(self, key: tuple) -> str | None:
+        now = time.time()
+        with GoogleRequester.cached_contents_lock:
+            name, expire_time = GoogleRequester.cached_contents.get(key, ("", 0))
+
+            # 提前一分钟视为过期，避免请求途中缓存失效
+            if expire_time - 60 > now:
+                return name
+
+            GoogleRequester.cached_contents[key] = ("", now + 60)
+            return None
+
+    # 记录创建的显式缓存，创建失败时在有效期内不再重试
+    def store_cached_content(self, key: tuple, name: str) -> None:
+        with GoogleRequester.cached_contents_lock:
+            GoogleRequester.cached_contents[key] = (name, time.time() + self.CACHED_CONTENT_TTL)
+
+    # 构建创建显式缓存的参数
+    def build_cached_content_params(self, system_prompt, platform_config) -> dict:
+        return {
+            "model": platform_config.get("model_name"),
+            "config": types.CreateCachedContentConfig(
+                system_instruction = system_prompt,
+                ttl = f"{self.CACHED_CONTENT_TTL}s",
+            ),
+        }
+
+    # 获取系统提示词的显式缓存名称，未开启、正在创建或创建失败时返回空字符串
+    def get_cached_content(self, client, system_prompt, platform_config) -> str:
+        key = self.get_cached_content_key(system_prompt, platform_config)
+        if key is None:
+            return ""
+
+        name = self.reserve_cached_content(key)
+        if name is not None:
+            return name
+
+        try:
+            name = client.caches.create(**self.build_cached_content_params(system_prompt, platform_config)).name
+        except Exception as e:
+            # 系统提示词短于模型的最小缓存长度时也会失败
+            self.warning(f"创建提示词缓存失败，将直接发送系统提示词 ... {e}")
+            name = ""
+
+        self.store_cached_content(key, name)
+        return name
+
+    # 获取系统提示词的显式缓存名称的异步版本
+    async def get_cached_content_async(self, client, system_prompt, platform_config) -> str:
+        key = self.get_cached_content_key(system_prompt, platform_config)
+        if key is None:
+            return ""
+
+        name = self.reserve_cached_content(key)
+        if name is not None:
+            return name
+
+        try:
+            name = (await client.caches.create(**self.build_cached_content_params(system_prompt, platform_config))).name
+        except Exception as e:
+            # 系统提示词短于模型的最小缓存长度时也会失败
+            self.warning(f"创建提示词缓存失败，将直接发送系统提示词 ... {e}")
+            name = ""
+
+        self.store_cached_content(key, name)
+        return name
+
+    # 构建请求参数
+    def build_request_params(self, messages, system_prompt, platform_config, cached_content: str = "") -> dict:
+        model_name = platform_config.get("model_name")
+        temperature = platform_config.get("temperature", 1.0)
+        top_p = platform_config.get("top_p", 1.0)
+        presence_penalty = platform_config.get("presence_penalty", 0.0)
+        frequency_penalty = platform_config.get("frequency_penalty", 0.0)
+        think_switch = platform_config.get("think_switch")
+        thinking_budget = platform_config.get("thinking_budget")
+
+        # 重新处理openai格式的消息为google格式
+        processed_messages = [
+            Content(
+                role="model" if m["role"] == "assistant" else m["role"],
+                parts=[Part.from_text(text=m["content"])]
+            )
+            for m in messages if m["role"] != "system"
+        ]
+
+        # 构建基础配置
+        gen_config = types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            max_output_tokens=65536 if model_name.startswith("gemini-2.5") else 8192,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            safety_settings=[
+                types.SafetySetting(category=category, threshold='BLOCK_NONE')
+                for category in HarmCategory
+                if category not in [HarmCategory.HARM_CATEGORY_UNSPECIFIED, HarmCategory.HARM_CATEGORY_CIVIC_INTEGRITY]
+            ]
+        )
+
+        # 使用显式缓存时，系统提示词已包含在缓存中
+        if cached_content:
+            gen_config.system_instruction = None
+            gen_config.cached_content = cached_content
+
+        # 如果开启了思考模式，则添加思考配置
+        if think_switch:
+            gen_config.thinking_config = types.ThinkingConfig(
+                include_thoughts=True,
+                thinking_budget=thinking_budget
+            )
+
+        return {
+            "model": model_name,
+            "contents": processed_messages,
+            "config": gen_config,
+        }
+
+    # 提取回复内容
+    def extract_response_content(self, response) -> tuple[str, str]:
+        # 初始化思考内容和回复内容
+        response_think = ""
+        response_content = ""
+
+        # 根据Google API文档，思考内容和回复内容在不同的 "parts" 中
+        # 遍历这些 parts 来分别提取它们
+        if response.candidates and response.candidates[0].content.parts:
+            for part in response.candidates[0].content.parts:
+                if not part.text:
+                    continue
+                # 检查 part 是否包含思考内容 (part.thought is True)
+                # 使用 hasattr 增加代码健壮性
+                if hasattr(part, 'thought') and part.thought:
+                    response_think += part.text
+                else:
+                    # 否则，这是常规的回复内容
+                    response_content += part.text
+        else:
+            # 作为后备方案，如果 response.candidates[0].content.parts 不存在或为空
+            # 尝试直接获取 .text 属性，这通常只包含最终回复
+            response_content = response.text
+
+        return response_think, response_content
+
+    # 提取 Tokens 消耗
+    def extract_usage(self, response) -> tuple[int, int]:
         # 获取指令消耗
         try:
             prompt_tokens = int(response.usage_metadata.prompt_token_count)
@@ -100,4 +339,11 @@ class GoogleRequester(Base):
         except Exception:
             completion_tokens = 0
 
-        return False, response_think, response_content, prompt_tokens, completion_tokens
\ No newline at end of file
+        return prompt_tokens, completion_tokens
+
+    # 提取命中提示词缓存的 Tokens 数量
+    def extract_cached_tokens(self, response) -> int:
+        try:
+            return int(response.usage_metadata.cached_content_token_count or 0)
+        except Exception:
+            return 0
@@ -1,14 +1,17 @@
 # LLMClientFactory.py
+import asyncio
 import threading
-from typing import Dict, Any
+from typing import Dict, Any, TYPE_CHECKING
 import httpx
-from openai import OpenAI
-import anthropic
-import boto3
-import cohere
-from google import genai
 import json
 
+# 各平台的 SDK 导入耗时较长，只在首次创建对应客户端时导入
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+    import anthropic
+    import cohere
+    from google import genai
+
 
 def create_httpx_client(
         http2=True,
@@ -41,6 +44,32 @@ def create_httpx_client(
     )
 
 
+def create_async_httpx_client(
+        http2=True,
+        max_connections=1024,
+        max_keepalive_connections=256,
+        keepalive_expiry=30,
+        **kwargs
+):
+    """
+    创建配置好的异步HTTP客户端，异步模式下单个连接池需要承载更多的并发请求
+
+    参数同 create_httpx_client
+
+    返回:
+        配置好的httpx.AsyncClient实例
+    """
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        **kwargs
+    )
+
+
 class LLMClientFactory:
     """LLM客户端工厂 - 集中管理和缓存不同类型的LLM客户端"""
 
@@ -54,7 +83,7 @@ class LLMClientFactory:
                 cls._instance._clients = {}
             return cls._instance
 
-    def get_openai_client(self, config: Dict[str, Any]) -> OpenAI:
+    def get_openai_client(self, config: Dict[str, Any]) -> "OpenAI":
         """获取OpenAI客户端"""
         # 展示需要到的配置项
         api_key = config.get("api_key")
@@ -62,7 +91,7 @@ class LLMClientFactory:
         key = ("openai", api_url, api_key)
         return self._get_cached_client(key, lambda: self._create_openai_client(config, api_key))
 
-    def get_openai_client_local(self, config: Dict[str, Any]) -> OpenAI:
+    def get_openai_client_local(self, config: Dict[str, Any]) -> "OpenAI":
         """获取OpenAI客户端"""
         api_key = config.get("api_key")
         if not api_key:
@@ -71,7 +100,7 @@ class LLMClientFactory:
         key = ("openai_local", api_url, api_key)
         return self._get_cached_client(key, lambda: self._create_openai_client(config, api_key))
 
-    def get_openai_client_sakura(self, config: Dict[str, Any]) -> OpenAI:
+    def get_openai_client_sakura(self, config: Dict[str, Any]) -> "OpenAI":
         """获取OpenAI客户端"""
         api_key = config.get("api_key")
         if not api_key:
@@ -80,14 +109,14 @@ class LLMClientFactory:
         key = ("openai_sakura", api_url, api_key)
         return self._get_cached_client(key, lambda: self._create_openai_client(config, api_key))
 
-    def get_anthropic_client(self, config: Dict[str, Any]) -> anthropic.Anthropic:
+    def get_anthropic_client(self, config: Dict[str, Any]) -> "anthropic.Anthropic":
         """获取Anthropic客户端"""
         api_key = config.get("api_key")
         api_url = config.get("api_url")
         key = ("anthropic", api_url, api_key)
         return self._get_cached_client(key, lambda: self._create_anthropic_client(config))
 
-    def get_anthropic_bedrock(self, config: Dict[str, Any]) -> anthropic.AnthropicBedrock:
+    def get_anthropic_bedrock(self, config: Dict[str, Any]) -> "anthropic.AnthropicBedrock":
         """获取AnthropicBedrock客户端"""
         region = config.get("region")
         access_key = config.get("access_key")
@@ -103,14 +132,14 @@ class LLMClientFactory:
         key = ("boto3_bedrock", region, access_key, secret_key)
         return self._get_cached_client(key, lambda: self._create_boto3_bedrock(config))
 
-    def get_cohere_client(self, config: Dict[str, Any]) -> cohere.ClientV2:
+    def get_cohere_client(self, config: Dict[str, Any]) -> "cohere.ClientV2":
         """获取Cohere客户端"""
         api_key = config.get("api_key")
         api_url = config.get("api_url")
         key = ("cohere", api_url, api_key)
         return self._get_cached_client(key, lambda: self._create_cohere_client(config))
 
-    def get_google_client(self, config: Dict[str, Any]) -> genai.Client:
+    def get_google_client(self, config: Dict[str, Any]) -> "genai.Client":
         """获取Google AI客户端"""
         api_key = config.get("api_key")
         api_url = config.get("api_url")
@@ -119,6 +148,65 @@ class LLMClientFactory:
         key = ("google", api_key, api_url, extra_body_serialized)
         return self._get_cached_client(key, lambda: self._create_google_client(config))
 
+    def get_async_openai_client(self, config: Dict[str, Any]) -> "AsyncOpenAI":
+        """获取异步OpenAI客户端"""
+        api_key = config.get("api_key")
+        api_url = config.get("api_url")
+        key = ("async_openai", self._current_loop_id(), api_url, api_key)
+        return self._get_cached_client(key, lambda: self._create_async_openai_client(config, api_key))
+
+    def get_async_openai_client_local(self, config: Dict[str, Any]) -> "AsyncOpenAI":
+        """获取异步OpenAI客户端"""
+        api_key = config.get("api_key")
+        if not api_key:
+            api_key = "none_api_key"
+        api_url = config.get("api_url")
+        key = ("async_openai_local", self._current_loop_id(), api_url, api_key)
+        return self._get_cached_client(key, lambda: self._create_async_openai_client(config, api_key))
+
+    def get_async_openai_client_sakura(self, config: Dict[str, Any]) -> "AsyncOpenAI":
+        """获取异步OpenAI客户端"""
+        api_key = config.get("api_key")
+        if not api_key:
+            api_key = "none_api_key"
+        api_url = config.get("api_url")
+        key = ("async_openai_sakura", self._current_loop_id(), api_url, api_key)
+        return self._get_cached_client(key, lambda: self._create_async_openai_client(config, api_key))
+
+    def get_async_anthropic_client(self, config: Dict[str, Any]) -> "anthropic.AsyncAnthropic":
+        """获取异步Anthropic客户端"""
+        api_key = config.get("api_key")
+        api_url = config.get("api_url")
+        key = ("async_anthropic", self._current_loop_id(), api_url, api_key)
+        return self._get_cached_client(key, lambda: self._create_async_anthropic_client(config))
+
+    def get_async_google_client(self, config: Dict[str, Any]) -> "genai.client.AsyncClient":
+        """获取异步Google AI客户端"""
+        api_key = config.get("api_key")
+        api_url = config.get("api_url")
+        extra_body = config.get("extra_body", {})
+        extra_body_serialized = json.dumps(extra_body, sort_keys=True) if extra_body else None
+        key = ("async_google", self._current_loop_id(), api_key, api_url, extra_body_serialized)
+        return self._get_cached_client(key, lambda: self._create_google_client(config)).aio
+
+    async def aclose_async_clients(self) -> None:
+        """关闭当前事件循环中创建的异步客户端，异步连接池不能跨事件循环复用"""
+        loop_id = self._current_loop_id()
+        with self._lock:
+            keys = [key for key in self._clients if key[0].startswith("async_") and key[1] == loop_id]
+            clients = [self._clients.pop(key) for key in keys]
+        for client in clients:
+            if hasattr(client, "aio"):
+                # Google 客户端的同步与异步连接需要分别关闭
+                client.close()
+                await client.aio.aclose()
+            else:
+                await client.close()
+
+    @staticmethod
+    def _current_loop_id() -> int:
+        return id(asyncio.get_running_loop())
+
     def _get_cached_client(self, key, factory_func):
         """线程安全地获取或创建客户端"""
         if key not in self._clients:
@@ -129,13 +217,31 @@ class LLMClientFactory:
 
     # 各种客户端创建函数
     def _create_openai_client(self, config, api_key):
+        from openai import OpenAI
         return OpenAI(
             base_url=config.get("api_url"),
             api_key=api_key,
             http_client=create_httpx_client()
         )
 
+    def _create_async_openai_client(self, config, api_key):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(
+            base_url=config.get("api_url"),
+            api_key=api_key,
+            http_client=create_async_httpx_client()
+        )
+
+    def _create_async_anthropic_client(self, config):
+        import anthropic
+        return anthropic.AsyncAnthropic(
+            base_url=config.get("api_url"),
+            api_key=config.get("api_key"),
+            http_client=create_async_httpx_client()
+        )
+
     def _create_anthropic_client(self, config):
+        import anthropic
         return anthropic.Anthropic(
             base_url=config.get("api_url"),
             api_key=config.get("api_key"),
@@ -143,6 +249,7 @@ class LLMClientFactory:
         )
 
     def _create_anthropic_bedrock(self, config):
+        import anthropic
         return anthropic.AnthropicBedrock(
             aws_region=config.get("region"),
             aws_access_key=config.get("access_key"),
@@ -151,6 +258,7 @@ class LLMClientFactory:
         )
 
     def _create_boto3_bedrock(self, config):
+        import boto3
         return boto3.client(
             "bedrock-runtime",
             region_name=config.get("region"),
@@ -159,6 +267,7 @@ class LLMClientFactory:
         )
 
     def _create_cohere_client(self, config):
+        import cohere
         return cohere.ClientV2(
             base_url=config.get("api_url"),
             api_key=config.get("api_key"),
@@ -167,6 +276,7 @@ class LLMClientFactory:
         )
 
     def _create_google_client(self, config):
+        from google import genai
         api_key = config.get("api_key")
         api_url = config.get("api_url")
         extra_body = config.get("extra_body")
@@ -1,79 +1,176 @@
-from ModuleFolders.LLMRequester.SakuraRequester import SakuraRequester
-from ModuleFolders.LLMRequester.LocalLLMRequester import LocalLLMRequester
-from ModuleFolders.LLMRequester.CohereRequester import CohereRequester
-from ModuleFolders.LLMRequester.GoogleRequester import GoogleRequester
-from ModuleFolders.LLMRequester.AnthropicRequester import AnthropicRequester
-from ModuleFolders.LLMRequester.AmazonbedrockRequester import AmazonbedrockRequester
-from ModuleFolders.LLMRequester.OpenaiRequester import OpenaiRequester
-from ModuleFolders.LLMRequester.DashscopeRequester import DashscopeRequester
+import asyncio
+import importlib
+import threading
+
+from Base.Base import Base
+from ModuleFolders.LLMRequester.ResponseCache import ResponseCache
 
 # 接口请求器
-class LLMRequester():
+class LLMRequester(Base):
+
+    # 已注册的请求器，{名称: (模块路径, 类名, 请求方法名)}
+    # 各平台的 SDK 导入耗时较长，请求器模块在首次向对应平台发起请求时才导入
+    # 请求方法存在以 _async 结尾的同名方法时，异步请求使用该方法，否则放到线程中执行
+    REQUESTERS = {
+        "sakura": ("ModuleFolders.LLMRequester.SakuraRequester", "SakuraRequester", "request_sakura"),
+        "LocalLLM": ("ModuleFolders.LLMRequester.LocalLLMRequester", "LocalLLMRequester", "request_LocalLLM"),
+        "cohere": ("ModuleFolders.LLMRequester.CohereRequester", "CohereRequester", "request_cohere"),
+        "google": ("ModuleFolders.LLMRequester.GoogleRequester", "GoogleRequester", "request_google"),
+        "anthropic": ("ModuleFolders.LLMRequester.AnthropicRequester", "AnthropicRequester", "request_anthropic"),
+        "amazonbedrock": ("ModuleFolders.LLMRequester.AmazonbedrockRequester", "AmazonbedrockRequester", "request_amazonbedrock"),
+        "dashscope": ("ModuleFolders.LLMRequester.DashscopeRequester", "DashscopeRequester", "request_openai"),
+        "openai": ("ModuleFolders.LLMRequester.OpenaiRequester", "OpenaiRequester", "request_openai"),
+    }
+
+    # 未注册的平台使用的请求器
+    DEFAULT_REQUESTER = "openai"
+
+    # 自定义平台的接口格式与请求器的对应关系
+    API_FORMAT_REQUESTERS = {
+        "Google": "google",
+        "Anthropic": "anthropic",
+    }
+
+    # 已导入的请求器类
+    _requester_classes: dict[str, type] = {}
+    _requester_classes_lock = threading.Lock()
+
     def __init__(self) -> None:
-        pass
+        super().__init__()
 
-    # 分发请求
-    def sent_request(self, messages: list[dict], system_prompt: str, platform_config: dict) -> tuple[bool, str, str, int, int]:
-        # 获取平台参数
-        target_platform = platform_config.get("target_platform")
-        api_format = platform_config.get("api_format")
-
-        # 发起请求
-        if target_platform == "sakura":
-            sakura_requester = SakuraRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = sakura_requester.request_sakura(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "LocalLLM":
-            local_llm_requester = LocalLLMRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = local_llm_requester.request_LocalLLM(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "cohere":
-            cohere_requester = CohereRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = cohere_requester.request_cohere(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "google" or (target_platform.startswith("custom_platform_") and api_format == "Google"):
-            google_requester = GoogleRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = google_requester.request_google(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "anthropic" or (target_platform.startswith("custom_platform_") and api_format == "Anthropic"):
-            anthropic_requester = AnthropicRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = anthropic_requester.request_anthropic(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "amazonbedrock":
-            amazonbedrock_requester = AmazonbedrockRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = amazonbedrock_requester.request_amazonbedrock(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-        elif target_platform == "dashscope":
-            dashscope_requester = DashscopeRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = dashscope_requester.request_openai(
-                messages,
-                system_prompt,
-                platform_config,
-            )
+    # 注册请求器，插件可以借此为新的平台提供请求器
+    @classmethod
+    def register_requester(cls, name: str, module: str, class_name: str, method: str) -> None:
+        with cls._requester_classes_lock:
+            cls.REQUESTERS[name] = (module, class_name, method)
+            cls._requester_classes.pop(name, None)
+
+    # 获取平台对应的请求器名称
+    @classmethod
+    def get_requester_name(cls, platform_config: dict) -> str:
+        target_platform = platform_config.get("target_platform") or ""
+        if target_platform in cls.REQUESTERS:
+            return target_platform
+
+        if target_platform.startswith("custom_platform_"):
+            return cls.API_FORMAT_REQUESTERS.get(platform_config.get("api_format"), cls.DEFAULT_REQUESTER)
+
+        return cls.DEFAULT_REQUESTER
+
+    # 获取请求器类，首次使用时导入对应模块
+    @classmethod
+    def get_requester_class(cls, name: str) -> type:
+        requester_class = cls._requester_classes.get(name)
+        if requester_class is None:
+            with cls._requester_classes_lock:
+                requester_class = cls._requester_classes.get(name)
+                if requester_class is None:
+                    module, class_name, _ = cls.REQUESTERS[name]
+                    requester_class = getattr(importlib.import_module(module), class_name)
+                    cls._requester_classes[name] = requester_class
+        return requester_class
+
+    # 发起请求，开启回复缓存时优先使用缓存的回复
+    # defer_cache 为 True 时回复暂不写入缓存，由调用方检查回复后通过 settle_cached_response 写入或删除
+    def sent_request(self, messages: list[dict], system_prompt: str, platform_config: dict, defer_cache: bool = False) -> tuple[bool, str, str, int, int]:
+        cache, mode = ResponseCache.from_platform_config(platform_config)
+        if cache is None:
+            return self.dispatch_request(messages, system_prompt, platform_config)
+
+        key = ResponseCache.make_key(messages, system_prompt, platform_config)
+        cached = self.get_cached_response(cache, mode, key)
+        if cached is not None:
+            platform_config["response_cache_hit"] = True
+            platform_config["response_cache_entry"] = (cache, mode, key, None)
+            return cached
+
+        result = self.dispatch_request(messages, system_prompt, platform_config)
+        self.store_cached_response(cache, mode, key, result, platform_config, defer_cache)
+        return result
+
+    # 发起异步请求，开启回复缓存时优先使用缓存的回复
+    async def sent_request_async(self, messages: list[dict], system_prompt: str, platform_config: dict, defer_cache: bool = False) -> tuple[bool, str, str, int, int]:
+        cache, mode = ResponseCache.from_platform_config(platform_config)
+        if cache is None:
+            return await self.dispatch_request_async(messages, system_prompt, platform_config)
+
+        key = ResponseCache.make_key(messages, system_prompt, platform_config)
+        cached = self.get_cached_response(cache, mode, key)
+        if cached is not None:
+            platform_config["response_cache_hit"] = True
+            platform_config["response_cache_entry"] = (cache, mode, key, None)
+            return cached
+
+        result = await self.dispatch_request_async(messages, system_prompt, platform_config)
+        self.store_cached_response(cache, mode, key, result, platform_config, defer_cache)
+        return result
+
+    # 写入或暂存新请求的回复
+    def store_cached_response(self, cache: ResponseCache, mode: str, key: bytes, result: tuple[bool, str, str, int, int], platform_config: dict, defer_cache: bool) -> None:
+        if defer_cache:
+            platform_config["response_cache_entry"] = (cache, mode, key, result)
         else:
-            openai_requester = OpenaiRequester()
-            skip, response_think, response_content, prompt_tokens, completion_tokens = openai_requester.request_openai(
-                messages,
-                system_prompt,
-                platform_config,
-            )
-
-        return skip, response_think, response_content, prompt_tokens, completion_tokens
+            self.set_cached_response(cache, key, result)
+
+    # 根据调用方对回复的检查结果处理回复缓存
+    # 通过检查的新回复写入缓存，未通过检查的缓存回复从缓存中删除，避免重试相同的请求时再次得到同样的回复
+    def settle_cached_response(self, platform_config: dict, accepted: bool) -> None:
+        entry = platform_config.pop("response_cache_entry", None)
+        if entry is None:
+            return
+
+        cache, mode, key, result = entry
+        if accepted:
+            if result is not None:
+                self.set_cached_response(cache, key, result)
+        elif result is None and mode == ResponseCache.MODE_READ_WRITE:
+            try:
+                cache.delete(key)
+            except Exception as e:
+                self.error(f"删除回复缓存失败 ... {e}", e if self.is_debug() else None)
+
+    # 读取缓存的回复，仅回放模式下未命中时返回请求失败，不发起请求
+    def get_cached_response(self, cache: ResponseCache, mode: str, key: bytes) -> tuple[bool, str, str, int, int] | None:
+        try:
+            cached = cache.get(key)
+        except Exception as e:
+            self.error(f"读取回复缓存失败 ... {e}", e if self.is_debug() else None)
+            cached = None
+
+        if cached is not None:
+            response_think, response_content, prompt_tokens, completion_tokens = cached
+            return False, response_think, response_content, prompt_tokens, completion_tokens
+
+        if mode == ResponseCache.MODE_REPLAY:
+            self.warning("回放模式下未找到该请求的缓存回复，已跳过该请求 ...")
+            return True, "", "", 0, 0
+
+        return None
+
+    # 写入成功请求的回复
+    def set_cached_response(self, cache: ResponseCache, key: bytes, result: tuple[bool, str, str, int, int]) -> None:
+        skip, response_think, response_content, prompt_tokens, completion_tokens = result
+        if skip == True or not response_content:
+            return
+
+        try:
+            cache.set(key, response_think, response_content, prompt_tokens, completion_tokens)
+        except Exception as e:
+            self.error(f"写入回复缓存失败 ... {e}", e if self.is_debug() else None)
+
+    # 分发请求
+    def dispatch_request(self, messages: list[dict], system_prompt: str, platform_config: dict) -> tuple[bool, str, str, int, int]:
+        name = self.get_requester_name(platform_config)
+        requester = self.get_requester_class(name)()
+        return getattr(requester, self.REQUESTERS[name][2])(messages, system_prompt, platform_config)
+
+    # 分发异步请求
+    async def dispatch_request_async(self, messages: list[dict], system_prompt: str, platform_config: dict) -> tuple[bool, str, str, int, int]:
+        name = self.get_requester_name(platform_config)
+        requester = self.get_requester_class(name)()
+        method = getattr(requester, f"{self.REQUESTERS[name][2]}_async", None)
+        if method is not None:
+            return await method(messages, system_prompt, platform_config)
+
+        # 没有异步客户端的接口放到线程中执行
+        return await asyncio.to_thread(self.dispatch_request, messages, system_prompt, platform_config)
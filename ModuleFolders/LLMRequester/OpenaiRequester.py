@@ -1,5 +1,6 @@
 from Base.Base import Base
 from ModuleFolders.LLMRequester.LLMClientFactory import LLMClientFactory
+from ModuleFolders.ResponseExtractor.StreamExtractor import StreamExtractor
 
 
 # 接口请求器
@@ -9,100 +10,253 @@ class OpenaiRequester(Base):
 
     # 发起请求
     def request_openai(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        if platform_config.get("stream_switch"):
+            return self.request_openai_stream(messages, system_prompt, platform_config)
+
         try:
-            # 获取具体配置
-            model_name = platform_config.get("model_name")
-            request_timeout = platform_config.get("request_timeout", 60)
-            temperature = platform_config.get("temperature", 1.0)
-            top_p = platform_config.get("top_p", 1.0)
-            presence_penalty = platform_config.get("presence_penalty", 0)
-            frequency_penalty = platform_config.get("frequency_penalty", 0)
-            extra_body = platform_config.get("extra_body", "{}")
-            think_switch = platform_config.get("think_switch")
-            think_depth = platform_config.get("think_depth")
-
-            # 插入系统消息
-            if system_prompt:
-                messages.insert(
-                    0,
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    })
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
 
             # 从工厂获取客户端
             client = LLMClientFactory().get_openai_client(platform_config)
 
-            # 针对ds-r模型的特殊处理，因为该模型不支持模型预输入回复
-            if model_name in {"deepseek-reasoner", "deepseek-r1", "DeepSeek-R1"}:
-                # 检查一下最后的消息是否用户消息，以免误删。(用户使用了推理模型卻不切换为推理模型提示词的情况)
-                if isinstance(messages[-1], dict) and messages[-1].get('role') != 'user':
-                    messages = messages[:-1]  # 移除最后一个元素
-
-
-            # 参数基础配置
-            base_params = {
-                "extra_body": extra_body,
-                "model": model_name,
-                "messages": messages,
-                "timeout": request_timeout,
-                "stream": False
-            }
-
-            # 按需添加参数
-            if temperature != 1:
-                base_params.update({
-                    "temperature": temperature,
-                })
+            # 发起请求
+            response = client.chat.completions.create(**base_params)
 
-            if top_p != 1:
-                base_params.update({
-                    "top_p": top_p,
-                })
+            # 提取回复内容
+            response_think, response_content = self.extract_response_content(response)
 
-            if presence_penalty != 0:
-                base_params.update({
-                    "presence_penalty": presence_penalty,
-                })
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
 
-            if frequency_penalty != 0:
-                base_params.update({
-                    "frequency_penalty": frequency_penalty
-                })
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(response)
 
+        return False, response_think, response_content, prompt_tokens, completion_tokens
 
-            # 开启思考开关时添加参数
-            if think_switch:
-                base_params.update({
-                    "reasoning_effort": think_depth
-                })
+    # 发起异步请求
+    async def request_openai_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        if platform_config.get("stream_switch"):
+            return await self.request_openai_stream_async(messages, system_prompt, platform_config)
 
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
 
-            # 发起请求
-            response = client.chat.completions.create(**base_params)
+            # 从工厂获取异步客户端
+            client = LLMClientFactory().get_async_openai_client(platform_config)
 
+            # 发起请求
+            response = await client.chat.completions.create(**base_params)
 
             # 提取回复内容
-            message = response.choices[0].message
-
-            # 自适应提取推理过程
-            if "</think>" in message.content:
-                splited = message.content.split("</think>")
-                response_think = splited[0].removeprefix("<think>").replace("\n\n", "\n")
-                response_content = splited[-1]
-            else:
-                try:
-                    response_think = message.reasoning_content
-                    if not response_think:
-                        response_think = ""
-                except Exception:
-                    response_think = ""
-                response_content = message.content
+            response_think, response_content = self.extract_response_content(response)
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        prompt_tokens, completion_tokens = self.extract_usage(response)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(response)
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起流式请求，回复明显异常时提前中止
+    def request_openai_stream(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 构建请求参数
+            base_params = self.build_stream_request_params(messages, system_prompt, platform_config)
+
+            # 从工厂获取客户端
+            client = LLMClientFactory().get_openai_client(platform_config)
+
+            # 逐块接收回复
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage_chunk = None
+            with client.chat.completions.create(**base_params) as stream:
+                for chunk in stream:
+                    usage_chunk = chunk if getattr(chunk, "usage", None) else usage_chunk
+                    abort_reason = self.feed_stream_chunk(extractor, chunk)
+                    if abort_reason:
+                        break
 
         except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
 
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        response_think, response_content = self.extract_stream_content(extractor)
+        prompt_tokens, completion_tokens = self.extract_usage(usage_chunk)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(usage_chunk)
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 发起异步流式请求，回复明显异常时提前中止
+    async def request_openai_stream_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 构建请求参数
+            base_params = self.build_stream_request_params(messages, system_prompt, platform_config)
+
+            # 从工厂获取异步客户端
+            client = LLMClientFactory().get_async_openai_client(platform_config)
+
+            # 逐块接收回复
+            extractor = StreamExtractor.from_platform_config(platform_config)
+            abort_reason = ""
+            usage_chunk = None
+            async with await client.chat.completions.create(**base_params) as stream:
+                async for chunk in stream:
+                    usage_chunk = chunk if getattr(chunk, "usage", None) else usage_chunk
+                    abort_reason = self.feed_stream_chunk(extractor, chunk)
+                    if abort_reason:
+                        break
+
+        except Exception as e:
+            platform_config["request_error"] = e  # 供密钥健康状态判断
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        if abort_reason:
+            self.warning(f"流式回复已中止 ... {abort_reason}")
+            return True, None, None, None, None
+
+        response_think, response_content = self.extract_stream_content(extractor)
+        prompt_tokens, completion_tokens = self.extract_usage(usage_chunk)
+        platform_config["cached_tokens"] = self.extract_cached_tokens(usage_chunk)
+
+        return False, response_think, response_content, prompt_tokens, completion_tokens
+
+    # 构建流式请求参数
+    def build_stream_request_params(self, messages, system_prompt, platform_config) -> dict:
+        base_params = self.build_request_params(messages, system_prompt, platform_config)
+        base_params["stream"] = True
+
+        # 部分兼容接口不支持该参数，只在官方接口上请求流式的 Tokens 消耗
+        if platform_config.get("target_platform") == "openai":
+            base_params["stream_options"] = {"include_usage": True}
+
+        return base_params
+
+    # 将回复块交给流式解析器，返回中止原因
+    def feed_stream_chunk(self, extractor: StreamExtractor, chunk) -> str:
+        if not chunk.choices:
+            return ""
+
+        delta = chunk.choices[0].delta
+        return extractor.feed_think(getattr(delta, "reasoning_content", None)) or extractor.feed(delta.content)
+
+    # 提取流式回复内容
+    def extract_stream_content(self, extractor: StreamExtractor) -> tuple[str, str]:
+        # 自适应提取推理过程
+        if "</think>" in extractor.content:
+            splited = extractor.content.split("</think>")
+            response_think = splited[0].removeprefix("<think>").replace("\n\n", "\n")
+            response_content = splited[-1]
+        else:
+            response_think = extractor.think
+            response_content = extractor.content
+
+        return response_think, response_content
+
+    # 构建请求参数
+    def build_request_params(self, messages, system_prompt, platform_config) -> dict:
+        # 获取具体配置
+        model_name = platform_config.get("model_name")
+        request_timeout = platform_config.get("request_timeout", 60)
+        temperature = platform_config.get("temperature", 1.0)
+        top_p = platform_config.get("top_p", 1.0)
+        presence_penalty = platform_config.get("presence_penalty", 0)
+        frequency_penalty = platform_config.get("frequency_penalty", 0)
+        extra_body = platform_config.get("extra_body", "{}")
+        think_switch = platform_config.get("think_switch")
+        think_depth = platform_config.get("think_depth")
+
+        # 插入系统消息
+        if system_prompt:
+            messages.insert(
+                0,
+                {
+                    "role": "system",
+                    "content": system_prompt
+                })
+
+        # 针对ds-r模型的特殊处理，因为该模型不支持模型预输入回复
+        if model_name in {"deepseek-reasoner", "deepseek-r1", "DeepSeek-R1"}:
+            # 检查一下最后的消息是否用户消息，以免误删。(用户使用了推理模型卻不切换为推理模型提示词的情况)
+            if isinstance(messages[-1], dict) and messages[-1].get('role') != 'user':
+                messages = messages[:-1]  # 移除最后一个元素
+
+
+        # 参数基础配置
+        base_params = {
+            "extra_body": extra_body,
+            "model": model_name,
+            "messages": messages,
+            "timeout": request_timeout,
+            "stream": False
+        }
+
+        # 按需添加参数
+        if temperature != 1:
+            base_params.update({
+                "temperature": temperature,
+            })
+
+        if top_p != 1:
+            base_params.update({
+                "top_p": top_p,
+            })
+
+        if presence_penalty != 0:
+            base_params.update({
+                "presence_penalty": presence_penalty,
+            })
+
+        if frequency_penalty != 0:
+            base_params.update({
+                "frequency_penalty": frequency_penalty
+            })
+
+
+        # 开启思考开关时添加参数
+        if think_switch:
+            base_params.update({
+                "reasoning_effort": think_depth
+            })
+
+
+        return base_params
+
+    # 提取回复内容
+    def extract_response_content(self, response) -> tuple[str, str]:
+        message = response.choices[0].message
+
+        # 自适应提取推理过程
+        if "</think>" in message.content:
+            splited = message.content.split("</think>")
+            response_think = splited[0].removeprefix("<think>").replace("\n\n", "\n")
+            response_content = splited[-1]
+        else:
+            try:
+                response_think = message.reasoning_content
+                if not response_think:
+                    response_think = ""
+            except Exception:
+                response_think = ""
+            response_content = message.content
+
+        return response_think, response_content
+
+    # 提取 Tokens 消耗
+    def extract_usage(self, response) -> tuple[int, int]:
         # 获取指令消耗
         try:
             prompt_tokens = int(response.usage.prompt_tokens)
@@ -115,4 +269,17 @@ class OpenaiRequester(Base):
         except Exception:
             completion_tokens = 0
 
-        return False, response_think, response_content, prompt_tokens, completion_tokens
+        return prompt_tokens, completion_tokens
+
+    # 提取命中提示词缓存的 Tokens 数量
+    def extract_cached_tokens(self, response) -> int:
+        usage = getattr(response, "usage", None)
+
+        # OpenAI 格式为 prompt_tokens_details.cached_tokens，DeepSeek 格式为 prompt_cache_hit_tokens
+        try:
+            cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+            if cached_tokens is None:
+                cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+            return int(cached_tokens or 0)
+        except Exception:
+            return 0
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict
+
+
+class ResponseCache:
+    """基于SQLite的请求回复缓存
+
+    以 (平台, 模型, 采样参数, 系统提示词, 消息) 的哈希为键保存成功请求的回复与 Tokens 数，
+    任务中断重启、重新开始轮次或只修改后处理设置时，相同的请求直接复用已有回复
+    """
+
+    # 缓存模式
+    MODE_OFF = "off"  # 不使用缓存
+    MODE_READ_WRITE = "read_write"  # 优先读取缓存，未命中时发起请求并写入
+    MODE_REPLAY = "replay"  # 只读取缓存，未命中时不发起请求
+
+    DEFAULT_PATH = os.path.join(".", "Resource", "ResponseCache", "response_cache.db")
+    DEFAULT_MAX_SIZE_MB = 512
+
+    # 参与计算缓存键的采样参数
+    SAMPLING_KEYS = (
+        "temperature",
+        "top_p",
+        "presence_penalty",
+        "frequency_penalty",
+        "extra_body",
+        "think_switch",
+        "think_depth",
+        "thinking_budget",
+    )
+
+    _instances: Dict[str, "ResponseCache"] = {}
+    _instances_lock = threading.Lock()
+
+    # 获取数据库路径对应的共享实例
+    @classmethod
+    def get_instance(cls, db_path: str = "") -> "ResponseCache":
+        db_path = db_path or cls.DEFAULT_PATH
+        with cls._instances_lock:
+            instance = cls._instances.get(db_path)
+            if instance is None:
+                instance = cls(db_path)
+                cls._instances[db_path] = instance
+            return instance
+
+    # 从接口配置信息包中获取缓存与缓存模式，未开启缓存时缓存为 None
+    @classmethod
+    def from_platform_config(cls, platform_config: dict) -> tuple["ResponseCache", str] | tuple[None, str]:
+        mode = platform_config.get("response_cache_mode") or cls.MODE_OFF
+        if mode not in (cls.MODE_READ_WRITE, cls.MODE_REPLAY):
+            return None, cls.MODE_OFF
+
+        instance = cls.get_instance(platform_config.get("response_cache_path", ""))
+        instance.ttl = platform_config.get("response_cache_ttl", 0) * 3600
+        instance.max_size = int(platform_config.get("response_cache_max_size", cls.DEFAULT_MAX_SIZE_MB) * 1024 * 1024)
+        return instance, mode
+
+    def __init__(self, db_path: str, ttl: float = 0, max_size: int = None) -> None:
+        self.db_path = db_path
+        self.ttl = ttl  # 有效期（秒），0 表示永不过期
+        self.max_size = max_size or self.DEFAULT_MAX_SIZE_MB * 1024 * 1024
+        self.lock = threading.RLock()
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok = True)
+        self.connection = sqlite3.connect(self.db_path, check_same_thread = False, isolation_level = None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self._create_schema()
+
+        # 当前缓存的总大小，用于判断是否需要淘汰
+        self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _create_schema(self) -> None:
+        with self.lock:
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    request_hash BLOB PRIMARY KEY,
+                    response_think TEXT NOT NULL,
+                    response_content TEXT NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_responses_created_at
+                    ON responses (created_at);
+                """
+            )
+
+    # 关闭连接
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    # 计算请求的缓存键，接口地址与密钥不影响回复内容，不参与计算
+    @classmethod
+    def make_key(cls, messages: list[dict], system_prompt: str, platform_config: dict) -> bytes:
+        request = {
+            "platform": platform_config.get("target_platform"),
+            "api_format": platform_config.get("api_format"),
+            "model": platform_config.get("model_name"),
+            "sampling": {key: platform_config.get(key) for key in cls.SAMPLING_KEYS},
+            "system_prompt": system_prompt,
+            "messages": messages,
+        }
+        data = json.dumps(request, ensure_ascii = False, sort_keys = True, separators = (",", ":"), default = str)
+        return hashlib.blake2b(data.encode("utf-8", "surrogatepass"), digest_size = 32).digest()
+
+    # 读取缓存的回复，未命中或已过期时返回 None
+    def get(self, key: bytes) -> tuple[str, str, int, int] | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT response_think, response_content, prompt_tokens, completion_tokens, created_at FROM responses WHERE request_hash = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            if self.ttl > 0 and time.time() - row[4] > self.ttl:
+                self.delete(key)
+                return None
+
+            return row[0], row[1], row[2], row[3]
+
+    # 写入回复
+    def set(self, key: bytes, response_think: str, response_content: str, prompt_tokens: int, completion_tokens: int) -> None:
+        response_think = response_think or ""
+        response_content = response_content or ""
+        size = len(response_think.encode("utf-8", "surrogatepass")) + len(response_content.encode("utf-8", "surrogatepass"))
+
+        with self.lock:
+            self.delete(key)
+            self.connection.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, response_think, response_content, prompt_tokens or 0, completion_tokens or 0, size, time.time()),
+            )
+            self.total_size = self.total_size + size
+            self.evict()
+
+    # 删除单条缓存
+    def delete(self, key: bytes) -> None:
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM responses WHERE request_hash = ?", (key,)).fetchone()
+            if row is not None:
+                self.connection.execute("DELETE FROM responses WHERE request_hash = ?", (key,))
+                self.total_size = self.total_size - row[0]
+
+    # 删除过期的缓存，并按写入时间淘汰最早的缓存，使总大小不超过上限
+    def evict(self) -> None:
+        with self.lock:
+            if self.ttl > 0:
+                cursor = self.connection.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+                if cursor.rowcount > 0:
+                    self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+            if self.total_size <= self.max_size:
+                return
+
+            # 一次淘汰到上限的 90%，避免每次写入都触发淘汰
+            target_size = self.max_size * 0.9
+            removed = []
+            for key, size in self.connection.execute("SELECT request_hash, size FROM responses ORDER BY created_at"):
+                if self.total_size <= target_size:
+                    break
+                removed.append((key,))
+                self.total_size = self.total_size - size
+            self.connection.executemany("DELETE FROM responses WHERE request_hash = ?", removed)
+
+    # 清空缓存
+    def clear(self) -> None:
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.total_size = 0
@@ -10,38 +10,13 @@ class SakuraRequester(Base):
     # 发起请求
     def request_sakura(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
         try:
-            model_name = platform_config.get("model_name")
-            request_timeout = platform_config.get("request_timeout", 60)
-            temperature = platform_config.get("temperature", 0.1)
-            top_p = platform_config.get("top_p", 0.3)
-            frequency_penalty = platform_config.get("frequency_penalty", 0)
-
-            # 插入系统消息
-            if system_prompt:
-                messages.insert(
-                    0,
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    })
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
 
             # 从工厂获取客户端
             client = LLMClientFactory().get_openai_client_sakura(platform_config)
 
-            response = client.chat.completions.create(
-                model=model_name,
-                messages=messages,
-                top_p=top_p,
-                temperature=temperature,
-                frequency_penalty=frequency_penalty,
-                timeout=request_timeout,
-                max_tokens=512,
-                extra_query={
-                    "do_sample": True,
-                    "num_beams": 1,
-                    "repetition_penalty": 1.0
-                },
-            )
+            response = client.chat.completions.create(**base_params)
 
             # 提取回复的文本内容
             response_content = response.choices[0].message.content
@@ -49,6 +24,67 @@ class SakuraRequester(Base):
             self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
             return True, None, None, None, None
 
+        return self.build_result(response, response_content)
+
+    # 发起异步请求
+    async def request_sakura_async(self, messages, system_prompt, platform_config) -> tuple[bool, str, str, int, int]:
+        try:
+            # 构建请求参数
+            base_params = self.build_request_params(messages, system_prompt, platform_config)
+
+            # 从工厂获取异步客户端
+            client = LLMClientFactory().get_async_openai_client_sakura(platform_config)
+
+            response = await client.chat.completions.create(**base_params)
+
+            # 提取回复的文本内容
+            response_content = response.choices[0].message.content
+        except Exception as e:
+            self.error(f"请求任务错误 ... {e}", e if self.is_debug() else None)
+            return True, None, None, None, None
+
+        return self.build_result(response, response_content)
+
+    # 构建请求参数
+    def build_request_params(self, messages, system_prompt, platform_config) -> dict:
+        model_name = platform_config.get("model_name")
+        request_timeout = platform_config.get("request_timeout", 60)
+        temperature = platform_config.get("temperature", 0.1)
+        top_p = platform_config.get("top_p", 0.3)
+        frequency_penalty = platform_config.get("frequency_penalty", 0)
+
+        # 插入系统消息
+        if system_prompt:
+            messages.insert(
+                0,
+                {
+                    "role": "system",
+                    "content": system_prompt
+                })
+
+        base_params = {
+            "model": model_name,
+            "messages": messages,
+            "top_p": top_p,
+            "temperature": temperature,
+            "frequency_penalty": frequency_penalty,
+            "timeout": request_timeout,
+            "max_tokens": 512,
+            "extra_query": {
+                "do_sample": True,
+                "num_beams": 1,
+                "repetition_penalty": 1.0
+            },
+        }
+
+        # 开启提示词缓存时，让 llama.cpp 复用相同前缀的 KV 缓存
+        if platform_config.get("prompt_cache_switch"):
+            base_params["extra_body"] = {"cache_prompt": True}
+
+        return base_params
+
+    # 构建请求结果
+    def build_result(self, response, response_content) -> tuple[bool, str, str, int, int]:
         # 获取指令消耗
         try:
             prompt_tokens = int(response.usage.prompt_tokens)
@@ -0,0 +1,127 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable
+
+
+class GlossaryMatcher:
+    """多模式字符串匹配器（Aho-Corasick 自动机）
+
+    对术语表、角色表等条目预先构建自动机，每个片段只需扫描一遍文本即可得到全部出现过的条目，
+    不再随条目数量线性增长。匹配结果与逐条执行 `pattern in text` 一致
+    """
+
+    # 已构建的匹配器缓存，按配置数据对象复用
+    MAX_CACHED_INSTANCES = 8
+    _instances: Dict[tuple, tuple] = {}
+    _instances_lock = threading.Lock()
+
+    # 获取与条目列表对应的共享匹配器
+    @classmethod
+    def get_instance(cls, name: str, entries: list, get_pattern: Callable[[Any], str], ignore_case: bool = False) -> "GlossaryMatcher":
+        """每次开始任务时配置都会重新读取，条目列表对象在一次任务中保持不变，因此按对象本身缓存"""
+        key = (name, id(entries), ignore_case)
+        with cls._instances_lock:
+            cached = cls._instances.get(key)
+
+            # 保存条目列表的引用，避免其被回收后 id 被复用
+            if cached is not None and cached[0] is entries and cached[1] == len(entries):
+                return cached[2]
+
+            instance = cls([get_pattern(entry) for entry in entries], ignore_case)
+            cls._instances.pop(key, None)
+            if len(cls._instances) >= cls.MAX_CACHED_INSTANCES:
+                cls._instances.pop(next(iter(cls._instances)))
+            cls._instances[key] = (entries, len(entries), instance)
+            return instance
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool = False) -> None:
+        self.ignore_case = ignore_case
+
+        # 状态转移表、失配指针、本状态结束的模式与后缀链上最近的输出状态
+        self.goto: list[dict] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[list[int]] = [[]]
+        self.output_link: list[int] = [0]
+
+        # 空模式在任意文本中都会出现
+        self.empty_ids: list[int] = []
+
+        # 模式为 None 的条目不参与匹配
+        for pattern_id, pattern in enumerate(patterns):
+            if pattern is None:
+                continue
+
+            if not pattern:
+                self.empty_ids.append(pattern_id)
+                continue
+
+            if ignore_case:
+                pattern = pattern.lower()
+
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.output_link.append(0)
+                node = next_node
+            self.output[node].append(pattern_id)
+
+        self._build_fail_links()
+
+    def _build_fail_links(self) -> None:
+        # 按广度优先顺序计算失配指针
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                fail_state = self.goto[state].get(char, 0)
+                self.fail[child] = fail_state if fail_state != child else 0
+
+                # 后缀链上最近的有输出的状态
+                self.output_link[child] = fail_state if self.output[fail_state] else self.output_link[fail_state]
+
+    # 找出在任一文本中出现过的模式
+    def search(self, texts: Iterable[str]) -> set[int]:
+        """返回模式在构建时的下标"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        output_link = self.output_link
+
+        found = set()
+        has_text = False
+        for text in texts:
+            has_text = True
+            if self.ignore_case:
+                text = text.lower()
+
+            node = 0
+            for char in text:
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+
+                # 沿输出链收集结束于当前位置的全部模式
+                state = node if output[node] else output_link[node]
+                while state:
+                    found.update(output[state])
+                    state = output_link[state]
+
+        if has_text:
+            found.update(self.empty_ids)
+
+        return found
+
+    # 按原顺序筛选出在文本中出现过的条目
+    def filter(self, entries: list, texts: Iterable[str]) -> list:
+        return [entries[i] for i in sorted(self.search(texts))]
@@ -1,11 +1,19 @@
 import re
+import hashlib
 from types import SimpleNamespace
 
+import rapidjson as json
+
 from Base.Base import Base
 from ModuleFolders.TaskExecutor import TranslatorUtil
 from ModuleFolders.TaskConfig.TaskConfig import TaskConfig
 from ModuleFolders.PromptBuilder.PromptBuilderEnum import PromptBuilderEnum
+from ModuleFolders.PromptBuilder.GlossaryMatcher import GlossaryMatcher
 class PromptBuilder(Base):
+
+    # 静态系统提示词缓存，{(配置哈希, 源语言): (系统提示词, 静态设定内容列表)}
+    static_system_cache = {}
+
     def __init__(self) -> None:
         super().__init__()
 
@@ -400,17 +408,17 @@ class PromptBuilder(Base):
         
         return source_text_str
 
+    # 获取术语表匹配器
+    def get_glossary_matcher(config: TaskConfig) -> GlossaryMatcher:
+        return GlossaryMatcher.get_instance("glossary", config.prompt_dictionary_data, lambda v: v.get("src"), ignore_case = True)
+
     # 构造术语表
     def build_glossary_prompt(config: TaskConfig, input_dict: dict) -> str:
         # 将输入字典中的所有值转换为集合
         lines = set(line for line in input_dict.values())
 
-        # 筛选在输入词典中出现过的条目
-        result = []
-        for v in config.prompt_dictionary_data:
-            src_lower = v.get("src").lower() # 将术语表中的 src 转换为小写
-            if any(src_lower in line.lower() for line in lines): # 将原文行也转换为小写进行比较
-                result.append(v)
+        # 筛选在输入词典中出现过的条目，不区分大小写
+        result = PromptBuilder.get_glossary_matcher(config).filter(config.prompt_dictionary_data, lines)
 
         # 数据校验
         if len(result) == 0:
@@ -451,6 +459,14 @@ class PromptBuilder(Base):
 
         return glossary_prompt
 
+    # 获取禁翻表标记符匹配器，写了正则的条目不参与匹配
+    def get_ntl_matcher(config: TaskConfig) -> GlossaryMatcher:
+        return GlossaryMatcher.get_instance(
+            "ntl",
+            config.exclusion_list_data,
+            lambda v: None if v.get("regex", "").strip() else v.get("markers", "").strip(),
+        )
+
     # 构造禁翻表
     def build_ntl_prompt(config: TaskConfig, source_text_dict) -> str:
 
@@ -460,9 +476,12 @@ class PromptBuilder(Base):
 
         exclusion_dict = {}  # 用字典存储并自动去重
         texts = list(source_text_dict.values())
+
+        # 一次扫描找出出现过的标记符
+        found_markers = PromptBuilder.get_ntl_matcher(config).search(texts)
         
         # 处理正则匹配
-        for element in exclusion_list_data:
+        for i, element in enumerate(exclusion_list_data):
             regex = element.get("regex", "").strip()
             marker = element.get("markers", "").strip()
             info = element.get("info", "")
@@ -484,7 +503,7 @@ class PromptBuilder(Base):
                     pass
             # 没写正则，只处理标记符        
             else:
-                found = any(marker in text for text in texts)
+                found = i in found_markers
                 if found and marker not in exclusion_dict:  # 避免重复添加
                     exclusion_dict[marker] = info
         
@@ -503,6 +522,10 @@ class PromptBuilder(Base):
         
         return result
 
+    # 获取角色名匹配器
+    def get_characterization_matcher(config: TaskConfig) -> GlossaryMatcher:
+        return GlossaryMatcher.get_instance("characterization", config.characterization_data, lambda v: v.get("original_name", ""))
+
     # 构造角色设定
     def build_characterization(config: TaskConfig, input_dict: dict) -> str:
         # 将数据存储到中间字典中
@@ -511,11 +534,12 @@ class PromptBuilder(Base):
             dictionary[v.get("original_name", "")] = v
 
         # 筛选，如果该key在发送文本中，则存储进新字典中
+        found_names = PromptBuilder.get_characterization_matcher(config).search(input_dict.values())
+        found_names = {config.characterization_data[i].get("original_name", "") for i in found_names}
         temp_dict = {}
         for key_a, value_a in dictionary.items():
-            for _, value_b in input_dict.items():
-                if key_a in value_b:
-                    temp_dict[key_a] = value_a
+            if key_a in found_names:
+                temp_dict[key_a] = value_a
 
         # 如果没有含有字典内容
         if temp_dict == {}:
@@ -725,62 +749,98 @@ class PromptBuilder(Base):
         return the_profile
 
 
-    # 生成信息结构 - 通用
-    def generate_prompt(config, source_text_dict: dict, previous_text_list: list[str], source_lang) -> tuple[list[dict], str, list[str]]:
-        # 储存指令
-        messages = []
-        # 储存额外日志
-        extra_log = []
-
-        # 基础系统提示词
+    # 获取基础系统提示词，预设提示词或自定义提示词
+    def build_base_system(config: TaskConfig, source_lang: str) -> str:
         if config.translation_prompt_selection["last_selected_id"] in (PromptBuilderEnum.COMMON, PromptBuilderEnum.COT, PromptBuilderEnum.THINK):
-            system = PromptBuilder.build_system(config, source_lang)
+            return PromptBuilder.build_system(config, source_lang)
         else:
-            system = config.translation_prompt_selection["prompt_content"]  # 自定义提示词
+            return config.translation_prompt_selection["prompt_content"]  # 自定义提示词
 
+    # 构建随文本变化的设定内容：术语表、禁翻表与角色介绍
+    def build_context_sections(config: TaskConfig, source_text_dict: dict) -> list[str]:
+        sections = []
 
         # 如果开启术语表
         if config.prompt_dictionary_switch == True:
-            glossary = PromptBuilder.build_glossary_prompt(config, source_text_dict)
-            if glossary != "":
-                system += glossary
-                extra_log.append(glossary)
+            sections.append(PromptBuilder.build_glossary_prompt(config, source_text_dict))
 
         # 如果开启禁翻表
         if config.exclusion_list_switch == True:
-            ntl = PromptBuilder.build_ntl_prompt(config, source_text_dict)
-            if ntl != "":
-                system += ntl
-                extra_log.append(ntl)
-
+            sections.append(PromptBuilder.build_ntl_prompt(config, source_text_dict))
 
         # 如果角色介绍开关打开
         if config.characterization_switch == True:
-            characterization = PromptBuilder.build_characterization(config, source_text_dict)
-            if characterization != "":
-                system += characterization
-                extra_log.append(characterization)
+            sections.append(PromptBuilder.build_characterization(config, source_text_dict))
+
+        return [v for v in sections if v != ""]
+
+    # 构建静态设定内容：世界观设定、行文措辞要求与翻译风格示例
+    def build_static_sections(config: TaskConfig) -> list[str]:
+        sections = []
 
         # 如果启用自定义世界观设定功能
         if config.world_building_switch == True:
-            world_building = PromptBuilder.build_world_building(config)
-            if world_building != "":
-                system += world_building
-                extra_log.append(world_building)
+            sections.append(PromptBuilder.build_world_building(config))
 
         # 如果启用自定义行文措辞要求功能
         if config.writing_style_switch == True:
-            writing_style = PromptBuilder.build_writing_style(config)
-            if writing_style != "":
-                system += writing_style
-                extra_log.append(writing_style)
+            sections.append(PromptBuilder.build_writing_style(config))
 
         # 如果启用翻译风格示例功能
         if config.translation_example_switch == True:
-            translation_example = PromptBuilder.build_translation_example(config)
-            if translation_example != "":
-                system += translation_example
-                extra_log.append(translation_example)
+            sections.append(PromptBuilder.build_translation_example(config))
+
+        return [v for v in sections if v != ""]
+
+    # 计算影响静态系统提示词的配置哈希
+    def get_static_config_hash(config: TaskConfig) -> str:
+        data = {
+            "target_language": config.target_language,
+            "translation_prompt_selection": config.translation_prompt_selection,
+            "world_building": config.world_building_content if config.world_building_switch == True else None,
+            "writing_style": config.writing_style_content if config.writing_style_switch == True else None,
+            "translation_example": config.translation_example_data if config.translation_example_switch == True else None,
+        }
+        return hashlib.blake2b(json.dumps(data, ensure_ascii = False, sort_keys = True).encode("utf-8"), digest_size = 16).hexdigest()
+
+    # 构建只包含静态内容的系统提示词，按 (配置哈希, 源语言) 缓存，相同配置下逐字节一致
+    def build_static_system(config: TaskConfig, source_lang: str) -> tuple[str, list[str]]:
+        key = (PromptBuilder.get_static_config_hash(config), source_lang)
+        cached = PromptBuilder.static_system_cache.get(key)
+        if cached is None:
+            static_sections = PromptBuilder.build_static_sections(config)
+            system = PromptBuilder.build_base_system(config, source_lang) + "".join(static_sections)
+            cached = (system, static_sections)
+            PromptBuilder.static_system_cache[key] = cached
+
+        return cached
+
+    # 生成信息结构 - 通用
+    def generate_prompt(config, source_text_dict: dict, previous_text_list: list[str], source_lang) -> tuple[list[dict], str, list[str]]:
+        # 储存指令
+        messages = []
+        # 储存额外日志
+        extra_log = []
+
+        # 开启提示词缓存布局时，系统提示词只包含逐字节稳定的静态内容，随文本变化的内容移到用户消息中
+        prompt_cache = getattr(config, "prompt_cache_switch", False)
+        if prompt_cache:
+            system, static_sections = PromptBuilder.build_static_system(config, source_lang)
+        else:
+            system = PromptBuilder.build_base_system(config, source_lang)
+            static_sections = PromptBuilder.build_static_sections(config)
+
+        # 术语表、禁翻表与角色介绍
+        context_sections = PromptBuilder.build_context_sections(config, source_text_dict)
+        extra_log.extend(context_sections)
+        extra_log.extend(static_sections)
+
+        context = ""
+        if prompt_cache:
+            if context_sections:
+                context = "".join(context_sections).strip() + "\n\n"
+        else:
+            system += "".join(context_sections) + "".join(static_sections)
 
         # 构建动态few-shot
         switch_A = config.few_shot_and_example_switch # 打开动态示例开关时
@@ -816,7 +876,7 @@ class PromptBuilder(Base):
         # 构建待翻译文本
         source_text = PromptBuilder.build_source_text(config,source_text_dict)
         pre_prompt = PromptBuilder.build_userQueryPrefix(config) # 用户提问前置文本
-        source_text_str = f"{previous}\n{pre_prompt}<textarea>\n{source_text}\n</textarea>"
+        source_text_str = f"{context}{previous}\n{pre_prompt}<textarea>\n{source_text}\n</textarea>"
 
         # 构建用户信息
         messages.append(
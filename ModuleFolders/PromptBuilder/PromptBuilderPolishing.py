@@ -63,12 +63,8 @@ class PromptBuilderPolishing(Base):
         # 将输入字典中的所有值转换为集合
         lines = set(line for line in input_dict.values())
 
-        # 筛选在输入词典中出现过的条目
-        result = []
-        for v in config.prompt_dictionary_data:
-            src_lower = v.get("src").lower() # 将术语表中的 src 转换为小写
-            if any(src_lower in line.lower() for line in lines): # 将原文行也转换为小写进行比较
-                result.append(v)
+        # 筛选在输入词典中出现过的条目，不区分大小写
+        result = PromptBuilder.get_glossary_matcher(config).filter(config.prompt_dictionary_data, lines)
 
         # 数据校验
         if len(result) == 0:
@@ -106,9 +102,12 @@ class PromptBuilderPolishing(Base):
 
         exclusion_dict = {}  # 用字典存储并自动去重
         texts = list(source_text_dict.values())
+
+        # 一次扫描找出出现过的标记符
+        found_markers = PromptBuilder.get_ntl_matcher(config).search(texts)
         
         # 处理正则匹配
-        for element in exclusion_list_data:
+        for i, element in enumerate(exclusion_list_data):
             regex = element.get("regex", "").strip()
             marker = element.get("markers", "").strip()
             info = element.get("info", "")
@@ -130,7 +129,7 @@ class PromptBuilderPolishing(Base):
                     pass
             # 没写正则，只处理标记符        
             else:
-                found = any(marker in text for text in texts)
+                found = i in found_markers
                 if found and marker not in exclusion_dict:  # 避免重复添加
                     exclusion_dict[marker] = info
         
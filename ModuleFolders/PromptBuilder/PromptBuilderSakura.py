@@ -3,6 +3,7 @@ from types import SimpleNamespace
 from Base.Base import Base
 from ModuleFolders.TaskConfig.TaskConfig import TaskConfig
 from ModuleFolders.PromptBuilder.PromptBuilder import PromptBuilder
+from ModuleFolders.PromptBuilder.GlossaryMatcher import GlossaryMatcher
 
 class PromptBuilderSakura(Base):
 
@@ -47,10 +48,8 @@ class PromptBuilderSakura(Base):
         lines = set(line for line in input_dict.values())
 
         # 筛选在输入词典中出现过的条目
-        result: list[dict] = [
-            v for v in config.prompt_dictionary_data
-            if any(v.get("src", "") in lines for lines in lines)
-        ]
+        matcher = GlossaryMatcher.get_instance("glossary_sakura", config.prompt_dictionary_data, lambda v: v.get("src", ""))
+        result: list[dict] = matcher.filter(config.prompt_dictionary_data, lines)
 
         if len(result) == 0:
             return ""
@@ -0,0 +1,252 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from Base.Base import Base
+from ModuleFolders.RequestLimiter.KeyPool import KeyPool
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
+
+
+# 接口池中的单个接口
+class Provider:
+
+    # 计算错误率时参考的最近请求数量
+    HEALTH_WINDOW = 20
+
+    # 连续失败达到该次数后暂停使用，之后每多失败一次暂停时间翻倍
+    FAILURE_THRESHOLD = 3
+    COOLDOWN_BASE = 10.0
+    COOLDOWN_MAX = 300.0
+
+    def __init__(self, name: str, weight: float, settings: dict, key_pool: KeyPool) -> None:
+        self.name = name
+        self.weight = max(0.0, float(weight))
+        self.model = settings["model"]
+        self.base_url = settings["base_url"]
+        self.rpm_limit = settings["rpm_limit"]
+        self.tpm_limit = settings["tpm_limit"]
+        self.key_pool = key_pool
+
+        self.lock = threading.Lock()
+
+        # 健康状态
+        self.results = deque(maxlen = self.HEALTH_WINDOW)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+        # 统计
+        self.success_count = 0
+        self.failure_count = 0
+
+    # 最近请求的错误率
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.results:
+                return 0.0
+            return self.results.count(False) / len(self.results)
+
+    # 是否处于暂停使用期间
+    def is_cooling_down(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    # 记录一次请求结果
+    def report(self, success: bool) -> None:
+        with self.lock:
+            self.results.append(success)
+            if success:
+                self.success_count += 1
+                self.consecutive_failures = 0
+                self.cooldown_until = 0.0
+            else:
+                self.failure_count += 1
+                self.consecutive_failures += 1
+                if self.consecutive_failures >= self.FAILURE_THRESHOLD:
+                    excess = self.consecutive_failures - self.FAILURE_THRESHOLD
+                    self.cooldown_until = time.time() + min(self.COOLDOWN_MAX, self.COOLDOWN_BASE * (2 ** excess))
+
+    # 路由得分，权重越高、错误率越低得分越高
+    def score(self) -> float:
+        return self.weight * max(0.05, 1.0 - self.error_rate())
+
+
+# 多接口池
+class ProviderPool(Base):
+    """按权重、剩余配额与近期错误率在多个接口之间分配请求
+
+    每个接口拥有独立的密钥池，任务请求时优先选择能立即获得配额的接口，
+    同一时刻都没有配额时等待最早恢复的接口，请求失败时由任务排除该接口后重新选择
+    """
+
+    # 没有可用接口时的最长等待间隔（秒），期间检查取消条件
+    WAIT_INTERVAL = 1.0
+
+    def __init__(self, providers: list[Provider]) -> None:
+        super().__init__()
+
+        self.providers = providers
+
+        # 正在等待配额的任务数量
+        self.waiting = 0
+        self.waiting_lock = threading.Lock()
+
+    # 根据配置创建接口池，未开启或只有一个可用接口时返回 None
+    @classmethod
+    def from_config(cls, config, token_counter: TokenCounter = None) -> "ProviderPool":
+        if not getattr(config, "provider_pool_switch", False):
+            return None
+
+        # 主接口始终位于池中，其余接口来自 provider_pool 配置，可以是平台名称或 {"platform", "weight"} 字典
+        entries = {config.target_platform: 1.0}
+        for entry in getattr(config, "provider_pool", []) or []:
+            if isinstance(entry, str):
+                name, weight = entry, 1.0
+            else:
+                name, weight = entry.get("platform", ""), entry.get("weight", 1.0)
+            entries[name] = weight
+
+        providers = []
+        for name, weight in entries.items():
+            if name not in config.platforms:
+                config.warning(f"接口池 - 未找到接口 {name}，已忽略 ...")
+                continue
+            if weight <= 0:
+                continue
+
+            settings = config.resolve_platform_settings(name)
+            key_pool = KeyPool()
+            if token_counter is not None:
+                key_pool.set_token_counter(token_counter)
+            key_pool.set_limit(settings["apikey_list"], settings["key_tpm_limit"], settings["key_rpm_limit"])
+            providers.append(Provider(name, weight, settings, key_pool))
+
+        if len(providers) < 2:
+            return None
+
+        return cls(providers)
+
+    # 全部接口的 RPM 限额之和
+    def total_rpm_limit(self) -> int:
+        return sum(provider.rpm_limit for provider in self.providers)
+
+    # 是否有任务正在等待配额
+    def is_saturated(self) -> bool:
+        return self.waiting > 0
+
+    # 按得分加权随机排列候选接口，暂停使用的接口只在没有其他接口时参与
+    def rank(self, tokens: int, exclude: set) -> list[Provider]:
+        now = time.time()
+        candidates = [
+            provider for provider in self.providers
+            if provider.name not in exclude and tokens <= provider.key_pool.max_tokens
+        ]
+        healthy = [provider for provider in candidates if not provider.is_cooling_down(now)]
+        if healthy:
+            candidates = healthy
+        else:
+            candidates.sort(key = lambda provider: provider.cooldown_until)
+            candidates = candidates[:1]
+
+        # 加权随机抽样，得分越高越可能排在前面
+        return sorted(candidates, key = lambda provider: random.random() ** (1.0 / provider.score()), reverse = True)
+
+    # 尝试立即从候选接口中获取配额，成功返回接口与密钥，否则返回还需等待的时间
+    def try_acquire(self, tokens: int, exclude: set, start_time: float) -> tuple[Provider, str, float]:
+        candidates = self.rank(tokens, exclude)
+        if not candidates:
+            return None, None, -1.0
+
+        wait_time = float("inf")
+        for provider in candidates:
+            key, provider_wait = provider.key_pool.try_acquire(tokens, start_time)
+            if key is not None:
+                return provider, key, 0.0
+            wait_time = min(wait_time, provider_wait)
+
+        return None, None, wait_time
+
+    # 阻塞获取一个有配额的接口与密钥，超时、取消或没有候选接口时返回 None
+    def acquire(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None, exclude: set = frozenset()) -> tuple[Provider, str]:
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+
+        waiting = False
+        try:
+            while cancel is None or not cancel():
+                provider, key, wait_time = self.try_acquire(tokens, exclude, start_time)
+                if provider is not None or wait_time < 0:
+                    return provider, key
+
+                if deadline is not None:
+                    remaining_time = deadline - time.time()
+                    if remaining_time <= 0 or wait_time > remaining_time:
+                        break
+
+                if not waiting:
+                    waiting = True
+                    self.set_waiting(1)
+                time.sleep(min(wait_time, self.WAIT_INTERVAL))
+            return None, None
+        finally:
+            if waiting:
+                self.set_waiting(-1)
+
+    # 异步获取一个有配额的接口与密钥，在事件循环中等待而不阻塞线程
+    async def acquire_async(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None, exclude: set = frozenset()) -> tuple[Provider, str]:
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+
+        waiting = False
+        try:
+            while cancel is None or not cancel():
+                provider, key, wait_time = self.try_acquire(tokens, exclude, start_time)
+                if provider is not None or wait_time < 0:
+                    return provider, key
+
+                if deadline is not None:
+                    remaining_time = deadline - time.time()
+                    if remaining_time <= 0 or wait_time > remaining_time:
+                        break
+
+                if not waiting:
+                    waiting = True
+                    self.set_waiting(1)
+                await asyncio.sleep(min(wait_time, self.WAIT_INTERVAL))
+            return None, None
+        finally:
+            if waiting:
+                self.set_waiting(-1)
+
+    # 调整等待配额的任务数量
+    def set_waiting(self, delta: int) -> None:
+        with self.waiting_lock:
+            self.waiting += delta
+
+    # 记录请求结果，连续失败的接口暂停使用，密钥的健康状态由各接口的密钥池记录
+    def report(self, provider: Provider, key: str, success: bool, error: Exception = None) -> None:
+        provider.key_pool.report(key, success, error)
+
+        cooling_down = provider.is_cooling_down(time.time())
+        provider.report(success)
+        if not cooling_down and provider.is_cooling_down(time.time()):
+            self.warning(f"接口池 - 接口 {provider.name} 连续请求失败 {provider.consecutive_failures} 次，暂停使用 {provider.cooldown_until - time.time():.0f} 秒 ...")
+
+    # 生成指定接口与密钥的配置信息包
+    def get_platform_configuration(self, config, provider: Provider, key: str) -> dict:
+        return config.build_platform_configuration(provider.name, provider.base_url, key, provider.model)
+
+    # 获取各接口的统计
+    def get_stats(self) -> list[dict]:
+        return [
+            {
+                "name": provider.name,
+                "weight": provider.weight,
+                "success_count": provider.success_count,
+                "failure_count": provider.failure_count,
+                "error_rate": provider.error_rate(),
+                "acquired_count": provider.key_pool.get_stats()["acquired_count"],
+            }
+            for provider in self.providers
+        ]
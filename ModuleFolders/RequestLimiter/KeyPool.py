@@ -0,0 +1,397 @@
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from Base.Base import Base
+from ModuleFolders.RequestLimiter.RequestLimiter import RequestLimiter
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
+
+
+# 单个密钥的限额与健康状态
+class ApiKeyState:
+
+    def __init__(self, key: str, limiter: RequestLimiter) -> None:
+        self.key = key
+        self.limiter = limiter
+
+        # 隔离状态，隔离期间不分配请求
+        self.quarantine_until = 0.0
+        self.quarantine_count = 0  # 连续被隔离的次数，用于计算退避时间
+
+        # 统计
+        self.request_count = 0
+        self.success_count = 0
+        self.failure_count = 0
+        self.last_status = None
+
+    # 是否处于隔离期间
+    def is_quarantined(self, now: float) -> bool:
+        return now < self.quarantine_until
+
+    # 用于日志与界面显示的密钥，只保留首尾字符
+    def masked_key(self) -> str:
+        if len(self.key) <= 8:
+            return self.key[:2] + "***"
+        return f"{self.key[:4]}***{self.key[-4:]}"
+
+
+# 异步等待配额的请求，队列变化时由其他线程唤醒
+class AsyncWaiter:
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    # 线程安全地唤醒，事件循环已关闭时忽略
+    def wake(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass
+
+
+# 密钥池
+class KeyPool(Base):
+    """为每个密钥维护独立的请求限制器
+
+    请求时选择能够立即获得配额且剩余配额最多的密钥，
+    等待配额的请求在整个密钥池上按先来后到排队，只有队首请求分配密钥，其余请求等待队首放行后的唤醒，
+    返回 401、403、429 的密钥被隔离，隔离时间随连续隔离次数指数增长，到期后自动恢复
+    """
+
+    # 触发隔离的状态码与首次隔离时间（秒），密钥无效或无权限时隔离更久
+    QUARANTINE_BASE = {
+        401: 60.0,
+        403: 60.0,
+        429: 10.0,
+    }
+    QUARANTINE_MAX = 600.0
+
+    # 异步等待时检查取消条件的最长间隔（秒）
+    WAIT_INTERVAL = 1.0
+
+    # 从异常信息中识别状态码
+    STATUS_CODE_REG = re.compile(r"\b(401|403|429)\b")
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.lock = threading.Lock()
+        self.states: list[ApiKeyState] = []
+        self.max_tokens = 0
+
+        # 正在等待配额的请求数量
+        self.waiting = 0
+
+        # 等待队列，同步请求在条件变量上等待，异步请求在各自的事件上等待
+        self.condition = threading.Condition()
+        self.waiters = deque()
+
+        # Tokens 计数服务
+        self.token_counter = TokenCounter.get_instance()
+
+    # 设置密钥列表与每个密钥的限额
+    def set_limit(self, keys: list[str], tpm_limit: int, rpm_limit: int) -> None:
+        states = []
+        for key in dict.fromkeys(keys or ["no_key_required"]):
+            limiter = RequestLimiter()
+            limiter.set_limit(tpm_limit, rpm_limit)
+            limiter.set_token_counter(self.token_counter)
+            states.append(ApiKeyState(key, limiter))
+
+        with self.lock:
+            self.states = states
+            self.max_tokens = tpm_limit
+
+        self.wake_all()
+
+    # 获取密钥在密钥列表中的序号，未找到时返回 -1
+    def get_key_index(self, key: str) -> int:
+        with self.lock:
+            for i, state in enumerate(self.states):
+                if state.key == key:
+                    return i
+        return -1
+
+    # 设置估算请求 Tokens 使用的计数服务
+    def set_token_counter(self, token_counter: TokenCounter) -> None:
+        self.token_counter = token_counter
+        for state in self.states:
+            state.limiter.set_token_counter(token_counter)
+
+    # 计算请求消耗的 Tokens
+    def calculate_tokens(self, messages, system_prompt) -> int:
+        if messages and system_prompt:
+            return self.token_counter.count_messages(messages) + self.token_counter.count(system_prompt)
+
+    # 尝试立即获取配额，成功返回密钥，否则返回还需等待的时间
+    def try_acquire(self, tokens: int, start_time: float) -> tuple[str, float]:
+        with self.condition:
+            # 有请求在排队时让其优先
+            if self.waiters:
+                return None, self.WAIT_INTERVAL / 10
+            return self.assign_key(tokens, start_time)
+
+    # 选择能够立即获得配额的密钥并扣除配额，需在持有 condition 时调用
+    def assign_key(self, tokens: int, start_time: float) -> tuple[str, float]:
+        with self.lock:
+            states = self.states
+        if not states:
+            return None, self.WAIT_INTERVAL
+
+        now = time.time()
+        available = [state for state in states if not state.is_quarantined(now)]
+
+        # 全部密钥都被隔离时，等待最早恢复的密钥
+        if not available:
+            return None, min(state.quarantine_until for state in states) - now
+
+        # 按剩余配额从多到少尝试，能立即获得配额的密钥中选择剩余最多的
+        budgets = []
+        for state in available:
+            wait_time, remaining_tokens = state.limiter.peek(tokens)
+            budgets.append((wait_time > 0, -remaining_tokens, wait_time, state))
+        budgets.sort(key = lambda budget: budget[:2])
+
+        wait_time = float("inf")
+        for _, _, key_wait, state in budgets:
+            if key_wait <= 0:
+                key_wait = state.limiter.try_acquire(tokens, start_time)
+                if key_wait <= 0:
+                    with self.lock:
+                        state.request_count += 1
+                    return state.key, 0.0
+            wait_time = min(wait_time, key_wait)
+
+        return None, wait_time
+
+    # 阻塞获取配额，返回分配的密钥，超时或 cancel() 返回真时返回 None
+    def acquire(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None) -> str:
+        # 检查是否超过模型最大输入限制
+        if tokens > self.max_tokens:
+            self.warning("该次任务的文本总tokens量已经超过最大输入限制，将直接进入下次拆分轮次")
+            return None
+
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+        ticket = object()
+
+        waiting = False
+        with self.condition:
+            self.waiters.append(ticket)
+            try:
+                while cancel is None or not cancel():
+                    key, wait_time = self.get_wait_time(ticket, tokens, start_time, deadline)
+                    if key is not None:
+                        return key
+                    if wait_time is not None and wait_time < 0:
+                        break
+
+                    if not waiting:
+                        waiting = True
+                        self.set_waiting(1)
+                    self.condition.wait(wait_time)
+                return None
+            finally:
+                self.waiters.remove(ticket)
+                self.notify_waiters()
+                if waiting:
+                    self.set_waiting(-1)
+
+    # 异步获取配额，在事件循环中等待而不阻塞线程
+    async def acquire_async(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None) -> str:
+        # 检查是否超过模型最大输入限制
+        if tokens > self.max_tokens:
+            self.warning("该次任务的文本总tokens量已经超过最大输入限制，将直接进入下次拆分轮次")
+            return None
+
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+        waiter = AsyncWaiter(asyncio.get_running_loop())
+
+        waiting = False
+        with self.condition:
+            self.waiters.append(waiter)
+        try:
+            while cancel is None or not cancel():
+                waiter.event.clear()
+                with self.condition:
+                    key, wait_time = self.get_wait_time(waiter, tokens, start_time, deadline)
+                if key is not None:
+                    return key
+                if wait_time is not None and wait_time < 0:
+                    break
+
+                if not waiting:
+                    waiting = True
+                    self.set_waiting(1)
+
+                # 取消条件无法唤醒事件循环中的等待，需要定期检查
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), self.WAIT_INTERVAL if wait_time is None else min(wait_time, self.WAIT_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+            return None
+        finally:
+            with self.condition:
+                self.waiters.remove(waiter)
+                self.notify_waiters()
+            if waiting:
+                self.set_waiting(-1)
+
+    # 队首请求尝试分配密钥，需在持有 condition 时调用
+    # 成功时返回密钥，否则返回本次需要等待的时间，None 为等待唤醒，负数为截止前等不到配额
+    def get_wait_time(self, ticket, tokens: int, start_time: float, deadline: float) -> tuple[str, float]:
+        now = time.time()
+        if self.waiters[0] is ticket:
+            key, wait_time = self.assign_key(tokens, start_time)
+            if key is not None:
+                return key, 0.0
+            if wait_time == float("inf"):
+                wait_time = None
+        else:
+            # 非队首请求只等待前面的请求放行后的唤醒
+            wait_time = None
+
+        if deadline is not None:
+            remaining_time = deadline - now
+            if remaining_time <= 0:
+                return None, -1.0
+            # 队首在截止前等不到配额时提前放弃，避免阻塞后面的请求
+            if wait_time is not None and wait_time > remaining_time:
+                return None, -1.0
+            wait_time = remaining_time if wait_time is None else min(wait_time, remaining_time)
+
+        return None, wait_time
+
+    # 唤醒全部等待中的请求，需在持有 condition 时调用
+    def notify_waiters(self) -> None:
+        self.condition.notify_all()
+        for waiter in self.waiters:
+            if isinstance(waiter, AsyncWaiter):
+                waiter.wake()
+
+    # 调整等待配额的请求数量
+    def set_waiting(self, delta: int) -> None:
+        with self.lock:
+            self.waiting += delta
+
+    # 获取密钥对应的状态
+    def get_state(self, key: str) -> ApiKeyState:
+        with self.lock:
+            for state in self.states:
+                if state.key == key:
+                    return state
+        return None
+
+    # 归还未实际消耗的令牌，例如请求在发出前就失败时
+    def release(self, key: str, tokens: int) -> None:
+        state = self.get_state(key)
+        if state is not None:
+            state.limiter.release(tokens)
+            self.wake_all()
+
+    # 从请求异常中获取 HTTP 状态码
+    @classmethod
+    def get_status_code(cls, error: Exception) -> int:
+        if error is None:
+            return None
+
+        # openai、anthropic 等 SDK 的异常带有 status_code，google-genai 的异常带有 code
+        for value in (
+            getattr(error, "status_code", None),
+            getattr(error, "code", None),
+            getattr(getattr(error, "response", None), "status_code", None),
+        ):
+            if isinstance(value, int):
+                return value
+
+        # boto3 的异常把状态码放在 response 字典中
+        response = getattr(error, "response", None)
+        if isinstance(response, dict):
+            value = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if isinstance(value, int):
+                return value
+
+        match = cls.STATUS_CODE_REG.search(str(error))
+        return int(match.group(1)) if match else None
+
+    # 记录请求结果，返回 401、403、429 的密钥进入隔离
+    def report(self, key: str, success: bool, error: Exception = None) -> None:
+        state = self.get_state(key)
+        if state is None:
+            return
+
+        status_code = None if success else self.get_status_code(error)
+        with self.lock:
+            state.last_status = status_code
+            if success:
+                state.success_count += 1
+                state.quarantine_count = 0
+                return
+
+            state.failure_count += 1
+            if status_code not in self.QUARANTINE_BASE:
+                return
+
+            # 隔离期间仍在途的请求失败时不重复延长隔离
+            if state.is_quarantined(time.time()):
+                return
+
+            quarantine_time = min(self.QUARANTINE_MAX, self.QUARANTINE_BASE[status_code] * (2 ** state.quarantine_count))
+            state.quarantine_until = time.time() + quarantine_time
+            state.quarantine_count += 1
+
+        self.warning(f"密钥 {state.masked_key()} 返回状态码 {status_code}，暂停使用 {quarantine_time:.0f} 秒 ...")
+
+    # 可用的密钥数量
+    def available_count(self) -> int:
+        now = time.time()
+        with self.lock:
+            return sum(1 for state in self.states if not state.is_quarantined(now))
+
+    # 唤醒全部等待中的请求，使其重新检查配额与取消条件
+    def wake_all(self) -> None:
+        with self.condition:
+            self.notify_waiters()
+
+        with self.lock:
+            states = self.states
+        for state in states:
+            state.limiter.wake_all()
+
+    # 获取汇总后的排队统计
+    def get_stats(self) -> dict:
+        with self.lock:
+            states = self.states
+            waiting = self.waiting
+
+        key_stats = [state.limiter.get_stats() for state in states]
+        acquired_count = sum(stats["acquired_count"] for stats in key_stats)
+        total_wait_time = sum(stats["avg_wait_time"] * stats["acquired_count"] for stats in key_stats)
+        return {
+            "queue_depth": waiting,
+            "acquired_count": acquired_count,
+            "rejected_count": sum(stats["rejected_count"] for stats in key_stats),
+            "avg_wait_time": total_wait_time / acquired_count if acquired_count > 0 else 0.0,
+            "max_wait_time": max((stats["max_wait_time"] for stats in key_stats), default = 0.0),
+        }
+
+    # 获取每个密钥的统计
+    def get_key_stats(self) -> list[dict]:
+        now = time.time()
+        with self.lock:
+            return [
+                {
+                    "key": state.masked_key(),
+                    "request_count": state.request_count,
+                    "success_count": state.success_count,
+                    "failure_count": state.failure_count,
+                    "last_status": state.last_status,
+                    "quarantine_remaining": max(0.0, state.quarantine_until - now),
+                }
+                for state in self.states
+            ]
@@ -1,12 +1,16 @@
+import asyncio
 import time
 import threading
-import tiktoken  # 需要安装库pip install tiktoken
-import tiktoken_ext  # 必须导入这两个库，否则打包后无法运行
-from tiktoken_ext import openai_public
+from collections import deque
+from typing import Callable
+
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
 
 
 class RequestLimiter:
 
+    ASYNC_CANCEL_CHECK_INTERVAL = 1.0  # 异步等待时检查取消条件的最长间隔（秒）
+
     def __init__(self) -> None:
         # TPM相关参数
         self.max_tokens = 0  # 令牌桶最大容量
@@ -19,93 +23,213 @@ class RequestLimiter:
         self.request_interval = 0  # 请求的最小时间间隔（s）
         self.lock = threading.Lock()
 
+        # 等待队列，按先来后到的顺序放行，队首之外的请求等待被唤醒
+        self.condition = threading.Condition(self.lock)
+        self.waiters = deque()
+
+        # 排队统计
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+        # Tokens 计数服务
+        self.token_counter = TokenCounter.get_instance()
+
     # 设置限制器的参数
     def set_limit(self, tpm_limit: int, rpm_limit: int) -> None:
-        # 设置限制器的TPM参数
-        self.max_tokens = 32000  # 令牌桶最大容量
-        self.tokens_rate = tpm_limit / 60  # 令牌每秒的恢复速率
-        self.remaining_tokens = 32000  # 令牌桶剩余容量
-
-        # 设置限制器的RPM参数
-        self.request_interval = 60 / rpm_limit  # 请求的最小时间间隔（s）
-
-    def rpm_limiter(self) -> bool:
-        current_time = time.time()  # 获取现在的时间
-        time_since_last_request = current_time - self.last_request_time  # 计算当前时间与上次记录时间的间隔
-        if time_since_last_request < self.request_interval:
-            # print("[DEBUG] Request limit exceeded. Please try again later.")
-            return False
-        else:
-            self.last_request_time = current_time
-            return True
-
-    def tpm_limiter(self, tokens: int) -> bool:
-        now = time.time()  # 获取现在的时间
+        with self.lock:
+            # 设置限制器的TPM参数，令牌桶容量为一分钟的配额
+            self.max_tokens = tpm_limit  # 令牌桶最大容量
+            self.tokens_rate = tpm_limit / 60  # 令牌每秒的恢复速率
+            self.remaining_tokens = tpm_limit  # 令牌桶剩余容量
+            self.last_time = time.time()
+
+            # 设置限制器的RPM参数
+            self.request_interval = 60 / rpm_limit  # 请求的最小时间间隔（s）
+            self.last_request_time = 0
+
+            self.condition.notify_all()
+
+        self.reset_stats()
+
+    # 重置排队统计
+    def reset_stats(self) -> None:
+        with self.stats_lock:
+            self.acquired_count = 0  # 放行的请求数
+            self.rejected_count = 0  # 超时或取消的请求数
+            self.total_wait_time = 0.0  # 放行请求的累计等待时间
+            self.max_wait_time = 0.0  # 放行请求的最长等待时间
+
+    # 补充令牌桶，需在持有锁时调用
+    def refill(self, now: float) -> None:
         tokens_to_add = (now - self.last_time) * self.tokens_rate  # 现在时间减去上一次记录的时间，乘以恢复速率，得出这段时间恢复的tokens数量
-        self.remaining_tokens = min(self.max_tokens, self.remaining_tokens + tokens_to_add)  # 计算新的剩余容量，与最大容量比较，谁小取谁值，避免发送信息超过最大容量
+        self.remaining_tokens = min(self.max_tokens, self.remaining_tokens + tokens_to_add)  # 计算新的剩余容量，与最大容量比较，谁小取谁值
         self.last_time = now  # 改变上次记录时间
 
+    # 计算距离 RPM 与 TPM 配额都满足还需等待的时间，需在持有锁时调用
+    def time_until_available(self, tokens: int, now: float) -> float:
+        rpm_wait = self.last_request_time + self.request_interval - now
+        tpm_wait = 0.0
+        if tokens > self.remaining_tokens:
+            tpm_wait = (tokens - self.remaining_tokens) / self.tokens_rate if self.tokens_rate > 0 else float("inf")
+        return max(rpm_wait, tpm_wait, 0.0)
+
+    # 阻塞获取配额
+    def acquire(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None) -> bool:
+        """按 RPM 与 TPM 配额获取一次请求许可
+
+        精确计算配额恢复的时间点并在条件变量上等待，超时或 cancel() 返回真时放弃，返回 False
+        """
         # 检查是否超过模型最大输入限制
-        if tokens >= self.max_tokens:
+        if tokens > self.max_tokens:
             print("[Warning INFO] 该次任务的文本总tokens量已经超过最大输入限制，将直接进入下次拆分轮次")
+            self.record_rejected()
             return False
-        
-        # 检查是否超过余量
-        elif tokens >= self.remaining_tokens:
-            return False
-        
-        else:
-            # print("[DEBUG] 数量足够，剩余tokens：", tokens,'\n' )
-            return True
 
-    def check_limiter(self, tokens: int) -> bool:
-        # 如果能够发送请求，则扣除令牌桶里的令牌数
-        with self.lock:
-            if self.rpm_limiter() and self.tpm_limiter(tokens):
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+        ticket = object()
+
+        with self.condition:
+            self.waiters.append(ticket)
+            try:
+                while True:
+                    if cancel is not None and cancel():
+                        break
+
+                    now = time.time()
+                    if self.waiters[0] is ticket:
+                        self.refill(now)
+                        wait_time = self.time_until_available(tokens, now)
+                        if wait_time <= 0:
+                            self.remaining_tokens = self.remaining_tokens - tokens
+                            self.last_request_time = now
+                            self.record_acquired(now - start_time)
+                            return True
+                    else:
+                        # 非队首请求只等待队首放行后的唤醒
+                        wait_time = None
+
+                    if deadline is not None:
+                        remaining_time = deadline - now
+                        if remaining_time <= 0:
+                            break
+                        # 队首在截止前等不到配额时提前放弃，避免阻塞后面的请求
+                        if wait_time is not None and wait_time > remaining_time:
+                            break
+                        wait_time = remaining_time if wait_time is None else min(wait_time, remaining_time)
+
+                    self.condition.wait(wait_time)
+
+                self.record_rejected()
+                return False
+            finally:
+                self.waiters.remove(ticket)
+                self.condition.notify_all()
+
+    # 尝试立即获取配额，成功返回 0，否则返回还需等待的时间
+    def try_acquire(self, tokens: int, start_time: float) -> float:
+        with self.condition:
+            now = time.time()
+
+            # 有同步请求在排队时让其优先
+            if self.waiters:
+                return self.ASYNC_CANCEL_CHECK_INTERVAL / 10
+
+            self.refill(now)
+            wait_time = self.time_until_available(tokens, now)
+            if wait_time <= 0:
                 self.remaining_tokens = self.remaining_tokens - tokens
+                self.last_request_time = now
+                self.record_acquired(now - start_time)
+            return wait_time
+
+    # 查询获取配额还需等待的时间与令牌桶剩余容量，不扣除配额
+    def peek(self, tokens: int) -> tuple[float, float]:
+        with self.condition:
+            now = time.time()
+            self.refill(now)
+            wait_time = self.time_until_available(tokens, now)
+            if self.waiters:
+                wait_time = max(wait_time, self.ASYNC_CANCEL_CHECK_INTERVAL / 10)
+            return wait_time, self.remaining_tokens
+
+    # 异步获取配额，在事件循环中等待而不阻塞线程
+    async def acquire_async(self, tokens: int, timeout: float = None, cancel: Callable[[], bool] = None) -> bool:
+        # 检查是否超过模型最大输入限制
+        if tokens > self.max_tokens:
+            print("[Warning INFO] 该次任务的文本总tokens量已经超过最大输入限制，将直接进入下次拆分轮次")
+            self.record_rejected()
+            return False
+
+        start_time = time.time()
+        deadline = None if timeout is None else start_time + timeout
+
+        while cancel is None or not cancel():
+            wait_time = self.try_acquire(tokens, start_time)
+            if wait_time <= 0:
                 return True
-            else:
-                return False
+
+            if deadline is not None:
+                remaining_time = deadline - time.time()
+                if remaining_time <= 0 or wait_time > remaining_time:
+                    break
+
+            await asyncio.sleep(min(wait_time, self.ASYNC_CANCEL_CHECK_INTERVAL))
+
+        self.record_rejected()
+        return False
+
+    # 归还未实际消耗的令牌，例如请求在发出前就失败时
+    def release(self, tokens: int) -> None:
+        with self.condition:
+            self.refill(time.time())
+            self.remaining_tokens = min(self.max_tokens, self.remaining_tokens + tokens)
+            self.condition.notify_all()
+
+    # 唤醒全部等待中的请求，使其重新检查取消条件
+    def wake_all(self) -> None:
+        with self.condition:
+            self.condition.notify_all()
+
+    def check_limiter(self, tokens: int) -> bool:
+        # 不等待，能够发送请求时扣除令牌桶里的令牌数
+        return self.acquire(tokens, timeout = 0)
+
+    def record_acquired(self, wait_time: float) -> None:
+        with self.stats_lock:
+            self.acquired_count = self.acquired_count + 1
+            self.total_wait_time = self.total_wait_time + wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def record_rejected(self) -> None:
+        with self.stats_lock:
+            self.rejected_count = self.rejected_count + 1
+
+    # 获取排队统计
+    def get_stats(self) -> dict:
+        with self.stats_lock:
+            return {
+                "queue_depth": len(self.waiters),
+                "acquired_count": self.acquired_count,
+                "rejected_count": self.rejected_count,
+                "avg_wait_time": self.total_wait_time / self.acquired_count if self.acquired_count > 0 else 0.0,
+                "max_wait_time": self.max_wait_time,
+            }
+
+    # 设置估算请求 Tokens 使用的计数服务
+    def set_token_counter(self, token_counter: TokenCounter) -> None:
+        self.token_counter = token_counter
 
     # 计算消息列表内容的tokens的函数
     def num_tokens_from_messages(self, messages) -> int:
         """Return the number of tokens used by a list of messages."""
-        try:
-            encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        except KeyError:
-            print("Warning: model not found. Using cl100k_base encoding.")
-            encoding = tiktoken.get_encoding("cl100k_base")
-
-        tokens_per_message = 3
-        tokens_per_name = 1
-        num_tokens = 0
-        for message in messages:
-            num_tokens += tokens_per_message
-            for key, value in message.items():
-                # 如果value是字符串类型才计算tokens，否则跳过，因为AI在调用函数时，会在content中回复null，导致报错
-                if isinstance(value, str):
-                    num_tokens += len(encoding.encode(value))
-                if key == "name":
-                    num_tokens += tokens_per_name
-        num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
-        return num_tokens
-
+        return self.token_counter.count_messages(messages)
 
     # 计算字符串内容的tokens的函数
     def num_tokens_from_str(self, text) -> int:
-        """Return the number of tokens used by a list of messages."""
-        try:
-            encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-        except KeyError:
-            print("Warning: model not found. Using cl100k_base encoding.")
-            encoding = tiktoken.get_encoding("cl100k_base")
-        if isinstance(text, str):
-            num_tokens = len(encoding.encode(text))
-        else:
-            num_tokens = 0
-
-        return num_tokens
-    
+        """Return the number of tokens used by a string."""
+        return self.token_counter.count(text)
+
     def calculate_tokens(self, message1, text1,):
         """
         根据输入的消息和文本，计算tokens消耗并返回。
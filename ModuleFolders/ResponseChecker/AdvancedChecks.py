@@ -15,9 +15,21 @@ def check_multiline_text( source_text_dict, translated_dict):
     Returns:
         bool: 所有多行文本块检查通过返回True，否则返回False。
     """
+    return not find_multiline_text_errors(source_text_dict, translated_dict)
+
+# 找出换行符数量或多行文本内容不正确的行
+def find_multiline_text_errors(source_text_dict, translated_dict):
+    """
+    逐行执行多行文本块检查。
+
+    Returns:
+        set: 未通过检查的 key 集合，全部通过时为空集合。
+    """
 
     if (len(source_text_dict) == 1) and (len(translated_dict) == 1):
-        return True  # 一行就不检查了
+        return set()  # 一行就不检查了
+
+    errors = set()
 
     # 获取排序后的key，确保按数字顺序检查
     keys = sorted(source_text_dict.keys(), key=int)
@@ -25,7 +37,8 @@ def check_multiline_text( source_text_dict, translated_dict):
     for key in keys:
         # 检查key是否存在于输入字典中
         if key not in translated_dict:
-            return False
+            errors.add(key)
+            continue
 
         source_text = source_text_dict[key]
         translated_text = translated_dict[key]
@@ -44,7 +57,8 @@ def check_multiline_text( source_text_dict, translated_dict):
 
         # 检查换行符数是否匹配，要放在外面进行比较，因为source_text可能没有换行符，而译文就有
         if source_newlines != translated_newlines:
-            return False
+            errors.add(key)
+            continue
 
         # 如果源文本包含换行符，则需要检查每一行
         if '\n' in source_text: 
@@ -64,9 +78,10 @@ def check_multiline_text( source_text_dict, translated_dict):
                         continue
                     else:
                         # 源文本有内容但翻译没有，不通过检查
-                        return False
+                        errors.add(key)
+                        break
 
-    return True  # 所有检查都通过
+    return errors
 
 
 
@@ -86,15 +101,28 @@ def check_placeholders_exist(placeholder_info: dict, translated_dict: dict) -> b
         如果所有定义的占位符都存在于其对应的文本段落中，则返回 True；
         否则返回 False。
     """
+    return not find_missing_placeholders(placeholder_info, translated_dict)
+
+# 找出未保留全部占位符的段落
+def find_missing_placeholders(placeholder_info: dict, translated_dict: dict) -> set:
+    """
+    逐段执行占位符检查，参数与 check_placeholders_exist 相同。
+
+    Returns:
+        缺失占位符的段落 ID 集合，全部保留时为空集合。
+    """
+    errors = set()
+
     # 非空检查
     if not placeholder_info:
-        return True
+        return errors
 
     # 遍历占位符信息字典中的每个段落 ID 和对应的占位符列表
     for text_id, placeholder_list in placeholder_info.items():
         # 检查文本内容字典中是否存在对应的段落 ID
         if text_id not in translated_dict:
-            return False
+            errors.add(text_id)
+            continue
 
         # 获取对应段落的文本内容
         segment_text = translated_dict[text_id]
@@ -113,9 +141,10 @@ def check_placeholders_exist(placeholder_info: dict, translated_dict: dict) -> b
 
             # 核心检查：占位符是否存在于文本中
             if placeholder not in segment_text:
-                return False  # 发现一个缺失，即可确定结果为 False，提前退出
+                errors.add(text_id)  # 发现一个缺失，即可确定该段落未通过
+                break
 
-    return True
+    return errors
 
 
 
@@ -171,6 +200,10 @@ def check_dicts_equal(dict1, dict2):
 
 # 检查残留原文的算法
 def detecting_remaining_original_text(dictA, dictB, language):
+    return not find_remaining_original_text(dictA, dictB, language)
+
+# 找出残留原文的行
+def find_remaining_original_text(dictA, dictB, language):
 
     # 使用复制变量，避免影响到原变量
     dict_src = dictA.copy()
@@ -178,11 +211,11 @@ def detecting_remaining_original_text(dictA, dictB, language):
 
     # 考量到代码文本，不支持的语言不作检查
     if language not in ("japanese","korean","chinese_simplified","chinese_traditional"):
-        return True
+        return set()
 
     # 避免检查单或者少行字典
     if len(dict_src) <=1 :
-        return True
+        return set()
 
     # 不同语言的通用标点符号字符集
     punctuation_pattern_sets = re.compile(
@@ -223,8 +256,8 @@ def detecting_remaining_original_text(dictA, dictB, language):
         ),
     }
 
-    # 存储计数结果的字典
-    count_results = 0
+    # 存在残留原文的行
+    errors = set()
 
     # 遍历译文字典中的每个键值对
     for key_dst, value_dst in dict_dst.items():
@@ -256,22 +289,12 @@ def detecting_remaining_original_text(dictA, dictB, language):
             # 检查是否有原文残留
             if text_src:
 
-                # 检查是否在原文中
-                if  text in text_src:
-                    count_results += 1        
-
-                # 如果没有，则检查是否有原文的单个在原文中
-                else:
-                    for char in text:
-                        if char in text_src:
-                            count_results += 1                 
-
-    # 根据出现次数判断结果
-    #print("count_results:", count_results)  # 调试输出
-    if  count_results >=1:
-        return False
+                # 检查是否在原文中，如果没有，则检查是否有原文的单个在原文中
+                if text in text_src or any(char in text_src for char in text):
+                    errors.add(key_dst)
+                    break
 
-    return True
+    return errors
 
 # 辅助函数
 def remove_punctuation(input_string, punctuation_list):
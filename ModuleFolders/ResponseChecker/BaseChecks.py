@@ -18,21 +18,26 @@ def check_dict_order(source_text_dict,input_dict):
     Returns:
         bool: 检查全部通过返回True，否则返回False。
     """
-    if (len(source_text_dict) == 1) and (len(input_dict) == 1):
-        return True  # 一行就不检查了
+    return not find_dict_order_errors(source_text_dict, input_dict)
 
+# 找出数字序号不正确的行
+def find_dict_order_errors(source_text_dict, input_dict):
+    """
+    逐行检查数字序号，第 N 个 key（从零开始）的值应以 "N+1." 开头。
 
-    expected_num = 1  # 期望的起始序号
-    keys = sorted(input_dict.keys(), key=int)  # 获取排序后的key，确保按数字顺序检查
+    Returns:
+        set: 序号不正确的 key 集合，全部正确时为空集合。
+    """
+    if (len(source_text_dict) == 1) and (len(input_dict) == 1):
+        return set()  # 一行就不检查了
 
-    for key in keys:
-        value = input_dict[key]
-        prefix = str(expected_num) + "."
+    errors = set()
+    for key, value in input_dict.items():
+        prefix = str(int(key) + 1) + "."  # 期望的序号
         if not value.startswith(prefix):
-            return False  # 值没有以期望的序号开头
-        expected_num += 1  # 序号递增
+            errors.add(key)  # 值没有以期望的序号开头
 
-    return True  # 所有检查都通过
+    return errors
 
 # 检查回复内容的文本行数
 def check_text_line_count(source_dict, response_dict):
@@ -44,14 +49,16 @@ def check_text_line_count(source_dict, response_dict):
 
 # 检查翻译内容是否有空值
 def check_empty_response(response_dict):
-    for value in response_dict.values():
-        #检查value是不是None，因为AI回回复null，但是json.loads()会把null转化为None
-        if value is None:
-            return False
+    return not find_empty_responses(response_dict)
 
+# 找出翻译内容为空值的行
+def find_empty_responses(response_dict):
+    errors = set()
+    for key, value in response_dict.items():
+        #检查value是不是None，因为AI回回复null，但是json.loads()会把null转化为None
         # 检查value是不是空字符串，因为AI回回复空字符串，但是json.loads()会把空字符串转化为""
-        if value == "":
-            return False
+        if value is None or value == "":
+            errors.add(key)
 
-    return True
+    return errors
 
@@ -4,14 +4,19 @@ from ModuleFolders.ResponseChecker.BaseChecks import (
     check_text_line_count,
     check_empty_response,
     check_dict_order,
-    contains_special_chars
+    contains_special_chars,
+    find_dict_order_errors,
+    find_empty_responses
 )
 
 from ModuleFolders.ResponseChecker.AdvancedChecks import (
     check_multiline_text, 
     check_dicts_equal, 
     detecting_remaining_original_text, 
-    check_placeholders_exist
+    check_placeholders_exist,
+    find_missing_placeholders,
+    find_multiline_text_errors,
+    find_remaining_original_text
 )
 
 class ResponseChecker():
@@ -68,6 +73,60 @@ class ResponseChecker():
         # 全部检查通过
         return True, "检查无误"
 
+    # 逐行检查回复内容
+    def check_response_lines(self, config, placeholder_order, response_str, response_dict, source_text_dict, source_lang) -> dict[str, str]:
+        """
+        与 check_response_content 执行相同的检查，但给出每一行的结果。
+
+        拒绝翻译、行数不一致或整体返回原文时，译文与原文的对应关系不可信，全部行都判定为未通过。
+
+        Returns:
+            dict: 未通过检查的原文 key 与错误原因，全部通过时为空字典。
+        """
+
+        source_language = TranslatorUtil.map_language_code_to_name(source_lang)
+        response_check_switch = config.response_check_switch
+
+        # 检查接口是否拒绝翻译
+        if not contains_special_chars(response_str):
+            return {key: "模型已拒绝翻译或格式错误" for key in source_text_dict}
+
+        # 检查文本行数
+        if not check_text_line_count(source_text_dict, response_dict):
+            return {key: "【行数错误】 - 行数不一致" for key in source_text_dict}
+
+        # 整体返回原文检查
+        if response_check_switch.get('return_to_original_text_check', False):
+            if not check_dicts_equal(source_text_dict, response_dict):
+                return {key: "【返回原文】 - 译文与原文完全相同" for key in source_text_dict}
+
+        line_errors = {}
+
+        # 检查文本空行，空行不参与后续检查
+        for key in find_empty_responses(response_dict):
+            line_errors.setdefault(key, "【行数错误】 - 行数无法对应")
+        valid_dict = {key: value for key, value in response_dict.items() if key not in line_errors}
+
+        # 检查数字序号是否正确
+        for key in find_dict_order_errors(source_text_dict, valid_dict):
+            line_errors.setdefault(key, "【行数错误】 - 出现错行串行")
+
+        # 多行文本块检查
+        if response_check_switch.get('newline_character_count_check', False):
+            for key in find_multiline_text_errors(source_text_dict, valid_dict):
+                line_errors.setdefault(key, "【换行符数】 - 译文换行符数量不一致")
+
+        # 残留原文检查
+        if response_check_switch.get('residual_original_text_check', False):
+            for key in find_remaining_original_text(source_text_dict, valid_dict, source_language):
+                line_errors.setdefault(key, "【翻译残留】 - 译文中残留部分原文")
+
+        # 占位符检查
+        for key in find_missing_placeholders(placeholder_order, valid_dict):
+            line_errors.setdefault(key, "【自动处理】 - 未正确保留全部的占位符")
+
+        return line_errors
+
 
     def check_polish_response_content(self, config, response_str, response_dict, source_text_dict):
 
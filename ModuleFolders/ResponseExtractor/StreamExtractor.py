@@ -0,0 +1,169 @@
+import re
+
+
+# 流式回复解析器
+class StreamExtractor:
+    """逐块接收流式回复并增量检查，发现回复明显异常时给出中止原因
+
+    检查项目：
+    1. textarea 中的行序号跳过了原文行，或超出原文行数
+    2. 回复长度超过原文长度的指定倍数
+    3. 回复末尾出现长段的循环重复（模型退化）
+    完整回复仍由 ResponseExtractor 与 ResponseChecker 处理
+    """
+
+    DEFAULT_LENGTH_RATIO = 5.0
+    DEFAULT_REPEAT_CHARS = 200
+
+    # 重复检测的最大循环周期（字符数）
+    MAX_REPEAT_PERIOD = 200
+
+    # 每新增多少字符进行一次重复检测
+    REPEAT_CHECK_INTERVAL = 64
+
+    # 行首序号
+    LINE_NUMBER_REG = re.compile(r"^\s*(\d+)\.")
+
+    def __init__(self, source_text_dict: dict = None, length_ratio: float = None, repeat_chars: int = None) -> None:
+        source_lines = list(source_text_dict.values()) if source_text_dict else []
+        self.source_line_count = len(source_lines)
+
+        # 长度上限，额外预留序号、标签与说明文字的长度
+        length_ratio = length_ratio or self.DEFAULT_LENGTH_RATIO
+        source_length = sum(len(line) for line in source_lines)
+        self.max_length = int(source_length * length_ratio) + 200 + 10 * self.source_line_count if source_lines else 0
+
+        # 原文中本身较长的重复内容（如拟声词）不应被判定为退化
+        longest_line = max((len(line) for line in source_lines), default = 0)
+        self.repeat_chars = max(repeat_chars or self.DEFAULT_REPEAT_CHARS, longest_line * 2)
+
+        self.think = ""
+        self.content = ""
+
+        self.think_checked = 0
+        self.content_checked = 0
+
+        # 正文起始位置，位于 <think> 标签之后
+        self.body_start = None
+        self.line_pos = 0
+        self.in_textarea = False
+        self.current_number = 0
+
+    # 根据接口配置信息包创建解析器
+    @classmethod
+    def from_platform_config(cls, platform_config: dict) -> "StreamExtractor":
+        return cls(
+            platform_config.get("source_text_dict"),
+            platform_config.get("stream_length_ratio"),
+            platform_config.get("stream_repeat_chars"),
+        )
+
+    # 接收思考内容，返回中止原因，无异常时返回空字符串
+    def feed_think(self, text: str) -> str:
+        if not text:
+            return ""
+
+        self.think += text
+        if len(self.think) - self.think_checked >= self.REPEAT_CHECK_INTERVAL:
+            self.think_checked = len(self.think)
+            if self.is_repeating(self.think):
+                return "思考内容出现循环重复"
+
+        return ""
+
+    # 接收回复内容，返回中止原因，无异常时返回空字符串
+    def feed(self, text: str) -> str:
+        if not text:
+            return ""
+
+        self.content += text
+
+        if len(self.content) - self.content_checked >= self.REPEAT_CHECK_INTERVAL:
+            self.content_checked = len(self.content)
+            if self.is_repeating(self.content):
+                return "回复内容出现循环重复"
+
+        # 回复内容中的思考部分结束前不检查正文
+        if self.body_start is None:
+            self.body_start = self.find_body_start()
+            if self.body_start is None:
+                return ""
+            self.line_pos = self.body_start
+
+        if self.max_length and len(self.content) - self.body_start > self.max_length:
+            return f"回复长度超过原文的 {self.max_length} 字符上限"
+
+        if "\n" in text:
+            return self.check_line_numbers()
+
+        return ""
+
+    # 获取正文起始位置，思考尚未结束时返回 None
+    def find_body_start(self) -> int | None:
+        stripped = self.content.lstrip()
+        if not stripped.startswith("<think>"[:len(stripped)]):
+            return 0
+        if len(stripped) < len("<think>"):
+            return None
+
+        end = self.content.find("</think>")
+        if end == -1:
+            return None
+        return end + len("</think>")
+
+    # 检查新增的完整行的序号
+    def check_line_numbers(self) -> str:
+        # 原文只有一行时，模型通常不输出序号
+        if self.source_line_count <= 1:
+            return ""
+
+        end = self.content.rfind("\n") + 1
+        lines = self.content[self.line_pos:end].split("\n")
+        self.line_pos = end
+
+        for line in lines:
+            # 只检查最后一个 textarea 中的内容，与回复解析器一致
+            if "<textarea" in line:
+                self.in_textarea = True
+                self.current_number = 0
+                line = line[line.find(">", line.find("<textarea")) + 1:]
+            if "</textarea>" in line:
+                self.in_textarea = False
+                continue
+            if not self.in_textarea:
+                continue
+
+            match = self.LINE_NUMBER_REG.match(line)
+            if match is None:
+                continue
+
+            # 小于等于当前序号的数字可能是译文内容本身，不作判断
+            number = int(match.group(1))
+            if number <= self.current_number:
+                continue
+
+            if number == self.current_number + 1:
+                if number > self.source_line_count:
+                    return f"回复行数超过原文的 {self.source_line_count} 行"
+                self.current_number = number
+            elif number <= self.source_line_count:
+                return f"回复序号从 {self.current_number} 跳到了 {number}"
+
+        return ""
+
+    # 检查文本末尾是否存在长段的循环重复，同一片段至少连续出现三次
+    def is_repeating(self, text: str) -> bool:
+        tail = text[-max(self.repeat_chars, self.MAX_REPEAT_PERIOD * 3):]
+        if len(tail) < self.repeat_chars:
+            return False
+
+        for period in range(1, min(self.MAX_REPEAT_PERIOD, len(tail) // 3) + 1):
+            unit = tail[-period:]
+            required = max(self.repeat_chars, period * 3)
+            repeated = period
+            while repeated + period <= len(tail) and tail[-repeated - period:-repeated] == unit:
+                repeated += period
+                if repeated >= required:
+                    return True
+
+        return False
@@ -13,7 +13,6 @@ from ModuleFolders.ResponseChecker.ResponseChecker import ResponseChecker
 from ModuleFolders.PromptBuilder.PromptBuilder import PromptBuilder
 from ModuleFolders.PromptBuilder.PromptBuilderPolishing import PromptBuilderPolishing
 from ModuleFolders.PromptBuilder.PromptBuilderFormat import PromptBuilderFormat
-from ModuleFolders.NERProcessor.NERProcessor import NERProcessor
 
 # 简易请求器
 class SimpleExecutor(Base):
@@ -356,7 +355,7 @@ class SimpleExecutor(Base):
             # 发送请求
             requester = LLMRequester()
             skip, _, response_content, _, _ = requester.sent_request(
-                messages, system_prompt, platform_config
+                messages, system_prompt, platform_config, defer_cache = True
             )
 
             # 检查请求是否失败
@@ -375,6 +374,7 @@ class SimpleExecutor(Base):
             print("├─ 正在解析和校验回复...")
             response_dict = ResponseExtractor.text_extraction(self, source_text_dict, response_content)
             check_result, error_content = ResponseChecker.check_polish_response_content(self, config, response_content, response_dict, source_text_dict)
+            requester.settle_cached_response(platform_config, check_result)
             
             if not check_result:
                 print(f"├─ 内容校验失败: {error_content}")
@@ -465,7 +465,7 @@ class SimpleExecutor(Base):
             # 发送请求
             requester = LLMRequester()
             skip, _, response_content, _, _ = requester.sent_request(
-                messages, system_prompt, platform_config
+                messages, system_prompt, platform_config, defer_cache = True
             )
 
             # 检查请求是否失败
@@ -491,6 +491,7 @@ class SimpleExecutor(Base):
             print("├─ 正在解析和校验回复...")
             response_dict = ResponseExtractor.text_extraction(self, text_dict, response_content)
             check_result, error_content = ResponseChecker.check_polish_response_content(self, config, response_content, response_dict, text_dict)
+            requester.settle_cached_response(platform_config, check_result)
             
             if not check_result:
                 print(f"├─ 内容校验失败: {error_content}")
@@ -636,6 +637,9 @@ class SimpleExecutor(Base):
         self.info(f"开始处理术语提取任务... 参数: {params}")
         self.info(f"共收到 {len(items_data)} 条待处理数据。")
 
+        # spaCy 与 SudachiPy 较重，只在提取术语时导入
+        from ModuleFolders.NERProcessor.NERProcessor import NERProcessor
+
         # 实例化独立的处理器
         processor = NERProcessor()
         
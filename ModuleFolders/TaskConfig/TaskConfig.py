@@ -71,6 +71,9 @@ class TaskConfig(Base):
     # 准备翻译
     def prepare_for_translation(self,mode) -> None:
 
+        # 记录当前任务类型，供插件区分翻译与润色流程
+        self.task_mode = mode
+
         # 获取目标平台
         if mode == TaskType.TRANSLATION:
             self.target_platform = self.api_settings["translate"]
@@ -79,36 +82,16 @@ class TaskConfig(Base):
         elif mode == TaskType.FORMAT:
             self.target_platform = self.api_settings["format"]
 
-        # 获取模型类型
-        self.model = self.platforms.get(self.target_platform).get("model")
-
-        # 分割密钥字符串
-        api_key = self.platforms.get(self.target_platform).get("api_key")
-        if api_key == "":
-            self.apikey_list = ["no_key_required"]
-            self.apikey_index = 0
-        else:
-            self.apikey_list = re.sub(r"\s+","", api_key).split(",")
-            self.apikey_index = 0
-
-        # 获取接口地址并自动补全
-        self.base_url = self.platforms.get(self.target_platform).get("api_url")
-        auto_complete = self.platforms.get(self.target_platform).get("auto_complete")
-
-        if (self.target_platform == "sakura" or self.target_platform == "LocalLLM") and not self.base_url.endswith("/v1"):
-            self.base_url += "/v1"
-        elif auto_complete:
-            version_suffixes = ["/v1", "/v2", "/v3", "/v4"]
-            if not any(self.base_url.endswith(suffix) for suffix in version_suffixes):
-                self.base_url += "/v1"
-
-        # 获取接口限额
-        self.rpm_limit = self.platforms.get(self.target_platform).get("rpm_limit", 4096)    # 当取不到账号类型对应的预设值，则使用该值
-        self.tpm_limit = self.platforms.get(self.target_platform).get("tpm_limit", 10000000)    # 当取不到账号类型对应的预设值，则使用该值
-
-        # 根据密钥数量给 RPM 和 TPM 限额翻倍
-        self.rpm_limit = self.rpm_limit * len(self.apikey_list)
-        self.tpm_limit = self.tpm_limit * len(self.apikey_list)
+        # 获取模型类型、密钥、接口地址与接口限额
+        settings = self.resolve_platform_settings(self.target_platform)
+        self.model = settings["model"]
+        self.apikey_list = settings["apikey_list"]
+        self.apikey_index = 0
+        self.base_url = settings["base_url"]
+        self.rpm_limit = settings["rpm_limit"]
+        self.tpm_limit = settings["tpm_limit"]
+        self.key_rpm_limit = settings["key_rpm_limit"]
+        self.key_tpm_limit = settings["key_tpm_limit"]
 
         # 如果开启自动设置输出文件夹功能，设置为输入文件夹的平级目录
         if self.auto_set_output_path == True:
@@ -123,17 +106,54 @@ class TaskConfig(Base):
             output_folder_name = "PolishingOutput"
             self.polishing_output_path = os.path.join(parent_dir, output_folder_name)
 
-        # 保存新配置
-        config = self.load_config()
-        config["label_output_path"] = self.label_output_path
-        config["polishing_output_path"] = self.polishing_output_path
-        self.save_config(config)
+        # 保存新配置，输出路径未变化时不会写入文件
+        self.save_config({
+            "label_output_path": self.label_output_path,
+            "polishing_output_path": self.polishing_output_path,
+        })
 
 
         # 计算实际线程数
         self.actual_thread_counts = self.thread_counts_setting(self.user_thread_counts,self.target_platform,self.rpm_limit)
 
 
+    # 获取指定平台的模型、密钥列表、补全后的接口地址与接口限额
+    def resolve_platform_settings(self, target_platform: str) -> dict:
+        platform = self.platforms.get(target_platform)
+
+        # 分割密钥字符串
+        api_key = platform.get("api_key")
+        if api_key == "":
+            apikey_list = ["no_key_required"]
+        else:
+            apikey_list = re.sub(r"\s+","", api_key).split(",")
+
+        # 获取接口地址并自动补全
+        base_url = platform.get("api_url")
+        auto_complete = platform.get("auto_complete")
+
+        if (target_platform == "sakura" or target_platform == "LocalLLM") and not base_url.endswith("/v1"):
+            base_url += "/v1"
+        elif auto_complete:
+            version_suffixes = ["/v1", "/v2", "/v3", "/v4"]
+            if not any(base_url.endswith(suffix) for suffix in version_suffixes):
+                base_url += "/v1"
+
+        # 获取接口限额
+        rpm_limit = platform.get("rpm_limit", 4096)    # 当取不到账号类型对应的预设值，则使用该值
+        tpm_limit = platform.get("tpm_limit", 10000000)    # 当取不到账号类型对应的预设值，则使用该值
+
+        # 每个密钥单独限额，总限额为各密钥限额之和
+        return {
+            "model": platform.get("model"),
+            "apikey_list": apikey_list,
+            "base_url": base_url,
+            "key_rpm_limit": rpm_limit,
+            "key_tpm_limit": tpm_limit,
+            "rpm_limit": rpm_limit * len(apikey_list),
+            "tpm_limit": tpm_limit * len(apikey_list),
+        }
+
     # 自动计算实际请求线程数
     def thread_counts_setting(self,user_thread_counts,target_platform,rpm_limit) -> None:
         # 如果用户指定了线程数，则使用用户指定的线程数
@@ -192,7 +212,7 @@ class TaskConfig(Base):
 
 
     # 获取接口配置信息包
-    def get_platform_configuration(self,platform_type):
+    def get_platform_configuration(self,platform_type,api_key = None):
 
         if platform_type == "translationReq":
             target_platform = self.api_settings["translate"]
@@ -201,10 +221,14 @@ class TaskConfig(Base):
         elif platform_type == "formatReq":
             target_platform = self.api_settings["format"]
 
-        api_url = self.base_url
-        api_key = self.get_next_apikey()
+        # 未指定密钥时轮询获取
+        api_key = api_key or self.get_next_apikey()
+
+        return self.build_platform_configuration(target_platform, self.base_url, api_key, self.model)
+
+    # 根据平台名称、接口地址、密钥与模型生成接口配置信息包
+    def build_platform_configuration(self, target_platform: str, api_url: str, api_key: str, model_name: str) -> dict:
         api_format = self.platforms.get(target_platform).get("api_format")
-        model_name = self.model
         region = self.platforms.get(target_platform).get("region",'')
         access_key = self.platforms.get(target_platform).get("access_key",'')
         secret_key = self.platforms.get(target_platform).get("secret_key",'')
@@ -235,7 +259,15 @@ class TaskConfig(Base):
             "extra_body": extra_body,
             "think_switch": think_switch,
             "think_depth": think_depth,
-            "thinking_budget": thinking_budget
+            "thinking_budget": thinking_budget,
+            "response_cache_mode": getattr(self, "response_cache_mode", "off"),
+            "response_cache_path": getattr(self, "response_cache_path", ""),
+            "response_cache_ttl": getattr(self, "response_cache_ttl", 0),
+            "response_cache_max_size": getattr(self, "response_cache_max_size", 512),
+            "stream_switch": getattr(self, "response_stream_switch", False),
+            "stream_length_ratio": getattr(self, "stream_length_ratio", 5.0),
+            "stream_repeat_chars": getattr(self, "stream_repeat_chars", 200),
+            "prompt_cache_switch": getattr(self, "prompt_cache_switch", False),
         }
 
 
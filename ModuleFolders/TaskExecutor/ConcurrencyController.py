@@ -0,0 +1,169 @@
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from ModuleFolders.RequestLimiter.KeyPool import KeyPool
+
+
+class ConcurrencyController:
+    """AIMD 并发控制器
+
+    请求成功且延迟平稳时每轮窗口加性增加一个并发，接口过载（429、5xx、超时）或延迟明显攀升时乘性减少并发，
+    配额已经成为瓶颈（限制器中有请求在排队）时不再增加并发
+    """
+
+    WINDOW_SIZE = 20  # 统计延迟中位数的滑动窗口大小
+    BASELINE_WINDOWS = 5  # 延迟基线取最近若干个窗口中位数的最小值
+    LATENCY_TOLERANCE = 2.0  # 延迟中位数超过基线的倍数时视为延迟攀升
+    FAILURE_DECREASE_FACTOR = 0.5  # 请求失败时的并发缩减系数
+    LATENCY_DECREASE_FACTOR = 0.8  # 延迟攀升时的并发缩减系数
+    MIN_COOLDOWN = 1.0  # 两次缩减之间的最短间隔（秒）
+
+    def __init__(self, initial_limit: int, min_limit: int = 1, max_limit: int = 100, adaptive: bool = True, saturated: Callable[[], bool] = None) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit, initial_limit) if adaptive else max(1, initial_limit)
+        self.limit = float(max(self.min_limit, min(self.max_limit, initial_limit)))
+        self.adaptive = adaptive
+        self.saturated = saturated
+
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+        # 延迟统计
+        self.latencies = deque(maxlen = self.WINDOW_SIZE)
+        self.window_samples = 0  # 当前窗口已收集的样本数，窗口互不重叠
+        self.window_medians = deque(maxlen = self.BASELINE_WINDOWS)
+        self.baseline_latency = None
+        self.latency_backoff = False  # 上一次缩减是否由延迟攀升触发
+        self.average_request_time = 0.0
+        self.last_decrease_time = 0.0
+
+        # 调整统计
+        self.increase_count = 0
+        self.decrease_count = 0
+
+    # 当前允许的并发数
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    # 等待空闲的并发槽位
+    def acquire(self, cancel: Callable[[], bool] = None) -> bool:
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                if cancel is not None and cancel():
+                    return False
+                self.condition.wait()
+            if cancel is not None and cancel():
+                return False
+            self.in_flight = self.in_flight + 1
+            return True
+
+    # 尝试立即占用并发槽位，供异步调度使用
+    def try_acquire(self) -> bool:
+        with self.condition:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight = self.in_flight + 1
+            return True
+
+    # 归还并发槽位，并根据请求结果调整并发数
+    # request_time 为 None 时（如命中回复缓存）不计入延迟统计
+    def release(self, request_time: float = None, completion_tokens: int = 0, request_failed: bool = False, request_error: Exception = None) -> None:
+        with self.condition:
+            self.in_flight = self.in_flight - 1
+            if self.adaptive:
+                if request_failed:
+                    # 只有接口过载才缩减并发，请求参数错误、内容审查等失败与并发无关
+                    if self.is_overload_error(request_error):
+                        self.latency_backoff = False
+                        self.decrease(self.FAILURE_DECREASE_FACTOR)
+                elif request_time is not None:
+                    self.on_success(request_time, completion_tokens)
+            self.condition.notify_all()
+
+    # 唤醒全部等待中的任务，使其重新检查取消条件
+    def wake_all(self) -> None:
+        with self.condition:
+            self.condition.notify_all()
+
+    # 判断请求错误是否表示接口过载：429、5xx 或超时、连接失败
+    @classmethod
+    def is_overload_error(cls, error: Exception) -> bool:
+        if error is None:
+            return False
+
+        status_code = KeyPool.get_status_code(error)
+        if status_code is not None:
+            return status_code == 429 or status_code >= 500
+
+        # 没有状态码时按异常类型判断，各 SDK 的超时与连接异常名称中都带有 Timeout 或 Connection
+        return isinstance(error, (TimeoutError, ConnectionError)) or any(
+            "Timeout" in klass.__name__ or "Connection" in klass.__name__ for klass in type(error).__mro__
+        )
+
+    def on_success(self, request_time: float, completion_tokens: int) -> None:
+        self.average_request_time = request_time if self.average_request_time == 0 else self.average_request_time * 0.9 + request_time * 0.1
+
+        # 按补全 Tokens 归一化，避免片段长短不同造成的延迟差异被误判为拥塞
+        latency = request_time / completion_tokens if completion_tokens > 0 else request_time
+        self.latencies.append(latency)
+        self.window_samples = self.window_samples + 1
+
+        # 每收集满一个窗口评估一次延迟
+        if self.window_samples >= self.WINDOW_SIZE:
+            self.window_samples = 0
+            p50 = statistics.median(self.latencies)
+
+            if self.baseline_latency is not None and p50 > self.baseline_latency * self.LATENCY_TOLERANCE:
+                # 因延迟缩减并发后延迟仍未回落，说明是接口本身变慢而不是并发过高，以当前延迟重新建立基线
+                if self.latency_backoff:
+                    self.window_medians.clear()
+                    self.latency_backoff = False
+                elif self.decrease(self.LATENCY_DECREASE_FACTOR):
+                    self.latency_backoff = True
+                    return
+            else:
+                self.latency_backoff = False
+
+            # 基线取最近几个窗口中位数的最小值，旧的低延迟样本会随窗口滚动淘汰
+            self.window_medians.append(p50)
+            self.baseline_latency = min(self.window_medians)
+
+        # 配额已成为瓶颈时，增加并发只会让更多请求排队
+        if self.saturated is not None and self.saturated():
+            return
+
+        # 加性增加，每完成约一个并发窗口的请求增加一个并发
+        if self.limit < self.max_limit:
+            previous_limit = int(self.limit)
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            if int(self.limit) > previous_limit:
+                self.increase_count = self.increase_count + 1
+
+    # 乘性减少并发，处于冷却时间内时不缩减并返回 False
+    def decrease(self, factor: float) -> bool:
+        # 同一批在途请求的失败只缩减一次，冷却时间约为一次请求的耗时
+        now = time.time()
+        cooldown = max(self.MIN_COOLDOWN, self.average_request_time)
+        if now - self.last_decrease_time < cooldown:
+            return False
+
+        self.last_decrease_time = now
+        self.limit = max(float(self.min_limit), self.limit * factor)
+        self.latencies.clear()
+        self.window_samples = 0
+        self.decrease_count = self.decrease_count + 1
+        return True
+
+    # 获取并发统计
+    def get_stats(self) -> dict:
+        with self.condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "increase_count": self.increase_count,
+                "decrease_count": self.decrease_count,
+            }
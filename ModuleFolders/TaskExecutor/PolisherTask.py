@@ -15,18 +15,19 @@ from ModuleFolders.LLMRequester.LLMRequester import LLMRequester
 from ModuleFolders.PromptBuilder.PromptBuilderPolishing import PromptBuilderPolishing
 from ModuleFolders.ResponseExtractor.ResponseExtractor import ResponseExtractor
 from ModuleFolders.ResponseChecker.ResponseChecker import ResponseChecker
-from ModuleFolders.RequestLimiter.RequestLimiter import RequestLimiter
+from ModuleFolders.RequestLimiter.KeyPool import KeyPool
 
 from ModuleFolders.TextProcessor.PolishTextProcessor import PolishTextProcessor
 
 class PolisherTask(Base):
 
-    def __init__(self, config: TaskConfig, plugin_manager: PluginManager, request_limiter: RequestLimiter) -> None:
+    def __init__(self, config: TaskConfig, plugin_manager: PluginManager, request_limiter: KeyPool) -> None:
         super().__init__()
 
         self.config = config
         self.plugin_manager = plugin_manager
         self.request_limiter = request_limiter
+        self.active_key = None # 分配到的密钥
         self.text_processor = PolishTextProcessor(self.config) # 文本处理器
 
         # 提示词与信息内容存储
@@ -89,45 +90,96 @@ class PolisherTask(Base):
     def start(self) -> dict:
         return self.unit_translation_task()
 
+    # 异步启动任务
+    async def start_async(self) -> dict:
+        return await self.unit_translation_task_async()
+
     # 单请求翻译任务
     def unit_translation_task(self) -> dict:
         # 任务开始的时间
         task_start_time = time.time()
 
-        while True:
-            # 检测是否收到停止翻译事件
-            if Base.work_status == Base.STATUS.STOPING:
-                return {}
+        # 等待 RPM 和 TPM 配额并分配密钥，超时或收到停止翻译事件时直接跳过当前任务
+        self.active_key = self.request_limiter.acquire(
+            self.request_tokens_consume,
+            timeout = self.config.request_timeout,
+            cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+        )
+        if self.active_key is None:
+            return {}
+
+        # 获取接口配置信息包
+        platform_config = self.config.get_platform_configuration("polishingReq", self.active_key)
+
+        # 流式请求时用于提前检查回复
+        platform_config["source_text_dict"] = self.source_text_dict
+
+        # 发起请求
+        request_start_time = time.time()
+        requester = LLMRequester()
+        skip, response_think, response_content, prompt_tokens, completion_tokens = requester.sent_request(
+            self.messages,
+            self.system_prompt,
+            platform_config,
+            defer_cache = True,
+        )
+
+        # 记录密钥的请求结果
+        self.request_limiter.report(self.active_key, not skip, platform_config.get("request_error"))
 
-            # 检查是否超时，超时则直接跳过当前任务，以避免死循环
-            if time.time() - task_start_time >= self.config.request_timeout:
-                return {}
+        return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
 
-            # 检查 RPM 和 TPM 限制，如果符合条件，则继续
-            if self.request_limiter.check_limiter(self.request_tokens_consume):
-                break
+    # 单请求润色任务的异步版本，等待配额与请求时不占用线程
+    async def unit_translation_task_async(self) -> dict:
+        # 任务开始的时间
+        task_start_time = time.time()
 
-            # 如果以上条件都不符合，则间隔 1 秒再次检查
-            time.sleep(1)
+        # 等待 RPM 和 TPM 配额并分配密钥，超时或收到停止翻译事件时直接跳过当前任务
+        self.active_key = await self.request_limiter.acquire_async(
+            self.request_tokens_consume,
+            timeout = self.config.request_timeout,
+            cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+        )
+        if self.active_key is None:
+            return {}
 
         # 获取接口配置信息包
-        platform_config = self.config.get_platform_configuration("polishingReq")
+        platform_config = self.config.get_platform_configuration("polishingReq", self.active_key)
+
+        # 流式请求时用于提前检查回复
+        platform_config["source_text_dict"] = self.source_text_dict
 
         # 发起请求
+        request_start_time = time.time()
         requester = LLMRequester()
-        skip, response_think, response_content, prompt_tokens, completion_tokens = requester.sent_request(
+        skip, response_think, response_content, prompt_tokens, completion_tokens = await requester.sent_request_async(
             self.messages,
             self.system_prompt,
-            platform_config
+            platform_config,
+            defer_cache = True,
         )
 
+        # 记录密钥的请求结果
+        self.request_limiter.report(self.active_key, not skip, platform_config.get("request_error"))
+
+        return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
+
+    # 处理请求结果
+    def handle_response(self, task_start_time: float, request_start_time: float, skip: bool, response_think: str, response_content: str, prompt_tokens: int, completion_tokens: int, platform_config: dict) -> dict:
+        # 命中回复缓存时没有真实的请求耗时，不计入并发控制的延迟统计
+        request_time = None if platform_config.get("response_cache_hit") else time.time() - request_start_time
+
         # 如果请求结果标记为 skip，即有运行错误发生，则直接返回错误信息，停止后续任务
         if skip == True:
+            # 请求未被正常处理，归还预扣的令牌
+            self.request_limiter.release(self.active_key, self.request_tokens_consume)
             return {
                 "check_result": False,
                 "row_count": 0,
                 "prompt_tokens": self.request_tokens_consume,
                 "completion_tokens": 0,
+                "request_failed": True,
+                "request_error": platform_config.get("request_error"),
             }
 
         # 根据润色模式调整文本对象
@@ -150,6 +202,9 @@ class PolisherTask(Base):
             text_dict
         )
 
+        # 只有通过检查的回复写入回复缓存，未通过检查的缓存回复从缓存中删除，避免重试时再次得到同样的回复
+        LLMRequester().settle_cached_response(platform_config, check_result)
+
         # 去除回复内容的数字序号
         response_dict = ResponseExtractor.remove_numbered_prefix(self, response_dict)
 
@@ -215,6 +270,8 @@ class PolisherTask(Base):
                 "row_count": 0,
                 "prompt_tokens": self.request_tokens_consume,
                 "completion_tokens": 0,
+                "request_time": request_time,
+                "response_tokens": completion_tokens,
             }
         else:
             return {
@@ -222,6 +279,9 @@ class PolisherTask(Base):
                 "row_count": self.row_count,
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
+                "items": self.items,
+                "request_time": request_time,
+                "response_tokens": completion_tokens,
             }
 
 
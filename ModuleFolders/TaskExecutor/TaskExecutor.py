@@ -1,9 +1,10 @@
 import time
+import asyncio
 import threading
 import concurrent.futures
+from typing import Callable, Iterable
 
 import opencc
-from tqdm import tqdm
 
 from Base.Base import Base
 from ModuleFolders.Cache.CacheItem import TranslationStatus
@@ -18,8 +19,16 @@ from ModuleFolders.PromptBuilder.PromptBuilderPolishing import PromptBuilderPoli
 from ModuleFolders.PromptBuilder.PromptBuilderEnum import PromptBuilderEnum
 from ModuleFolders.PromptBuilder.PromptBuilderLocal import PromptBuilderLocal
 from ModuleFolders.PromptBuilder.PromptBuilderSakura import PromptBuilderSakura
-from ModuleFolders.RequestLimiter.RequestLimiter import RequestLimiter
+from ModuleFolders.RequestLimiter.KeyPool import KeyPool
+from ModuleFolders.ProviderPool.ProviderPool import ProviderPool
+from ModuleFolders.LLMRequester.LLMClientFactory import LLMClientFactory
+from ModuleFolders.TaskExecutor.ConcurrencyController import ConcurrencyController
+from ModuleFolders.TaskExecutor.TaskPipeline import TaskPipeline
+from ModuleFolders.TaskExecutor.WorkQueue import WorkQueue, WorkUnit
 from ModuleFolders.TaskExecutor.TranslatorUtil import get_source_language_for_file
+from ModuleFolders.TextProcessor.TextProcessor import TextProcessor
+from ModuleFolders.TokenCounter.TokenCounter import TokenCounter
+from ModuleFolders.Tracer.Tracer import Tracer
 
 
 # 翻译器
@@ -34,7 +43,11 @@ class TaskExecutor(Base):
         self.file_reader = file_reader
         self.file_writer = file_writer
         self.config = TaskConfig()
-        self.request_limiter = RequestLimiter()
+        self.request_limiter = KeyPool()
+        self.concurrency_controller = ConcurrencyController(1)
+        self.work_queue = None
+        self.provider_pool = None
+        self.tracer = Tracer.get_instance()
 
         # 注册事件
         self.subscribe(Base.EVENT.TASK_STOP, self.task_stop)
@@ -45,6 +58,9 @@ class TaskExecutor(Base):
     # 应用关闭事件
     def app_shut_down(self, event: int, data: dict) -> None:
         Base.work_status = Base.STATUS.STOPING
+        self.request_limiter.wake_all()
+        self.concurrency_controller.wake_all()
+        self.tracer.close()
 
     # 手动导出事件
     def task_manual_export(self, event: int, data: dict) -> None:
@@ -104,6 +120,10 @@ class TaskExecutor(Base):
         # 设置运行状态为停止中
         Base.work_status = Base.STATUS.STOPING
 
+        # 唤醒等待配额与并发槽位的任务，使其尽快退出
+        self.request_limiter.wake_all()
+        self.concurrency_controller.wake_all()
+
         def target() -> None:
             while True:
                 time.sleep(0.5)
@@ -143,6 +163,190 @@ class TaskExecutor(Base):
             self.print("")
             return None
 
+    # 输出请求限制器的排队统计
+    def print_limiter_stats(self) -> None:
+        stats = self.request_limiter.get_stats()
+        concurrency_stats = self.concurrency_controller.get_stats()
+        self.print("")
+        self.info(
+            f"请求限制器统计 - 已放行 {stats["acquired_count"]} 次，超时或取消 {stats["rejected_count"]} 次，"
+            + f"平均等待 {stats["avg_wait_time"]:.2f} 秒，最长等待 {stats["max_wait_time"]:.2f} 秒"
+        )
+        if self.concurrency_controller.adaptive:
+            self.info(
+                f"并发控制器统计 - 当前并发 {concurrency_stats["limit"]}，"
+                + f"增加 {concurrency_stats["increase_count"]} 次，缩减 {concurrency_stats["decrease_count"]} 次"
+            )
+        if getattr(self.config, "prompt_cache_switch", False):
+            self.info(f"提示词缓存统计 - 累计命中 {self.project_status_data.cached_tokens} Tokens")
+        for key_stats in self.get_key_stats():
+            self.info(
+                f"密钥统计 - {key_stats["key"]} 请求 {key_stats["request_count"]} 次，"
+                + f"成功 {key_stats["success_count"]} 次，失败 {key_stats["failure_count"]} 次"
+            )
+        if self.provider_pool is not None:
+            for provider_stats in self.provider_pool.get_stats():
+                self.info(
+                    f"接口池统计 - {provider_stats["name"]} 放行 {provider_stats["acquired_count"]} 次，"
+                    + f"成功 {provider_stats["success_count"]} 次，失败 {provider_stats["failure_count"]} 次，"
+                    + f"近期错误率 {provider_stats["error_rate"]:.0%}"
+                )
+        self.print("")
+
+    # 获取各密钥的统计，开启多接口池时为池中全部接口的密钥
+    def get_key_stats(self) -> list[dict]:
+        if self.provider_pool is None:
+            return self.request_limiter.get_key_stats()
+
+        return [
+            dict(key_stats, key = f"{provider.name} {key_stats["key"]}")
+            for provider in self.provider_pool.providers
+            for key_stats in provider.key_pool.get_key_stats()
+        ]
+
+    # 获取当前平台的 Tokens 计数服务，可为平台指定本地模型的 tokenizer.json
+    def get_token_counter(self) -> TokenCounter:
+        tokenizer_files = getattr(self.config, "tokenizer_files", {}) or {}
+        return TokenCounter.get_for_platform(self.config.target_platform, tokenizer_files.get(self.config.target_platform, ""))
+
+    # 创建并发控制器
+    def create_concurrency_controller(self) -> ConcurrencyController:
+        # 用户指定了线程数或使用本地接口时，保持固定并发
+        adaptive = (
+            getattr(self.config, "adaptive_concurrency_switch", True)
+            and self.config.user_thread_counts == 0
+            and self.config.target_platform not in ("sakura", "LocalLLM")
+        )
+
+        return ConcurrencyController(
+            self.config.actual_thread_counts,
+            max_limit = getattr(self.config, "adaptive_max_thread_counts", 100),
+            adaptive = adaptive,
+            saturated = self.is_saturated,
+        )
+
+    # 是否有请求正在等待配额
+    def is_saturated(self) -> bool:
+        if self.provider_pool is not None:
+            return self.provider_pool.is_saturated()
+        return self.request_limiter.get_stats()["queue_depth"] > 0
+
+    # 执行任务，异步模式下由事件循环驱动，否则构建线程池
+    def run_tasks(self, task_factory: Iterable, on_close: Callable[[], None] = None) -> None:
+        # 后台按需准备任务，只预先准备约为并发上限若干倍的任务
+        prefetch = getattr(self.config, "task_prefetch_factor", 2) * self.concurrency_controller.max_limit
+        pipeline = TaskPipeline(task_factory, prefetch)
+        pipeline.start()
+
+        try:
+            if getattr(self.config, "async_request_switch", False):
+                asyncio.run(self.run_tasks_async(pipeline))
+            else:
+                self.run_tasks_threaded(pipeline)
+        finally:
+            # 先唤醒任务来源中可能的等待，再停止准备线程
+            if on_close is not None:
+                on_close()
+            pipeline.close()
+
+    # 在线程池中执行任务
+    def run_tasks_threaded(self, pipeline: TaskPipeline) -> None:
+        stopping = lambda: Base.work_status == Base.STATUS.STOPING
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = self.concurrency_controller.max_limit, thread_name_prefix = "translator") as executor:
+            while True:
+                # 获取下一个已准备的任务，收到停止事件时不再提交剩余任务
+                task = pipeline.get(cancel = stopping)
+                if task is None:
+                    break
+
+                # 等待并发控制器放行
+                if not self.concurrency_controller.acquire(cancel = stopping):
+                    break
+                future = executor.submit(self.run_task, task)
+                future.add_done_callback(self.task_done_callback)  # 为future对象添加一个回调函数，当任务完成时会被调用，更新数据
+
+    # 在事件循环中执行任务，在途请求不再各占一个线程
+    async def run_tasks_async(self, pipeline: TaskPipeline) -> None:
+        stopping = lambda: Base.work_status == Base.STATUS.STOPING
+        slot_released = asyncio.Event()
+        running = set()
+
+        try:
+            while True:
+                # 获取下一个已准备的任务，收到停止事件时不再提交剩余任务
+                task = await asyncio.to_thread(pipeline.get, stopping)
+                if task is None:
+                    break
+
+                # 等待并发控制器放行，定期醒来检查停止事件
+                while not stopping():
+                    slot_released.clear()
+                    if self.concurrency_controller.try_acquire():
+                        break
+                    try:
+                        await asyncio.wait_for(slot_released.wait(), timeout = 1.0)
+                    except asyncio.TimeoutError:
+                        pass
+                if stopping():
+                    break
+
+                future = asyncio.create_task(self.run_task_async(task, slot_released))
+                future.add_done_callback(self.task_done_callback)
+                running.add(future)
+                future.add_done_callback(running.discard)
+
+            if running:
+                await asyncio.gather(*running, return_exceptions = True)
+        finally:
+            # 异步连接池与当前事件循环绑定，结束前关闭
+            await LLMClientFactory().aclose_async_clients()
+
+    # 异步执行任务，并把请求结果反馈给并发控制器
+    async def run_task_async(self, task, slot_released: asyncio.Event) -> dict:
+        result = {}
+        try:
+            result = await task.start_async()
+        finally:
+            result = result or {}
+            self.concurrency_controller.release(
+                request_time = result.get("request_time"),
+                completion_tokens = result.get("response_tokens", 0),
+                request_failed = result.get("request_failed", False),
+                request_error = result.get("request_error"),
+            )
+            self.finish_work_unit(task, result)
+            slot_released.set()
+        return result
+
+    # 执行任务，并把请求结果反馈给并发控制器
+    def run_task(self, task) -> dict:
+        result = {}
+        try:
+            result = task.start()
+        finally:
+            result = result or {}
+            self.concurrency_controller.release(
+                request_time = result.get("request_time"),
+                completion_tokens = result.get("response_tokens", 0),
+                request_failed = result.get("request_failed", False),
+                request_error = result.get("request_error"),
+            )
+            self.finish_work_unit(task, result)
+        return result
+
+    # 片段执行完毕后，将仍未翻译的条目交回任务队列重试
+    def finish_work_unit(self, task, result: dict) -> None:
+        unit = getattr(task, "work_unit", None)
+        if self.work_queue is None or unit is None:
+            return
+
+        failed_items = [item for item in unit.items if item.translation_status == TranslationStatus.UNTRANSLATED]
+
+        # 请求失败或未发出请求时没有检查译文，无需拆分片段
+        split = bool(result) and not result.get("request_failed", False)
+        self.work_queue.task_done(unit, failed_items, split)
+
     # 翻译主流程
     def translation_start_target(self, continue_status: bool) -> None:
 
@@ -155,8 +359,27 @@ class TaskExecutor(Base):
         # 配置翻译平台信息
         self.config.prepare_for_translation(TaskType.TRANSLATION)
 
-        # 配置请求限制器
-        self.request_limiter.set_limit(self.config.tpm_limit, self.config.rpm_limit)
+        # 配置请求限制器，每个密钥单独限额
+        self.token_counter = self.get_token_counter()
+        self.request_limiter.set_token_counter(self.token_counter)
+        self.request_limiter.set_limit(self.config.apikey_list, self.config.key_tpm_limit, self.config.key_rpm_limit)
+
+        # 配置多接口池，线程数按全部接口的限额之和计算
+        self.provider_pool = ProviderPool.from_config(self.config, self.token_counter)
+        if self.provider_pool is not None:
+            self.config.actual_thread_counts = self.config.thread_counts_setting(
+                self.config.user_thread_counts,
+                self.config.target_platform,
+                self.provider_pool.total_rpm_limit(),
+            )
+
+        # 配置并发控制器
+        self.concurrency_controller = self.create_concurrency_controller()
+
+        # 配置阶段追踪
+        self.tracer = Tracer.from_config(self.config)
+        if self.tracer.enabled:
+            self.info(f"阶段追踪 - 追踪记录将写入 {self.tracer.path}")
 
         # 初开始翻译时，生成监控数据
         if continue_status == False:
@@ -175,106 +398,36 @@ class TaskExecutor(Base):
         self.plugin_manager.broadcast_event("text_filter", self.config, self.cache_manager.project)
         self.plugin_manager.broadcast_event("preproces_text", self.config, self.cache_manager.project)
 
-        # 根据最大轮次循环
-        for current_round in range(self.config.round_limit + 1):
-            # 检测是否需要停止任务
-            if Base.work_status == Base.STATUS.STOPING:
-                # 循环次数比实际最大轮次要多一轮，当触发停止翻译的事件时，最后都会从这里退出任务
-                # 执行到这里说明停止任意的任务已经执行完毕，可以重置内部状态了
-                Base.work_status = Base.STATUS.TASKSTOPPED
-                return None
-
-            # 获取 待翻译 状态的条目数量
-            item_count_status_untranslated = self.cache_manager.get_item_count_by_status(TranslationStatus.UNTRANSLATED)
-
-            # 判断是否需要继续翻译
-            if item_count_status_untranslated == 0:
-                self.print("")
-                self.info("所有文本均已翻译，翻译任务已结束 ...")
-                self.print("")
-                break
-
-            # 达到最大翻译轮次时
-            if item_count_status_untranslated > 0 and current_round == self.config.round_limit:
-                self.print("")
-                self.warning("已达到最大翻译轮次，仍有部分文本未翻译，请检查结果 ...")
-                self.print("")
-                break
-
-            # 第一轮时且不是继续翻译时，记录总行数
-            if current_round == 0 and continue_status == False:
-                self.project_status_data.total_line = item_count_status_untranslated
+        # 插件可能批量修改了条目状态，下次保存时写入完整快照
+        self.cache_manager.require_save_to_file(self.config.label_output_path)
 
-            # 第二轮开始对半切分
-            if current_round > 0:
-                self.config.lines_limit = max(1, int(self.config.lines_limit / 2))
-                self.config.tokens_limit = max(1, int(self.config.tokens_limit / 2))
+        # 获取 待翻译 状态的条目数量
+        item_count_status_untranslated = self.cache_manager.get_item_count_by_status(TranslationStatus.UNTRANSLATED)
 
-            # 生成缓存数据条目片段的合集列表，原文列表与上文列表一一对应
-            chunks, previous_chunks, file_paths = self.cache_manager.generate_item_chunks(
-                "line" if self.config.tokens_limit_switch == False else "token",
-                self.config.lines_limit if self.config.tokens_limit_switch == False else self.config.tokens_limit,
-                self.config.pre_line_counts,
-                TaskType.TRANSLATION
-            )
+        # 不是继续翻译时，记录总行数
+        if continue_status == False:
+            self.project_status_data.total_line = item_count_status_untranslated
 
-            # 生成翻译任务合集列表
-            tasks_list = []
-            print("")
-            self.info(f"正在生成翻译任务 ...")
-            for chunk, previous_chunk, file_path in tqdm(zip(chunks, previous_chunks, file_paths),desc="生成翻译任务", total=len(chunks)):
-                # 确定该任务的主语言
-                language_stats = self.cache_manager.project.get_file(file_path).language_stats # 获取该文件的语言检测数据
-                file_source_lang = get_source_language_for_file(self.config.source_language,self.config.target_language,language_stats)
+        # 存在待翻译条目时，执行翻译任务
+        if item_count_status_untranslated > 0:
+            self.run_translation_queue()
 
-                task = TranslatorTask(self.config, self.plugin_manager, self.request_limiter, file_source_lang)  # 实例化
-                task.set_items(chunk)  # 传入该任务待翻译原文
-                task.set_previous_items(previous_chunk)  # 传入该任务待翻译原文的上文
-                task.prepare(self.config.target_platform)  # 预先构建消息列表
-                tasks_list.append(task)
-            self.info(f"已经生成全部翻译任务 ...")
-            self.print("")
+        # 检测是否需要停止任务
+        if Base.work_status == Base.STATUS.STOPING:
+            # 执行到这里说明停止任意的任务已经执行完毕，可以重置内部状态了
+            Base.work_status = Base.STATUS.TASKSTOPPED
+            return None
 
-            # 输出开始翻译的日志
+        # 判断是否全部翻译完成
+        if self.cache_manager.get_item_count_by_status(TranslationStatus.UNTRANSLATED) == 0:
             self.print("")
-            self.info(f"当前轮次 - {current_round + 1}")
-            self.info(f"最大轮次 - {self.config.round_limit}")
-            self.info(f"项目类型 - {self.config.translation_project}")
-            self.info(f"原文语言 - {self.config.source_language}")
-            self.info(f"译文语言 - {self.config.target_language}")
+            self.info("所有文本均已翻译，翻译任务已结束 ...")
             self.print("")
-            self.info(f"接口名称 - {self.config.platforms.get(self.config.target_platform, {}).get("name", "未知")}")
-            self.info(f"接口地址 - {self.config.base_url}")
-            self.info(f"模型名称 - {self.config.model}")
-            self.print("")
-            self.info(f"RPM 限额 - {self.config.rpm_limit}")
-            self.info(f"TPM 限额 - {self.config.tpm_limit}")
-
-            # 根据提示词规则打印基础指令
-            system = ""
-            s_lang = self.config.source_language
-            if self.config.target_platform == "LocalLLM":  # 需要放在前面，以免提示词预设的分支覆盖
-                system = PromptBuilderLocal.build_system(self.config, s_lang)
-            elif self.config.target_platform == "sakura":  # 需要放在前面，以免提示词预设的分支覆盖
-                system = PromptBuilderSakura.build_system(self.config, s_lang)
-            elif self.config.translation_prompt_selection["last_selected_id"] in (PromptBuilderEnum.COMMON, PromptBuilderEnum.COT, PromptBuilderEnum.THINK):
-                system = PromptBuilder.build_system(self.config, s_lang)
-            else:
-                system = self.config.translation_prompt_selection["prompt_content"]
+        else:
             self.print("")
-            if system:
-                self.info(f"本次任务使用以下基础提示词：\n{system}\n") 
-
-            self.info(f"即将开始执行翻译任务，预计任务总数为 {len(tasks_list)}, 同时执行的任务数量为 {self.config.actual_thread_counts}，请注意保持网络通畅 ...")
-            time.sleep(3)
+            self.warning("部分文本已达到最大尝试次数，仍未翻译，请检查结果 ...")
             self.print("")
 
-            # 开始执行翻译任务,构建异步线程池
-            with concurrent.futures.ThreadPoolExecutor(max_workers = self.config.actual_thread_counts, thread_name_prefix = "translator") as executor:
-                for task in tasks_list:
-                    future = executor.submit(task.start)
-                    future.add_done_callback(self.task_done_callback)  # 为future对象添加一个回调函数，当任务完成时会被调用，更新数据
-
         # 等待可能存在的缓存文件写入请求处理完毕
         time.sleep(CacheManager.SAVE_INTERVAL)
 
@@ -324,6 +477,109 @@ class TaskExecutor(Base):
         # 触发翻译完成事件
         self.emit(Base.EVENT.TASK_COMPLETED, {})
 
+    # 通过任务队列执行翻译，未通过检查的条目拆分后立即重试，直到队列为空
+    def run_translation_queue(self) -> None:
+        # 生成缓存数据条目片段的合集列表，原文列表与上文列表一一对应
+        chunks, previous_chunks, file_paths = self.cache_manager.generate_item_chunks(
+            "line" if self.config.tokens_limit_switch == False else "token",
+            self.config.lines_limit if self.config.tokens_limit_switch == False else self.config.tokens_limit,
+            self.config.pre_line_counts,
+            TaskType.TRANSLATION,
+            self.token_counter,
+            deduplicate = getattr(self.config, "source_dedup_switch", True),
+        )
+        duplicate_items = self.cache_manager.duplicate_items
+        if duplicate_items:
+            duplicate_count = sum(len(items) for items in duplicate_items.values())
+            self.info(f"原文去重 - {duplicate_count} 行重复原文将使用代表条目的译文回填")
+
+        # 每个条目最多尝试的次数沿用最大轮次设置
+        work_queue = WorkQueue(
+            self.config.round_limit,
+            lambda file_path, item: self.cache_manager.get_previous_items(file_path, item, self.config.pre_line_counts),
+        )
+        for chunk, previous_chunk, file_path in zip(chunks, previous_chunks, file_paths):
+            work_queue.put(WorkUnit(chunk, previous_chunk, file_path))
+
+        # 所有任务共享同一个文本处理器
+        text_processor = TextProcessor.get_instance(self.config)
+
+        # 按需从队列中取出片段生成翻译任务，由任务管道在执行前少量预先准备
+        stopping = lambda: Base.work_status == Base.STATUS.STOPING
+        def translation_tasks():
+            while True:
+                unit = work_queue.get(cancel = stopping)
+                if unit is None:
+                    return
+
+                # 确定该任务的主语言
+                language_stats = self.cache_manager.project.get_file(unit.file_path).language_stats # 获取该文件的语言检测数据
+                file_source_lang = get_source_language_for_file(self.config.source_language,self.config.target_language,language_stats)
+
+                task = TranslatorTask(self.config, self.plugin_manager, self.request_limiter, file_source_lang, text_processor, self.provider_pool, self.tracer)  # 实例化
+                task.work_unit = unit  # 执行完毕后据此重试未完成的条目
+                task.set_items(unit.items)  # 传入该任务待翻译原文
+                task.set_duplicate_items(duplicate_items)  # 传入原文重复的条目
+                task.set_previous_items(unit.previous_items)  # 传入该任务待翻译原文的上文
+                task.prepare(self.config.target_platform)  # 预先构建消息列表
+                yield task
+
+        # 输出开始翻译的日志
+        self.print("")
+        self.info(f"最大尝试次数 - {self.config.round_limit}")
+        self.info(f"项目类型 - {self.config.translation_project}")
+        self.info(f"原文语言 - {self.config.source_language}")
+        self.info(f"译文语言 - {self.config.target_language}")
+        self.print("")
+        self.info(f"接口名称 - {self.config.platforms.get(self.config.target_platform, {}).get("name", "未知")}")
+        self.info(f"接口地址 - {self.config.base_url}")
+        self.info(f"模型名称 - {self.config.model}")
+        self.print("")
+        self.info(f"RPM 限额 - {self.config.rpm_limit}")
+        self.info(f"TPM 限额 - {self.config.tpm_limit}")
+        if self.provider_pool is not None:
+            for provider in self.provider_pool.providers:
+                self.info(f"接口池 - {provider.name}，模型 {provider.model}，权重 {provider.weight}，RPM 限额 {provider.rpm_limit}")
+
+        # 根据提示词规则打印基础指令
+        system = ""
+        s_lang = self.config.source_language
+        if self.config.target_platform == "LocalLLM":  # 需要放在前面，以免提示词预设的分支覆盖
+            system = PromptBuilderLocal.build_system(self.config, s_lang)
+        elif self.config.target_platform == "sakura":  # 需要放在前面，以免提示词预设的分支覆盖
+            system = PromptBuilderSakura.build_system(self.config, s_lang)
+        elif self.config.translation_prompt_selection["last_selected_id"] in (PromptBuilderEnum.COMMON, PromptBuilderEnum.COT, PromptBuilderEnum.THINK):
+            system = PromptBuilder.build_system(self.config, s_lang)
+        else:
+            system = self.config.translation_prompt_selection["prompt_content"]
+        self.print("")
+        if system:
+            self.info(f"本次任务使用以下基础提示词：\n{system}\n") 
+
+        self.info(f"即将开始执行翻译任务，初始任务总数为 {len(chunks)}, 同时执行的任务数量为 {self.config.actual_thread_counts}，请注意保持网络通畅 ...")
+        self.print("")
+
+        # 开始执行翻译任务，队列中的片段全部完成后结束
+        self.work_queue = work_queue
+        try:
+            self.run_tasks(translation_tasks(), on_close = work_queue.close)
+        finally:
+            self.work_queue = None
+
+        # 代表条目达到尝试次数上限时，其重复条目也不会再被发送
+        for item in list(work_queue.exhausted_items):
+            work_queue.exhausted_items.extend(
+                duplicate for duplicate in duplicate_items.get(item.text_index, ())
+                if duplicate.translation_status == TranslationStatus.UNTRANSLATED
+            )
+
+        if work_queue.exhausted_items:
+            self.print("")
+            self.warning(f"共有 {len(work_queue.exhausted_items)} 行文本达到最大尝试次数仍未通过检查 ...")
+
+        # 输出请求限制器的排队统计
+        self.print_limiter_stats()
+
     # 润色主流程
     def polish_start_target(self, continue_status: bool) -> None:
 
@@ -336,8 +592,16 @@ class TaskExecutor(Base):
         # 配置翻译平台信息
         self.config.prepare_for_translation(TaskType.POLISH)
 
-        # 配置请求限制器
-        self.request_limiter.set_limit(self.config.tpm_limit, self.config.rpm_limit)
+        # 配置请求限制器，每个密钥单独限额
+        self.token_counter = self.get_token_counter()
+        self.request_limiter.set_token_counter(self.token_counter)
+        self.request_limiter.set_limit(self.config.apikey_list, self.config.key_tpm_limit, self.config.key_rpm_limit)
+
+        # 润色任务只使用当前接口
+        self.provider_pool = None
+
+        # 配置并发控制器
+        self.concurrency_controller = self.create_concurrency_controller()
 
         # 初开始任务时，生成监控数据
         if continue_status == False:
@@ -355,6 +619,8 @@ class TaskExecutor(Base):
         # 触发插件事件
         self.plugin_manager.broadcast_event("text_filter", self.config, self.cache_manager.project)
 
+        # 插件可能批量修改了条目状态，下次保存时写入完整快照
+        self.cache_manager.require_save_to_file(self.config.label_output_path)
 
         # 根据最大轮次循环
         for current_round in range(self.config.round_limit + 1):
@@ -400,28 +666,26 @@ class TaskExecutor(Base):
                     "line" if self.config.tokens_limit_switch == False else "token",
                     self.config.lines_limit if self.config.tokens_limit_switch == False else self.config.tokens_limit,
                     self.config.polishing_pre_line_counts,
-                    TaskType.TRANSLATION
+                    TaskType.TRANSLATION,
+                    self.token_counter,
                 )
             elif self.config.polishing_mode_selection == "translated_text_polish":
                 chunks, previous_chunks, file_paths = self.cache_manager.generate_item_chunks(
                     "line" if self.config.tokens_limit_switch == False else "token",
                     self.config.lines_limit if self.config.tokens_limit_switch == False else self.config.tokens_limit,
                     self.config.polishing_pre_line_counts,
-                    TaskType.POLISH
+                    TaskType.POLISH,
+                    self.token_counter,
                 )
 
-            # 生成润色任务合集列表
-            tasks_list = []
-            print("")
-            self.info(f"正在生成润色任务 ...")
-            for chunk, previous_chunk, file_path in tqdm(zip(chunks, previous_chunks, file_paths),desc="生成润色任务", total=len(chunks)):
-                task = PolisherTask(self.config, self.plugin_manager, self.request_limiter)  # 实例化
-                task.set_items(chunk)  # 传入该任务待润色文
-                task.set_previous_items(previous_chunk)  # 传入该任务待润色文的上文
-                task.prepare()  # 预先构建消息列表
-                tasks_list.append(task)
-            self.info(f"已经生成全部润色任务 ...")
-            self.print("")
+            # 按需生成润色任务，由任务管道在执行前少量预先准备
+            def polish_tasks(chunks = chunks, previous_chunks = previous_chunks):
+                for chunk, previous_chunk in zip(chunks, previous_chunks):
+                    task = PolisherTask(self.config, self.plugin_manager, self.request_limiter)  # 实例化
+                    task.set_items(chunk)  # 传入该任务待润色文
+                    task.set_previous_items(previous_chunk)  # 传入该任务待润色文的上文
+                    task.prepare()  # 预先构建消息列表
+                    yield task
 
             # 输出开始翻译的日志
             self.print("")
@@ -446,15 +710,14 @@ class TaskExecutor(Base):
             if system:
                 self.info(f"本次任务使用以下基础提示词：\n{system}\n") 
 
-            self.info(f"即将开始执行润色任务，预计任务总数为 {len(tasks_list)}, 同时执行的任务数量为 {self.config.actual_thread_counts}，请注意保持网络通畅 ...")
-            time.sleep(3)
+            self.info(f"即将开始执行润色任务，预计任务总数为 {len(chunks)}, 同时执行的任务数量为 {self.config.actual_thread_counts}，请注意保持网络通畅 ...")
             self.print("")
 
-            # 开始执行润色务,构建异步线程池
-            with concurrent.futures.ThreadPoolExecutor(max_workers = self.config.actual_thread_counts, thread_name_prefix = "translator") as executor:
-                for task in tasks_list:
-                    future = executor.submit(task.start)
-                    future.add_done_callback(self.task_done_callback)  # 为future对象添加一个回调函数，当任务完成时会被调用，更新数据
+            # 开始执行润色务
+            self.run_tasks(polish_tasks())
+
+            # 输出请求限制器的排队统计
+            self.print_limiter_stats()
 
         # 等待可能存在的缓存文件写入请求处理完毕
         time.sleep(CacheManager.SAVE_INTERVAL)
@@ -502,13 +765,19 @@ class TaskExecutor(Base):
                 self.project_status_data.total_requests += 1
                 self.project_status_data.error_requests += 0 if result.get("check_result") else 1
                 self.project_status_data.line += result.get("row_count", 0)
+                self.project_status_data.dedup_line += result.get("dedup_count", 0)
                 self.project_status_data.token += result.get("prompt_tokens", 0) + result.get("completion_tokens", 0)
                 self.project_status_data.total_completion_tokens += result.get("completion_tokens", 0)
+                self.project_status_data.cached_tokens += result.get("cached_tokens", 0)
                 self.project_status_data.time = time.time() - self.project_status_data.start_time
                 stats_dict = self.project_status_data.to_dict()
 
-            # 请求保存缓存文件
-            self.cache_manager.require_save_to_file(self.config.label_output_path)
+            # 各密钥的统计与执行中的任务数量，供监控页面显示
+            stats_dict["key_stats"] = self.get_key_stats()
+            stats_dict["active_tasks"] = self.concurrency_controller.get_stats()["in_flight"]
+
+            # 请求保存缓存文件，只记录本次任务更新的条目
+            self.cache_manager.require_save_to_file(self.config.label_output_path, result.get("items", []))
 
             # 触发翻译进度更新事件
             self.emit(Base.EVENT.TASK_UPDATE, stats_dict)
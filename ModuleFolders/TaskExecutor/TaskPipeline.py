@@ -0,0 +1,81 @@
+import queue
+import threading
+from typing import Any, Callable, Iterable
+
+
+class TaskPipeline:
+    """有界的任务准备管道
+
+    后台线程按需准备任务并放入有界队列，执行端从队列中取出任务，
+    使首个请求无需等待全部任务准备完毕，内存中也只保留少量已准备的任务
+    """
+
+    # 队列结束标记
+    END = object()
+
+    # 等待队列时检查取消条件的间隔（秒）
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, task_factory: Iterable, prefetch: int) -> None:
+        self.task_factory = task_factory
+        self.queue = queue.Queue(maxsize = max(1, prefetch))
+        self.stop_event = threading.Event()
+        self.exception = None
+        self.finished = False
+
+        self.thread = threading.Thread(target = self.produce, name = "task_preparer", daemon = True)
+
+    # 启动后台准备线程
+    def start(self) -> None:
+        self.thread.start()
+
+    # 后台准备任务
+    def produce(self) -> None:
+        try:
+            for task in self.task_factory:
+                if not self.put(task):
+                    return
+        except Exception as e:
+            # 准备任务时的异常交由执行端抛出
+            self.exception = e
+        self.put(self.END)
+
+    def put(self, item: Any) -> bool:
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout = self.POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # 获取下一个已准备的任务，全部取完或被取消时返回 None
+    def get(self, cancel: Callable[[], bool] = None) -> Any:
+        while not self.finished:
+            if cancel is not None and cancel():
+                return None
+
+            try:
+                item = self.queue.get(timeout = self.POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            if item is self.END:
+                self.finished = True
+                if self.exception is not None:
+                    raise self.exception
+                return None
+
+            return item
+
+        return None
+
+    # 停止准备并丢弃队列中剩余的任务
+    def close(self) -> None:
+        self.stop_event.set()
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.thread.join()
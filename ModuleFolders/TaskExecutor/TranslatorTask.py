@@ -1,7 +1,7 @@
-import copy
 import re
 import time
 import itertools
+from contextlib import contextmanager
 
 from rich import box
 from rich.table import Table
@@ -17,20 +17,36 @@ from ModuleFolders.PromptBuilder.PromptBuilderLocal import PromptBuilderLocal
 from ModuleFolders.PromptBuilder.PromptBuilderSakura import PromptBuilderSakura
 from ModuleFolders.ResponseExtractor.ResponseExtractor import ResponseExtractor
 from ModuleFolders.ResponseChecker.ResponseChecker import ResponseChecker
-from ModuleFolders.RequestLimiter.RequestLimiter import RequestLimiter
+from ModuleFolders.RequestLimiter.KeyPool import KeyPool
+from ModuleFolders.ProviderPool.ProviderPool import Provider, ProviderPool
+from ModuleFolders.Tracer.Tracer import Tracer
 
 from ModuleFolders.TextProcessor.TextProcessor import TextProcessor
 
 
 class TranslatorTask(Base):
 
-    def __init__(self, config: TaskConfig, plugin_manager: PluginManager, request_limiter: RequestLimiter, source_lang) -> None:
+    def __init__(self, config: TaskConfig, plugin_manager: PluginManager, request_limiter: KeyPool, source_lang, text_processor: TextProcessor = None, provider_pool: ProviderPool = None, tracer: Tracer = None) -> None:
         super().__init__()
 
         self.config = config
         self.plugin_manager = plugin_manager
         self.request_limiter = request_limiter
-        self.text_processor = TextProcessor(self.config) # 文本处理器
+        self.provider_pool = provider_pool # 多接口池，为 None 时只使用主接口
+
+        # 实际发出请求的接口所使用的密钥池、密钥与模型
+        self.active_limiter = request_limiter
+        self.active_key = None
+        self.platform = config.target_platform
+        self.model = config.model
+        self.cached_tokens = 0  # 命中提示词缓存的 Tokens 数量
+        self.request_error = None  # 接口池中最近一次请求的错误，所有接口都失败时用于判断是否缩减并发
+        self.text_processor = text_processor or TextProcessor.get_instance(self.config) # 文本处理器，只读，由所有任务共享
+
+        # 阶段追踪
+        self.tracer = tracer or Tracer.get_instance()
+        self.task_id = self.tracer.next_task_id()
+        self.items = []
 
         # 源语言对象
         self.source_lang = source_lang
@@ -48,12 +64,44 @@ class TranslatorTask(Base):
         self.placeholder_order = {}
         # 前后换行空格处理信息存储
         self.affix_whitespace_storage = {}
-
+        # 原文重复的条目，{代表条目的text_index: [重复条目]}
+        self.duplicate_items = {}
+
+
+    # 记录任务阶段的耗时，标签取阶段结束时的接口、模型与密钥
+    @contextmanager
+    def trace(self, stage: str):
+        if not self.tracer.enabled:
+            yield {}
+            return
+
+        with self.tracer.span(stage) as tags:
+            try:
+                yield tags
+            finally:
+                for name, value in self.get_trace_tags().items():
+                    tags.setdefault(name, value)
+
+    # 追踪记录的标签
+    def get_trace_tags(self) -> dict:
+        unit = getattr(self, "work_unit", None)
+        return {
+            "task": self.task_id,
+            "platform": self.platform,
+            "model": self.model,
+            "key": self.active_limiter.get_key_index(self.active_key) if self.active_key is not None else -1,
+            "chunk_size": len(self.items),
+            "attempt": unit.attempt + 1 if unit is not None else 1,
+        }
 
     # 设置缓存数据
     def set_items(self, items: list[CacheItem]) -> None:
         self.items = items
 
+    # 设置原文重复的条目，译文写入时一并回填
+    def set_duplicate_items(self, duplicate_items: dict[int, list[CacheItem]]) -> None:
+        self.duplicate_items = duplicate_items
+
     # 设置上文数据
     def set_previous_items(self, previous_items: list[CacheItem]) -> None:
         self.previous_items = previous_items
@@ -74,99 +122,351 @@ class TranslatorTask(Base):
         self.plugin_manager.broadcast_event("normalize_text", self.config, self.source_text_dict)
 
         # 各种替换步骤，译前替换，提取首尾与占位中间代码
-        self.source_text_dict, self.prefix_codes, self.suffix_codes, self.placeholder_order, self.affix_whitespace_storage = \
-            self.text_processor.replace_all(
-                self.config,
-                self.source_lang, 
-                self.source_text_dict
-            )
-        
+        with self.trace("replace"):
+            self.source_text_dict, self.prefix_codes, self.suffix_codes, self.placeholder_order, self.affix_whitespace_storage = \
+                self.text_processor.replace_all(
+                    self.config,
+                    self.source_lang, 
+                    self.source_text_dict
+                )
+
         # 生成请求指令
-        if target_platform == "sakura":
-            self.messages, self.system_prompt, self.extra_log = PromptBuilderSakura.generate_prompt_sakura(
-                self.config,
-                self.source_text_dict,
-                self.previous_text_list, 
-                self.source_lang, 
-            )
-        elif target_platform == "LocalLLM":
-            self.messages, self.system_prompt, self.extra_log = PromptBuilderLocal.generate_prompt_LocalLLM(
-                self.config,
-                self.source_text_dict,
-                self.previous_text_list,
-                self.source_lang,
-            )
-        else:
-            self.messages, self.system_prompt, self.extra_log = PromptBuilder.generate_prompt(
-                self.config,
-                self.source_text_dict,
-                self.previous_text_list,
-                self.source_lang,
-            )
+        self.build_prompt(target_platform)
+
+    # 根据目标平台生成请求指令并预估 Token 消费
+    def build_prompt(self, target_platform: str) -> None:
+        self.prompt_family = self.get_prompt_family(target_platform)
+
+        with self.trace("prompt"):
+            if target_platform == "sakura":
+                self.messages, self.system_prompt, self.extra_log = PromptBuilderSakura.generate_prompt_sakura(
+                    self.config,
+                    self.source_text_dict,
+                    self.previous_text_list, 
+                    self.source_lang, 
+                )
+            elif target_platform == "LocalLLM":
+                self.messages, self.system_prompt, self.extra_log = PromptBuilderLocal.generate_prompt_LocalLLM(
+                    self.config,
+                    self.source_text_dict,
+                    self.previous_text_list,
+                    self.source_lang,
+                )
+            else:
+                self.messages, self.system_prompt, self.extra_log = PromptBuilder.generate_prompt(
+                    self.config,
+                    self.source_text_dict,
+                    self.previous_text_list,
+                    self.source_lang,
+                )
 
         # 预估 Token 消费
-        self.request_tokens_consume = self.request_limiter.calculate_tokens(self.messages,self.system_prompt,)
+        with self.trace("token_estimate"):
+            self.request_tokens_consume = self.request_limiter.calculate_tokens(self.messages,self.system_prompt,)
+
+    # 获取平台使用的提示词类型，本地模型使用专用的提示词
+    @staticmethod
+    def get_prompt_family(target_platform: str) -> str:
+        return target_platform if target_platform in ("sakura", "LocalLLM") else ""
 
 
     # 启动任务
     def start(self) -> dict:
         return self.unit_translation_task()
 
+    # 异步启动任务
+    async def start_async(self) -> dict:
+        return await self.unit_translation_task_async()
+
 
     # 单请求翻译任务
     def unit_translation_task(self) -> dict:
         # 任务开始的时间
         task_start_time = time.time()
 
-        while True:
-            # 检测是否收到停止翻译事件
-            if Base.work_status == Base.STATUS.STOPING:
-                return {}
+        # 开启多接口池时由接口池选择接口
+        if self.provider_pool is not None:
+            return self.unit_translation_task_pool(task_start_time)
+
+        # 等待 RPM 和 TPM 配额并分配密钥，超时或收到停止翻译事件时直接跳过当前任务
+        with self.trace("limiter_wait") as tags:
+            self.active_key = self.request_limiter.acquire(
+                self.request_tokens_consume,
+                timeout = self.config.request_timeout,
+                cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+            )
+            if self.active_key is None:
+                tags["status"] = "timeout"
+        if self.active_key is None:
+            return {}
+
+        # 获取接口配置信息包
+        platform_config = self.config.get_platform_configuration("translationReq", self.active_key)
+
+        # 流式请求时用于提前检查回复
+        platform_config["source_text_dict"] = self.source_text_dict
+
+        # 发起请求
+        request_start_time = time.time()
+        requester = LLMRequester()
+        with self.trace("request") as tags:
+            skip, response_think, response_content, prompt_tokens, completion_tokens = requester.sent_request(
+                self.messages,
+                self.system_prompt,
+                platform_config,
+                defer_cache = True,
+            )
+            if skip:
+                tags["status"] = "error"
 
-            # 检查是否超时，超时则直接跳过当前任务，以避免死循环
-            if time.time() - task_start_time >= self.config.request_timeout:
-                return {}
+        # 命中提示词缓存的 Tokens 数量
+        self.cached_tokens = platform_config.get("cached_tokens", 0)
 
-            # 检查 RPM 和 TPM 限制，如果符合条件，则继续
-            if self.request_limiter.check_limiter(self.request_tokens_consume):
-                break
+        # 记录密钥的请求结果
+        self.request_limiter.report(self.active_key, not skip, platform_config.get("request_error"))
 
-            # 如果以上条件都不符合，则间隔 1 秒再次检查
-            time.sleep(1)
+        return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
+
+    # 单请求翻译任务的异步版本，等待配额与请求时不占用线程
+    async def unit_translation_task_async(self) -> dict:
+        # 任务开始的时间
+        task_start_time = time.time()
+
+        # 开启多接口池时由接口池选择接口
+        if self.provider_pool is not None:
+            return await self.unit_translation_task_pool_async(task_start_time)
+
+        # 等待 RPM 和 TPM 配额并分配密钥，超时或收到停止翻译事件时直接跳过当前任务
+        with self.trace("limiter_wait") as tags:
+            self.active_key = await self.request_limiter.acquire_async(
+                self.request_tokens_consume,
+                timeout = self.config.request_timeout,
+                cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+            )
+            if self.active_key is None:
+                tags["status"] = "timeout"
+        if self.active_key is None:
+            return {}
 
         # 获取接口配置信息包
-        platform_config = self.config.get_platform_configuration("translationReq")
+        platform_config = self.config.get_platform_configuration("translationReq", self.active_key)
+
+        # 流式请求时用于提前检查回复
+        platform_config["source_text_dict"] = self.source_text_dict
 
         # 发起请求
+        request_start_time = time.time()
         requester = LLMRequester()
-        skip, response_think, response_content, prompt_tokens, completion_tokens = requester.sent_request(
-            self.messages,
-            self.system_prompt,
-            platform_config
-        )
+        with self.trace("request") as tags:
+            skip, response_think, response_content, prompt_tokens, completion_tokens = await requester.sent_request_async(
+                self.messages,
+                self.system_prompt,
+                platform_config,
+                defer_cache = True,
+            )
+            if skip:
+                tags["status"] = "error"
+
+        # 命中提示词缓存的 Tokens 数量
+        self.cached_tokens = platform_config.get("cached_tokens", 0)
+
+        # 记录密钥的请求结果
+        self.request_limiter.report(self.active_key, not skip, platform_config.get("request_error"))
+
+        return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
+
+    # 通过接口池执行翻译任务，请求失败时切换到其他接口重试
+    def unit_translation_task_pool(self, task_start_time: float) -> dict:
+        exclude = set()
+        while True:
+            # 等待任一接口的 RPM 和 TPM 配额，超时或收到停止翻译事件时直接跳过当前任务
+            with self.trace("limiter_wait") as tags:
+                provider, key = self.provider_pool.acquire(
+                    self.request_tokens_consume,
+                    timeout = self.config.request_timeout,
+                    cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+                    exclude = exclude,
+                )
+                if provider is None:
+                    tags["status"] = "timeout"
+                else:
+                    tags["platform"], tags["model"] = provider.name, provider.model
+                    tags["key"] = provider.key_pool.get_key_index(key)
+            if provider is None:
+                return self.get_failover_result(exclude)
+
+            # 获取接口配置信息包
+            platform_config = self.use_provider(provider, key)
+
+            # 发起请求
+            request_start_time = time.time()
+            requester = LLMRequester()
+            with self.trace("request") as tags:
+                skip, response_think, response_content, prompt_tokens, completion_tokens = requester.sent_request(
+                    self.messages,
+                    self.system_prompt,
+                    platform_config,
+                    defer_cache = True,
+                )
+                if skip:
+                    tags["status"] = "error"
+
+            # 命中提示词缓存的 Tokens 数量
+            self.cached_tokens = platform_config.get("cached_tokens", 0)
+
+            self.request_error = platform_config.get("request_error")
+            self.provider_pool.report(provider, key, not skip, self.request_error)
+            if skip and self.failover(provider, key, exclude):
+                continue
+
+            return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
+
+    # 通过接口池执行翻译任务的异步版本
+    async def unit_translation_task_pool_async(self, task_start_time: float) -> dict:
+        exclude = set()
+        while True:
+            # 等待任一接口的 RPM 和 TPM 配额，超时或收到停止翻译事件时直接跳过当前任务
+            with self.trace("limiter_wait") as tags:
+                provider, key = await self.provider_pool.acquire_async(
+                    self.request_tokens_consume,
+                    timeout = self.config.request_timeout,
+                    cancel = lambda: Base.work_status == Base.STATUS.STOPING,
+                    exclude = exclude,
+                )
+                if provider is None:
+                    tags["status"] = "timeout"
+                else:
+                    tags["platform"], tags["model"] = provider.name, provider.model
+                    tags["key"] = provider.key_pool.get_key_index(key)
+            if provider is None:
+                return self.get_failover_result(exclude)
+
+            # 获取接口配置信息包
+            platform_config = self.use_provider(provider, key)
+
+            # 发起请求
+            request_start_time = time.time()
+            requester = LLMRequester()
+            with self.trace("request") as tags:
+                skip, response_think, response_content, prompt_tokens, completion_tokens = await requester.sent_request_async(
+                    self.messages,
+                    self.system_prompt,
+                    platform_config,
+                    defer_cache = True,
+                )
+                if skip:
+                    tags["status"] = "error"
+
+            # 命中提示词缓存的 Tokens 数量
+            self.cached_tokens = platform_config.get("cached_tokens", 0)
+
+            self.request_error = platform_config.get("request_error")
+            self.provider_pool.report(provider, key, not skip, self.request_error)
+            if skip and self.failover(provider, key, exclude):
+                continue
+
+            return self.handle_response(task_start_time, request_start_time, skip, response_think, response_content, prompt_tokens, completion_tokens, platform_config)
+
+    # 切换到接口池选出的接口与密钥，返回该接口的配置信息包
+    def use_provider(self, provider: Provider, key: str) -> dict:
+        self.active_limiter = provider.key_pool
+        self.active_key = key
+        self.platform = provider.name
+        self.model = provider.model
+
+        # 本地模型与在线模型使用的提示词不同，需要重新生成请求指令
+        if self.get_prompt_family(provider.name) != self.prompt_family:
+            self.build_prompt(provider.name)
+
+        platform_config = self.provider_pool.get_platform_configuration(self.config, provider, key)
+
+        # 流式请求时用于提前检查回复
+        platform_config["source_text_dict"] = self.source_text_dict
+
+        return platform_config
+
+    # 请求失败后排除当前接口，仍有其他接口可用时返回 True
+    def failover(self, provider: Provider, key: str, exclude: set) -> bool:
+        if Base.work_status == Base.STATUS.STOPING:
+            return False
+
+        exclude.add(provider.name)
+        if len(exclude) >= len(self.provider_pool.providers):
+            return False
+
+        # 请求未被正常处理，归还预扣的令牌
+        provider.key_pool.release(key, self.request_tokens_consume)
+        self.warning(f"接口池 - 接口 {provider.name} 请求失败，切换到其他接口重试 ...")
+        return True
+
+    # 接口池中没有可用接口时的任务结果
+    def get_failover_result(self, exclude: set) -> dict:
+        # 尚未发出请求时直接跳过当前任务
+        if not exclude:
+            return {}
+
+        return {
+            "check_result": False,
+            "row_count": 0,
+            "prompt_tokens": self.request_tokens_consume,
+            "completion_tokens": 0,
+            "request_failed": True,
+            "request_error": self.request_error,
+        }
+
+    # 处理请求结果
+    def handle_response(self, task_start_time: float, request_start_time: float, skip: bool, response_think: str, response_content: str, prompt_tokens: int, completion_tokens: int, platform_config: dict) -> dict:
+        # 命中回复缓存时没有真实的请求耗时，不计入并发控制的延迟统计
+        request_time = None if platform_config.get("response_cache_hit") else time.time() - request_start_time
 
         # 如果请求结果标记为 skip，即有运行错误发生，则直接返回错误信息，停止后续任务
         if skip == True:
+            # 请求未被正常处理，归还预扣的令牌
+            self.active_limiter.release(self.active_key, self.request_tokens_consume)
             return {
                 "check_result": False,
                 "row_count": 0,
                 "prompt_tokens": self.request_tokens_consume,
                 "completion_tokens": 0,
+                "request_failed": True,
+                "request_error": platform_config.get("request_error"),
             }
 
         # 提取回复内容
-        response_dict = ResponseExtractor.text_extraction(self, self.source_text_dict, response_content)
+        with self.trace("extract"):
+            response_dict = ResponseExtractor.text_extraction(self, self.source_text_dict, response_content)
 
         # 检查回复内容
-        check_result, error_content = ResponseChecker.check_response_content(
-            self,
-            self.config,
-            self.placeholder_order,
-            response_content,
-            response_dict,
-            self.source_text_dict,
-            self.source_lang
-        )
+        with self.trace("check") as tags:
+            check_result, error_content = ResponseChecker.check_response_content(
+                self,
+                self.config,
+                self.placeholder_order,
+                response_content,
+                response_dict,
+                self.source_text_dict,
+                self.source_lang
+            )
+            if not check_result:
+                tags["status"] = "failed"
+
+        # 只有完全通过检查的回复写入回复缓存，未通过检查的缓存回复从缓存中删除，避免重试时再次得到同样的回复
+        LLMRequester().settle_cached_response(platform_config, check_result)
+
+        # 未通过检查时逐行检查，保留通过检查的行，只有未通过的行在下一轮次中重新翻译
+        passed_keys = list(self.source_text_dict.keys()) if check_result else []
+        if check_result == False and getattr(self.config, "response_line_salvage_switch", True):
+            with self.trace("check_lines"):
+                line_errors = ResponseChecker.check_response_lines(
+                    self,
+                    self.config,
+                    self.placeholder_order,
+                    response_content,
+                    response_dict,
+                    self.source_text_dict,
+                    self.source_lang
+                )
+            passed_keys = [key for key in self.source_text_dict if key not in line_errors]
 
         # 去除回复内容的数字序号
         response_dict = ResponseExtractor.remove_numbered_prefix(self, response_dict)
@@ -179,7 +479,9 @@ class TranslatorTask(Base):
             self.extra_log.append("模型回复内容：\n" + response_content)
 
         # 检查译文
-        if check_result == False:
+        committed_items = []
+        filled_items = []
+        if len(passed_keys) == 0:
             error = f"译文文本未通过检查，将在下一轮次的翻译中重新翻译 - {error_content}"
 
             # 打印任务结果
@@ -197,23 +499,37 @@ class TranslatorTask(Base):
                 )
             )
         else:
-            # 各种翻译后处理
-            restore_response_dict = copy.copy(response_dict)
-            restore_response_dict = self.text_processor.restore_all(self.config, restore_response_dict, self.prefix_codes, self.suffix_codes, self.placeholder_order, self.affix_whitespace_storage)
-
-            # 更新译文结果到缓存数据中
-            for item, response in zip(self.items, restore_response_dict.values()):
-                with item.atomic_scope():
-                    item.model = self.config.model
-                    item.translated_text = response
-                    item.translation_status = TranslationStatus.TRANSLATED
-
+            # 各种翻译后处理，只处理通过检查的行
+            restore_response_dict = {key: response_dict[key] for key in passed_keys}
+            with self.trace("restore"):
+                restore_response_dict = self.text_processor.restore_all(self.config, restore_response_dict, self.prefix_codes, self.suffix_codes, self.placeholder_order, self.affix_whitespace_storage)
+
+            with self.trace("commit"):
+                # 更新译文结果到缓存数据中
+                for key, response in restore_response_dict.items():
+                    item = self.items[int(key)]
+                    with item.atomic_scope():
+                        item.model = self.model
+                        item.translated_text = response
+                        item.translation_status = TranslationStatus.TRANSLATED
+                    committed_items.append(item)
+
+                # 将译文回填到原文重复的条目
+                filled_items = self.fill_duplicate_items(committed_items, restore_response_dict.values())
+
+            # 部分行未通过检查
+            error = ""
+            if check_result == False:
+                error = (
+                    f"译文文本部分未通过检查，已保留 {len(committed_items)} / {self.row_count} 行，"
+                    + f"其余行将在下一轮次的翻译中重新翻译 - {error_content}"
+                )
 
             # 打印任务结果
             self.print(
                 self.generate_log_table(
                     *self.generate_log_rows(
-                        "",
+                        error,
                         task_start_time,
                         prompt_tokens,
                         completion_tokens,
@@ -226,21 +542,46 @@ class TranslatorTask(Base):
 
 
         # 否则返回译文检查的结果
-        if check_result == False:
+        if len(committed_items) == 0:
             return {
                 "check_result": False,
                 "row_count": 0,
                 "prompt_tokens": self.request_tokens_consume,
                 "completion_tokens": 0,
+                "request_time": request_time,
+                "response_tokens": completion_tokens,
             }
         else:
             return {
                 "check_result": check_result,
-                "row_count": self.row_count,
+                "row_count": len(committed_items) + len(filled_items),
+                "dedup_count": len(filled_items),
                 "prompt_tokens": prompt_tokens,
                 "completion_tokens": completion_tokens,
+                "cached_tokens": self.cached_tokens,
+                "items": committed_items + filled_items,
+                "request_time": request_time,
+                "response_tokens": completion_tokens,
             }
 
+    # 将译文回填到原文重复的条目，返回被回填的条目
+    def fill_duplicate_items(self, items: list[CacheItem], responses) -> list[CacheItem]:
+        filled_items = []
+        if not self.duplicate_items:
+            return filled_items
+
+        for item, response in zip(items, responses):
+            for duplicate in self.duplicate_items.get(item.text_index, ()):
+                with duplicate.atomic_scope():
+                    # 期间可能已被其他途径修改，只回填仍未翻译的条目
+                    if duplicate.translation_status != TranslationStatus.UNTRANSLATED:
+                        continue
+                    duplicate.model = self.model
+                    duplicate.translated_text = response
+                    duplicate.translation_status = TranslationStatus.TRANSLATED
+                filled_items.append(duplicate)
+        return filled_items
+
 
     # 生成日志行
     def generate_log_rows(self, error: str, start_time: int, prompt_tokens: int, completion_tokens: int, source: list[str], translated: list[str], extra_log: list[str]) -> tuple[list[str], bool]:
@@ -252,6 +593,7 @@ class TranslatorTask(Base):
             rows.append(
                 f"任务耗时 {(time.time() - start_time):.2f} 秒，"
                 + f"文本行数 {len(source)} 行，提示消耗 {prompt_tokens} Tokens，补全消耗 {completion_tokens} Tokens"
+                + (f"，缓存命中 {self.cached_tokens} Tokens" if self.cached_tokens > 0 else "")
             )
 
         # 添加额外日志
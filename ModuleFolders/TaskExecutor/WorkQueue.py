@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from ModuleFolders.Cache.CacheItem import CacheItem
+
+
+@dataclass
+class WorkUnit:
+    """待执行的条目片段"""
+
+    items: list[CacheItem]
+    previous_items: list[CacheItem] = field(default_factory = list)
+    file_path: str = ""
+    attempt: int = 0  # 片段内条目已尝试的最大次数
+
+
+class WorkQueue:
+    """持续执行的优先级任务队列
+
+    片段执行完毕后，未完成的条目在各自的尝试次数上限内立即拆分并重新入队，
+    重试片段优先于首次执行的片段，队列中没有片段且没有执行中的片段时任务结束，
+    不再按轮次等待全部任务完成后重新切分整个项目
+    """
+
+    # 等待队列时检查取消条件的间隔（秒）
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, max_attempts: int, get_previous_items: Callable[[str, CacheItem], list[CacheItem]] = None) -> None:
+        self.max_attempts = max(1, max_attempts)
+
+        # 获取文件中某个条目之前的上文条目，拆分后的片段各自使用紧邻其首个条目的上文
+        self.get_previous_items = get_previous_items
+        self.heap: list[tuple] = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.closed = False
+
+        # 已入队但尚未执行完毕的片段数量
+        self.pending = 0
+
+        # 各条目的尝试次数，按 text_index 记录
+        self.attempts: dict[int, int] = {}
+
+        # 达到尝试次数上限仍未完成的条目
+        self.exhausted_items: list[CacheItem] = []
+
+    def _push(self, unit: WorkUnit) -> None:
+        heapq.heappush(self.heap, (-unit.attempt, next(self.sequence), unit))
+        self.pending += 1
+
+    # 添加片段
+    def put(self, unit: WorkUnit) -> None:
+        with self.condition:
+            self._push(unit)
+            self.condition.notify()
+
+    # 获取优先级最高的片段，全部片段执行完毕、队列关闭或被取消时返回 None
+    def get(self, cancel: Callable[[], bool] = None) -> WorkUnit | None:
+        with self.condition:
+            while True:
+                if self.closed or (cancel is not None and cancel()):
+                    return None
+
+                if self.heap:
+                    return heapq.heappop(self.heap)[2]
+
+                # 执行中的片段可能还会产生重试片段
+                if self.pending == 0:
+                    return None
+
+                self.condition.wait(self.POLL_INTERVAL)
+
+    # 片段执行完毕，未完成的条目记录一次尝试，未达到上限的拆分后重新入队
+    def task_done(self, unit: WorkUnit, failed_items: list[CacheItem], split: bool = True) -> list[WorkUnit]:
+        with self.condition:
+            retry_items = []
+            attempt = 0
+            for item in failed_items:
+                count = self.attempts.get(item.text_index, 0) + 1
+                self.attempts[item.text_index] = count
+                if count < self.max_attempts:
+                    retry_items.append(item)
+                    attempt = max(attempt, count)
+                else:
+                    self.exhausted_items.append(item)
+
+            # 与原先每轮对半切分一致，未通过检查的片段拆分为两半
+            if split and len(retry_items) > 1:
+                middle = (len(retry_items) + 1) // 2
+                chunks = [retry_items[:middle], retry_items[middle:]]
+            elif retry_items:
+                chunks = [retry_items]
+            else:
+                chunks = []
+
+            retry_units = [WorkUnit(chunk, self.get_chunk_previous_items(unit, chunk), unit.file_path, attempt) for chunk in chunks]
+            for retry_unit in retry_units:
+                self._push(retry_unit)
+
+            self.pending -= 1
+            self.condition.notify_all()
+
+        return retry_units
+
+    # 获取重试片段的上文
+    def get_chunk_previous_items(self, unit: WorkUnit, chunk: list[CacheItem]) -> list[CacheItem]:
+        if self.get_previous_items is None:
+            return unit.previous_items
+        return self.get_previous_items(unit.file_path, chunk[0])
+
+    # 关闭队列，唤醒等待中的调用方
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
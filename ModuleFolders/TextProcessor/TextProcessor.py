@@ -1,6 +1,8 @@
+import hashlib
 import json
 import os
 import re
+import threading
 from typing import List, Dict, Tuple, Any, Optional
 
 class TextProcessor():
@@ -24,6 +26,47 @@ class TextProcessor():
     RE_DIGITAL_SEQ_REC_STR = r'^【(\d+)】'
     RE_WHITESPACE_AFFIX_STR = r'^(\s*)(.*?)(\s*)$'
 
+    # 无法安全合并为单个多选正则的写法：反向引用、条件分组与全局内联标记
+    RE_UNCOMBINABLE_STR = r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)'
+
+    # 已构建的实例缓存，按相关配置的哈希复用
+    MAX_CACHED_INSTANCES = 8
+    _instances: Dict[str, "TextProcessor"] = {}
+    _instances_lock = threading.Lock()
+
+    # 获取与配置对应的共享实例
+    @classmethod
+    def get_instance(cls, config: Any) -> "TextProcessor":
+        """实例构建后只读，可以在所有任务间共享"""
+        key = cls._config_hash(config)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls(config)
+                if len(cls._instances) >= cls.MAX_CACHED_INSTANCES:
+                    cls._instances.pop(next(iter(cls._instances)))
+                cls._instances[key] = instance
+            return instance
+
+    @classmethod
+    def _config_hash(cls, config: Any) -> str:
+        # 正则库文件被修改后需要重新构建
+        try:
+            regex_stat = os.stat(cls.DEFAULT_REGEX_DIR)
+            regex_version = (regex_stat.st_mtime_ns, regex_stat.st_size)
+        except OSError:
+            regex_version = None
+
+        relevant = [
+            config.pre_translation_data,
+            config.post_translation_data,
+            config.exclusion_list_data,
+            regex_version,
+        ]
+        return hashlib.sha1(
+            json.dumps(relevant, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
     def __init__(self, config: Any):
         super().__init__()
 
@@ -65,6 +108,31 @@ class TextProcessor():
             for p_str in special_placeholder_pattern_strings if p_str
         ]
 
+        # 合并为单个多选正则，使占位替换每行只需扫描一次
+        self.auto_combined_pattern, self.auto_combined_group_patterns = self._combine_patterns(
+            [p_str for p_str in special_placeholder_pattern_strings if p_str], re.IGNORECASE | re.MULTILINE
+        )
+
+    def _combine_patterns(self, pattern_strings: List[str], flags: int) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+        """把多个正则合并为按顺序的多选分组，无法安全合并时返回 None 以回退到逐个匹配"""
+        if not pattern_strings:
+            return None, {}
+
+        uncombinable = re.compile(self.RE_UNCOMBINABLE_STR)
+        if any(uncombinable.search(p_str) for p_str in pattern_strings):
+            return None, {}
+
+        group_patterns = {f"_ainiee_p{i}": p_str for i, p_str in enumerate(pattern_strings)}
+        try:
+            combined = re.compile(
+                "|".join(f"(?P<{name}>{p_str})" for name, p_str in group_patterns.items()),
+                flags
+            )
+        except re.error:
+            return None, {}
+
+        return combined, group_patterns
+
     def _normalize_line_endings(self, text: str) -> Tuple[str, List[Tuple[int, str]]]:
         """
         统一换行符为 \n，并记录每个换行符的原始类型和位置
@@ -375,7 +443,8 @@ class TextProcessor():
             processed_text, placeholder_order = self._replace_special_placeholders(
                 target_platform,
                 processed_text,
-                self.auto_compiled_patterns
+                self.auto_compiled_patterns,
+                self.auto_combined_pattern
             )
 
         # 处理数字序号
@@ -411,8 +480,14 @@ class TextProcessor():
 
     # 处理并占位文本中间内容
     def _replace_special_placeholders(self, target_platform: str, text_dict: Dict[str, str],
-                                      compiled_placeholder_patterns: List[re.Pattern]) -> \
+                                      compiled_placeholder_patterns: List[re.Pattern],
+                                      combined_pattern: Optional[re.Pattern] = None) -> \
             Tuple[Dict[str, str], Dict[str, List[Dict[str, str]]]]:
+        # 有合并后的正则时，每行只扫描一次
+        # 同一位置多个规则都能匹配时，排在前面的规则优先
+        if combined_pattern is not None:
+            return self._replace_special_placeholders_combined(target_platform, text_dict, combined_pattern)
+
         new_dict = {}
         placeholder_order: Dict[str, List[Dict[str, str]]] = {}
         global_match_count = 0
@@ -461,6 +536,52 @@ class TextProcessor():
 
         return new_dict, placeholder_order
 
+    # 使用合并后的正则处理并占位文本中间内容
+    def _replace_special_placeholders_combined(self, target_platform: str, text_dict: Dict[str, str],
+                                               combined_pattern: re.Pattern) -> \
+            Tuple[Dict[str, str], Dict[str, List[Dict[str, str]]]]:
+        new_dict = {}
+        placeholder_order: Dict[str, List[Dict[str, str]]] = {}
+        global_match_count = 0
+
+        for key, original_text in text_dict.items():
+            entry_placeholders: List[Dict[str, str]] = []
+            sakura_match_count = 0
+
+            def replacer(match_obj):
+                nonlocal global_match_count, sakura_match_count
+
+                if global_match_count >= 50:
+                    return match_obj.group(0)
+
+                global_match_count += 1
+                sakura_match_count += 1
+                original_match_val = match_obj.group(0)
+
+                placeholder_val = f"[P{global_match_count}]"
+                if target_platform == "sakura":
+                    placeholder_val = "↓" * sakura_match_count
+
+                entry_placeholders.append({
+                    "placeholder": placeholder_val,
+                    "original": original_match_val,
+                    "pattern": self.auto_combined_group_patterns.get(match_obj.lastgroup, combined_pattern.pattern)
+                })
+                return placeholder_val
+
+            current_text = original_text
+            if global_match_count < 50:
+                try:
+                    current_text = combined_pattern.sub(replacer, original_text)
+                except Exception as e:
+                    print(f"[Warning]: 占位正则替换出现问题！！ on key '{key}': {e}")
+                    current_text, entry_placeholders = original_text, []
+
+            placeholder_order[key] = entry_placeholders
+            new_dict[key] = current_text
+
+        return new_dict, placeholder_order
+
     # 还原特殊占位符
     def _restore_special_placeholders(self, text_dict: Dict[str, str],
                                       placeholder_order: Dict[str, List[Dict[str, str]]]) -> Dict[str, str]:
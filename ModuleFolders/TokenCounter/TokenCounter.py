@@ -0,0 +1,204 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable
+
+import tiktoken  # 需要安装库pip install tiktoken
+import tiktoken_ext  # 必须导入这两个库，否则打包后无法运行
+from tiktoken_ext import openai_public
+
+
+class TiktokenEncoder:
+    """tiktoken 编码器"""
+
+    def __init__(self, encoding_name: str) -> None:
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def encode(self, text: str) -> list[int]:
+        # 原文中可能出现特殊标记的字面量，按普通文本计算，避免抛出异常
+        return self.encoding.encode_ordinary(text)
+
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return self.encoding.encode_ordinary_batch(texts)
+
+
+class TokenizerFileEncoder:
+    """从 tokenizer.json 加载的模型专用分词器，用于本地模型"""
+
+    def __init__(self, tokenizer_file: str) -> None:
+        # 可选依赖，仅在使用本地分词器时需要
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_file)
+
+    def encode(self, text: str) -> list[int]:
+        return self.tokenizer.encode(text, add_special_tokens = False).ids
+
+    def encode_batch(self, texts: list[str]) -> list[list[int]]:
+        return [encoding.ids for encoding in self.tokenizer.encode_batch(texts, add_special_tokens = False)]
+
+
+class TokenCounter:
+    """共享的 Tokens 计数服务
+
+    编码器只加载一次，整批文本一次性编码，
+    计数结果保存在按文本哈希索引的有界 LRU 缓存中，不会长期持有原文字符串
+    """
+
+    DEFAULT_ENCODER = "cl100k_base"
+    MAX_CACHED_TEXTS = 100000
+
+    # 已注册的编码器构造函数
+    _encoder_factories: Dict[str, Callable[[], Any]] = {
+        "cl100k_base": lambda: TiktokenEncoder("cl100k_base"),
+        "o200k_base": lambda: TiktokenEncoder("o200k_base"),
+    }
+
+    # 各平台使用的编码器，未指定的平台使用默认编码器
+    _platform_encoders: Dict[str, str] = {}
+
+    _instances: Dict[str, "TokenCounter"] = {}
+    _instances_lock = threading.Lock()
+
+    # 注册编码器，构造函数返回的对象需要提供 encode 与 encode_batch 方法
+    @classmethod
+    def register_encoder(cls, name: str, factory: Callable[[], Any]) -> None:
+        with cls._instances_lock:
+            cls._encoder_factories[name] = factory
+            cls._instances.pop(name, None)
+
+    # 指定平台使用的编码器
+    @classmethod
+    def set_platform_encoder(cls, platform: str, name: str) -> None:
+        cls._platform_encoders[platform] = name
+
+    # 获取编码器对应的共享实例
+    @classmethod
+    def get_instance(cls, name: str = None) -> "TokenCounter":
+        name = name or cls.DEFAULT_ENCODER
+        with cls._instances_lock:
+            instance = cls._instances.get(name)
+            if instance is not None:
+                return instance
+
+            factory = cls._encoder_factories.get(name)
+            try:
+                if factory is None:
+                    raise KeyError(name)
+                instance = cls(factory())
+            except Exception as e:
+                if name == cls.DEFAULT_ENCODER:
+                    raise
+                print(f"[Warning INFO] 无法加载分词器 {name}，将使用 {cls.DEFAULT_ENCODER} 估算 Tokens：{e}")
+                instance = cls._instances.get(cls.DEFAULT_ENCODER) or cls(cls._encoder_factories[cls.DEFAULT_ENCODER]())
+                cls._instances[cls.DEFAULT_ENCODER] = instance
+
+            cls._instances[name] = instance
+            return instance
+
+    # 获取平台对应的共享实例，指定了分词器文件时优先使用
+    @classmethod
+    def get_for_platform(cls, platform: str, tokenizer_file: str = "") -> "TokenCounter":
+        if tokenizer_file:
+            name = f"file:{tokenizer_file}"
+            if name not in cls._encoder_factories:
+                cls.register_encoder(name, lambda: TokenizerFileEncoder(tokenizer_file))
+            return cls.get_instance(name)
+
+        return cls.get_instance(cls._platform_encoders.get(platform, cls.DEFAULT_ENCODER))
+
+    def __init__(self, encoder: Any, max_cached_texts: int = None) -> None:
+        self.encoder = encoder
+        self.max_cached_texts = max_cached_texts or self.MAX_CACHED_TEXTS
+        self.cache: OrderedDict[bytes, int] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _text_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size = 16).digest()
+
+    def _get_cached(self, key: bytes) -> int | None:
+        with self.lock:
+            count = self.cache.get(key)
+            if count is not None:
+                self.cache.move_to_end(key)
+            return count
+
+    def _set_cached(self, keys: Iterable[bytes], counts: Iterable[int]) -> None:
+        with self.lock:
+            for key, count in zip(keys, counts):
+                self.cache[key] = count
+                self.cache.move_to_end(key)
+            while len(self.cache) > self.max_cached_texts:
+                self.cache.popitem(last = False)
+
+    # 计算单个文本的 Tokens 数
+    def count(self, text: str) -> int:
+        if not isinstance(text, str) or not text:
+            return 0
+
+        key = self._text_key(text)
+        count = self._get_cached(key)
+        if count is None:
+            count = len(self.encoder.encode(text))
+            self._set_cached((key,), (count,))
+        return count
+
+    # 批量计算多个文本的 Tokens 数，未缓存的文本一次性编码
+    def count_batch(self, texts: Iterable[str]) -> list[int]:
+        texts = list(texts)
+        counts = [0] * len(texts)
+
+        # 相同文本只编码一次
+        missing: Dict[bytes, list[int]] = {}
+        missing_texts = []
+        for i, text in enumerate(texts):
+            if not isinstance(text, str) or not text:
+                continue
+
+            key = self._text_key(text)
+            count = self._get_cached(key)
+            if count is not None:
+                counts[i] = count
+            elif key in missing:
+                missing[key].append(i)
+            else:
+                missing[key] = [i]
+                missing_texts.append(text)
+
+        if missing_texts:
+            if len(missing_texts) == 1:
+                encoded_counts = [len(self.encoder.encode(missing_texts[0]))]
+            else:
+                encoded_counts = [len(tokens) for tokens in self.encoder.encode_batch(missing_texts)]
+
+            for positions, count in zip(missing.values(), encoded_counts):
+                for i in positions:
+                    counts[i] = count
+            self._set_cached(missing.keys(), encoded_counts)
+
+        return counts
+
+    # 计算消息列表的 Tokens 数，按 OpenAI 的消息格式估算额外开销
+    def count_messages(self, messages: list[dict]) -> int:
+        tokens_per_message = 3
+        tokens_per_name = 1
+
+        num_tokens = 0
+        values = []
+        for message in messages:
+            num_tokens += tokens_per_message
+            for key, value in message.items():
+                # 如果value是字符串类型才计算tokens，否则跳过，因为AI在调用函数时，会在content中回复null，导致报错
+                if isinstance(value, str):
+                    values.append(value)
+                if key == "name":
+                    num_tokens += tokens_per_name
+        num_tokens += 3  # every reply is primed with <|start|>assistant<|message|>
+
+        return num_tokens + sum(self.count_batch(values))
+
+    # 清空计数缓存
+    def clear(self) -> None:
+        with self.lock:
+            self.cache.clear()
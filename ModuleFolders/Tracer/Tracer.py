@@ -0,0 +1,266 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from Base.Base import Base
+
+
+# 流水线阶段追踪
+class Tracer(Base):
+    """记录翻译任务各阶段的耗时
+
+    每个阶段的耗时记录为一条带有接口、模型、密钥序号、片段行数与尝试次数标签的追踪记录，
+    由后台线程写入按大小轮转的 JSONL 文件，同时按阶段、接口与模型汇总为耗时直方图，
+    可以通过本地的 /metrics 接口以 Prometheus 文本格式读取
+    """
+
+    DEFAULT_PATH = os.path.join(".", "Resource", "Trace", "trace.jsonl")
+    DEFAULT_MAX_SIZE_MB = 10
+    DEFAULT_BACKUP_COUNT = 5
+
+    # 耗时直方图的分桶上限（秒）
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    # 作为指标标签的字段，其余字段只写入追踪文件，避免标签组合过多
+    METRIC_LABELS = ("stage", "platform", "model")
+
+    _instance: "Tracer" = None
+    _instance_lock = threading.Lock()
+
+    # 获取共享实例
+    @classmethod
+    def get_instance(cls) -> "Tracer":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # 根据配置设置共享实例，未开启追踪时实例不记录任何数据
+    @classmethod
+    def from_config(cls, config) -> "Tracer":
+        instance = cls.get_instance()
+        instance.configure(
+            enabled = getattr(config, "trace_switch", False),
+            path = getattr(config, "trace_path", "") or cls.DEFAULT_PATH,
+            max_size = getattr(config, "trace_max_size", cls.DEFAULT_MAX_SIZE_MB),
+            backup_count = getattr(config, "trace_backup_count", cls.DEFAULT_BACKUP_COUNT),
+            metrics_port = getattr(config, "metrics_port", 0),
+        )
+        return instance
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.task_ids = itertools.count(1)
+
+        # 追踪文件的后台写入
+        self.path = ""
+        self.listener: QueueListener = None
+        self.logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+        # 耗时直方图，{标签值元组: [各分桶计数, 总耗时, 次数, 失败次数]}
+        self.histograms: dict[tuple, list] = {}
+
+        # 指标接口
+        self.metrics_server: MetricsServer = None
+
+    # 更新追踪设置
+    def configure(self, enabled: bool, path: str, max_size: float, backup_count: int, metrics_port: int = 0) -> None:
+        with self.lock:
+            if not enabled:
+                self.enabled = False
+                self.close_file()
+            elif path != self.path or self.listener is None:
+                self.close_file()
+                self.open_file(path, max_size, backup_count)
+                self.enabled = True
+            else:
+                self.enabled = True
+
+        self.configure_metrics_server(metrics_port if enabled else 0)
+
+    # 打开追踪文件，写入由后台线程完成，不阻塞任务线程
+    def open_file(self, path: str, max_size: float, backup_count: int) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+
+        handler = RotatingFileHandler(path, maxBytes = int(max_size * 1024 * 1024), backupCount = backup_count, encoding = "utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+        records = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandler(records))
+        self.listener = QueueListener(records, handler)
+        self.listener.start()
+        self.path = path
+
+    # 关闭追踪文件，等待已记录的数据写入完毕
+    def close_file(self) -> None:
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+
+        if self.listener is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            self.listener = None
+        self.path = ""
+
+    # 按需启动或停止指标接口，端口为 0 时不提供接口
+    def configure_metrics_server(self, port: int) -> None:
+        if self.metrics_server is not None and self.metrics_server.port != port:
+            self.metrics_server.stop()
+            self.metrics_server = None
+
+        if port > 0 and self.metrics_server is None:
+            try:
+                self.metrics_server = MetricsServer(self, port).start()
+                self.info(f"阶段追踪 - 指标接口已启动 {self.metrics_server.url}/metrics")
+            except OSError as e:
+                self.warning(f"阶段追踪 - 指标接口启动失败，端口 {port} ... {e}")
+
+    # 关闭追踪文件与指标接口
+    def close(self) -> None:
+        with self.lock:
+            self.enabled = False
+            self.close_file()
+        self.configure_metrics_server(0)
+
+    # 生成新的任务编号，用于关联同一任务的各阶段
+    def next_task_id(self) -> int:
+        return next(self.task_ids)
+
+    # 记录一个阶段的耗时，可以在阶段执行期间修改标签，status 标签为 error 时记为失败
+    @contextmanager
+    def span(self, stage: str, **tags):
+        if not self.enabled:
+            yield tags
+            return
+
+        start_time = time.time()
+        start_counter = time.perf_counter()
+        status = "ok"
+        try:
+            yield tags
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record(stage, start_time, time.perf_counter() - start_counter, tags.pop("status", status), tags)
+
+    # 写入追踪记录并更新直方图
+    def record(self, stage: str, start_time: float, duration: float, status: str, tags: dict) -> None:
+        data = {"ts": round(start_time, 6), "stage": stage, "duration": round(duration, 6), "status": status}
+        data.update(tags)
+        self.logger.info(json.dumps(data, ensure_ascii = False, default = str))
+
+        labels = tuple(str(data.get(name, "")) for name in self.METRIC_LABELS)
+        with self.lock:
+            histogram = self.histograms.get(labels)
+            if histogram is None:
+                histogram = [[0] * len(self.BUCKETS), 0.0, 0, 0]
+                self.histograms[labels] = histogram
+
+            for i, bound in enumerate(self.BUCKETS):
+                if duration <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += duration
+            histogram[2] += 1
+            if status != "ok":
+                histogram[3] += 1
+
+    # 清空直方图
+    def reset_metrics(self) -> None:
+        with self.lock:
+            self.histograms.clear()
+
+    # 转义指标标签值
+    @staticmethod
+    def escape_label(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    # 以 Prometheus 文本格式输出指标
+    def render_metrics(self) -> str:
+        with self.lock:
+            histograms = {labels: (list(buckets), total, count, errors) for labels, (buckets, total, count, errors) in self.histograms.items()}
+
+        lines = [
+            "# HELP ainiee_stage_duration_seconds Duration of translation pipeline stages.",
+            "# TYPE ainiee_stage_duration_seconds histogram",
+        ]
+        for labels, (buckets, total, count, _) in sorted(histograms.items()):
+            label_text = ",".join(f"{name}=\"{self.escape_label(value)}\"" for name, value in zip(self.METRIC_LABELS, labels))
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f"ainiee_stage_duration_seconds_bucket{{{label_text},le=\"{bound}\"}} {bucket_count}")
+            lines.append(f"ainiee_stage_duration_seconds_bucket{{{label_text},le=\"+Inf\"}} {count}")
+            lines.append(f"ainiee_stage_duration_seconds_sum{{{label_text}}} {total}")
+            lines.append(f"ainiee_stage_duration_seconds_count{{{label_text}}} {count}")
+
+        lines.append("# HELP ainiee_stage_errors_total Failed translation pipeline stages.")
+        lines.append("# TYPE ainiee_stage_errors_total counter")
+        for labels, (_, _, _, errors) in sorted(histograms.items()):
+            label_text = ",".join(f"{name}=\"{self.escape_label(value)}\"" for name, value in zip(self.METRIC_LABELS, labels))
+            lines.append(f"ainiee_stage_errors_total{{{label_text}}} {errors}")
+
+        return "\n".join(lines) + "\n"
+
+
+# 本地指标接口
+class MetricsServer:
+
+    def __init__(self, tracer: Tracer, port: int, host: str = "127.0.0.1") -> None:
+        self.tracer = tracer
+        self.port = port
+        self.server = ThreadingHTTPServer((host, port), self.create_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    # 接口地址
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # 在后台线程中启动
+    def start(self) -> "MetricsServer":
+        self.thread = threading.Thread(target = self.server.serve_forever, name = "metrics_server", daemon = True)
+        self.thread.start()
+        return self
+
+    # 停止服务
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    # 创建请求处理器
+    def create_handler(self) -> type:
+        tracer = self.tracer
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                payload = tracer.render_metrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Iterable
+
+
+class TranslationMemory:
+    """基于SQLite的本地翻译记忆库
+
+    以归一化原文的哈希建立索引，按 原文语言/译文语言/模型 区分条目，
+    跨项目复用已完成的译文，条目数量超过上限时淘汰最久未使用的条目
+    """
+
+    DEFAULT_PATH = os.path.join(".", "Resource", "TranslationMemory", "translation_memory.db")
+    DEFAULT_MAX_ENTRIES = 200000
+
+    # 单次查询的参数数量上限，避免超过SQLite的变量数量限制
+    QUERY_BATCH_SIZE = 500
+
+    RE_WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, db_path: str = None, max_entries: int = None) -> None:
+        self.db_path = db_path or self.DEFAULT_PATH
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self.lock = threading.RLock()
+
+        if os.path.dirname(self.db_path):
+            os.makedirs(os.path.dirname(self.db_path), exist_ok = True)
+        self.connection = sqlite3.connect(self.db_path, check_same_thread = False, isolation_level = None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock:
+            self.connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    source_hash BLOB NOT NULL,
+                    near_hash BLOB NOT NULL,
+                    source_lang TEXT NOT NULL,
+                    target_lang TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    source_text TEXT NOT NULL,
+                    target_text TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (source_hash, source_lang, target_lang, model)
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_near
+                    ON entries (near_hash, source_lang, target_lang);
+                CREATE INDEX IF NOT EXISTS idx_entries_last_used
+                    ON entries (last_used);
+                """
+            )
+
+    # 关闭连接
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+    # 精确匹配使用的归一化文本
+    @staticmethod
+    def normalize(text: str) -> str:
+        return unicodedata.normalize("NFC", text.replace("\r\n", "\n"))
+
+    # 近似匹配使用的归一化文本，忽略全半角、大小写与空白的差异
+    @classmethod
+    def normalize_near(cls, text: str) -> str:
+        return cls.RE_WHITESPACE.sub("", unicodedata.normalize("NFKC", text).casefold())
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size = 16).digest()
+
+    # 批量查询译文
+    def lookup(self, source_texts: Iterable[str], source_lang: str, target_lang: str, model: str = None, near: bool = False) -> dict[str, tuple[str, str]]:
+        """返回 {原文: (译文, 模型)}，model 为 None 时不限模型，同一原文取最近更新的条目"""
+        pending = {}
+        for text in source_texts:
+            if text and text.strip():
+                pending.setdefault(self._hash(self.normalize(text)), []).append(text)
+
+        results = {}
+        used_keys = []
+        with self.lock:
+            self._lookup_by(results, used_keys, "source_hash", pending, source_lang, target_lang, model)
+
+            # 精确匹配失败的原文再进行近似匹配
+            if near:
+                near_pending = {}
+                for texts in pending.values():
+                    for text in texts:
+                        if text not in results:
+                            near_pending.setdefault(self._hash(self.normalize_near(text)), []).append(text)
+                self._lookup_by(results, used_keys, "near_hash", near_pending, source_lang, target_lang, model)
+
+            self._touch(used_keys)
+
+        return results
+
+    def _lookup_by(self, results: dict, used_keys: list, column: str, pending: dict, source_lang: str, target_lang: str, model: str | None) -> None:
+        hashes = list(pending.keys())
+        for start in range(0, len(hashes), self.QUERY_BATCH_SIZE):
+            batch = hashes[start:start + self.QUERY_BATCH_SIZE]
+            sql = (
+                f"SELECT {column}, source_hash, model, target_text FROM entries"
+                f" WHERE {column} IN ({", ".join("?" * len(batch))}) AND source_lang = ? AND target_lang = ?"
+            )
+            params = [*batch, source_lang, target_lang]
+            if model is not None:
+                sql += " AND model = ?"
+                params.append(model)
+            sql += " ORDER BY updated_at"
+
+            # 按更新时间升序遍历，同一原文保留最近更新的条目
+            matched = {}
+            for key, source_hash, entry_model, target_text in self.connection.execute(sql, params):
+                matched[key] = (source_hash, entry_model, target_text)
+
+            for key, (source_hash, entry_model, target_text) in matched.items():
+                for text in pending[key]:
+                    results[text] = (target_text, entry_model)
+                used_keys.append((source_hash, source_lang, target_lang, entry_model))
+
+    # 更新条目的最近使用时间
+    def _touch(self, keys: list[tuple]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        self.connection.executemany(
+            "UPDATE entries SET last_used = ? WHERE source_hash = ? AND source_lang = ? AND target_lang = ? AND model = ?",
+            [(now, *key) for key in keys],
+        )
+
+    # 批量写入条目
+    def add(self, entries: Iterable[tuple[str, str, str]], source_lang: str, target_lang: str, updated_at: float = None) -> int:
+        """entries 为 (原文, 译文, 模型)，已存在的条目以新译文覆盖"""
+        now = time.time()
+        updated_at = updated_at or now
+        rows = [
+            (
+                self._hash(self.normalize(source_text)),
+                self._hash(self.normalize_near(source_text)),
+                source_lang,
+                target_lang,
+                model or "",
+                source_text,
+                target_text,
+                updated_at,
+                now,
+            )
+            for source_text, target_text, model in entries
+            if source_text and source_text.strip() and target_text
+        ]
+        if not rows:
+            return 0
+
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                self.connection.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (source_hash, source_lang, target_lang, model) DO UPDATE SET"
+                    " source_text = excluded.source_text, target_text = excluded.target_text,"
+                    " updated_at = excluded.updated_at, last_used = excluded.last_used"
+                    " WHERE excluded.updated_at >= entries.updated_at",
+                    rows,
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.evict()
+
+        return len(rows)
+
+    # 条目数量
+    def count(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    # 淘汰最久未使用的条目，使条目数量不超过上限
+    def evict(self, max_entries: int = None) -> int:
+        max_entries = max_entries or self.max_entries
+        with self.lock:
+            overflow = self.count() - max_entries
+            if overflow <= 0:
+                return 0
+            self.connection.execute(
+                "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            return overflow
+
+    # 导出为 JSON Lines 文件
+    def export_to_file(self, path: str) -> int:
+        count = 0
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT source_lang, target_lang, model, source_text, target_text, updated_at FROM entries ORDER BY updated_at"
+            ).fetchall()
+
+        with open(path, "w", encoding = "utf-8") as writer:
+            for source_lang, target_lang, model, source_text, target_text, updated_at in rows:
+                writer.write(json.dumps({
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "model": model,
+                    "source_text": source_text,
+                    "target_text": target_text,
+                    "updated_at": updated_at,
+                }, ensure_ascii = False) + "\n")
+                count = count + 1
+        return count
+
+    # 从 JSON Lines 文件导入，较旧的条目不会覆盖已有的较新条目
+    def import_from_file(self, path: str) -> int:
+        groups = {}
+        with open(path, "r", encoding = "utf-8") as reader:
+            for line in reader:
+                line = line.strip()
+                if not line:
+                    continue
+                data = json.loads(line)
+                key = (data.get("source_lang", ""), data.get("target_lang", ""), data.get("updated_at") or time.time())
+                groups.setdefault(key, []).append((data.get("source_text", ""), data.get("target_text", ""), data.get("model", "")))
+
+        count = 0
+        for (source_lang, target_lang, updated_at), entries in groups.items():
+            count = count + self.add(entries, source_lang, target_lang, updated_at)
+        return count
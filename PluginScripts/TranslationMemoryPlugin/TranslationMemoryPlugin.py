@@ -0,0 +1,146 @@
+from rich import print
+
+from ModuleFolders.Cache.CacheItem import TranslationStatus
+from ModuleFolders.Cache.CacheProject import CacheProject
+from ModuleFolders.TaskConfig.TaskConfig import TaskConfig
+from ModuleFolders.TaskConfig.TaskType import TaskType
+from ModuleFolders.TranslationMemory.TranslationMemory import TranslationMemory
+from PluginScripts.PluginBase import PluginBase
+
+
+class TranslationMemoryPlugin(PluginBase):
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        self.name = "TranslationMemoryPlugin"
+        self.description = (
+                "翻译记忆插件，在翻译开始前从本地翻译记忆库中查找相同原文的已有译文，命中的条目直接标记为已翻译，不再发送请求"
+                + "\n"
+                + "任务完成后将本次由模型翻译、润色的条目写入记忆库，按 原文语言/译文语言/模型 区分"
+                + "\n"
+                + "记忆库可以通过命令行的 --tm-export / --tm-import 导出与导入"
+                + "\n"
+                + "兼容性：支持全部语言；支持全部模型；支持全部文本格式；支持翻译润色流程；"
+        )
+
+        self.visibility = True  # 是否在插件设置中显示
+        self.default_enable = False  # 默认启用状态，记忆库会持久保存译文，需要用户主动开启
+
+        # 在其他过滤插件之后执行，已被过滤的条目不再查询
+        self.add_event("text_filter", PluginBase.PRIORITY.LOWEST)
+        self.add_event("preproces_text", PluginBase.PRIORITY.LOWEST)
+        self.add_event("translation_completed", PluginBase.PRIORITY.NORMAL)
+        self.add_event("polish_completed", PluginBase.PRIORITY.NORMAL)
+
+        self.memory = None
+
+        # 本次任务交给模型处理的条目及其开始时的状态，{id(条目): (条目, 状态)}
+        # 只有这些条目在任务中得到的译文才写入记忆库，读取时已有的译文、记忆库命中的译文与其他插件填充的内容都不写入
+        self.pending_items = {}
+
+    def on_event(self, event: str, config: TaskConfig, data: CacheProject) -> None:
+
+        if event == "text_filter":
+            self.on_text_filter(event, config, data)
+        elif event == "preproces_text":
+            self.on_preproces_text(event, config, data)
+        elif event in ("translation_completed", "polish_completed"):
+            self.on_task_completed(event, config, data)
+
+    # 获取记忆库，路径或容量变化时重新打开
+    def get_memory(self, config: TaskConfig) -> TranslationMemory:
+        db_path = getattr(config, "translation_memory_path", "") or TranslationMemory.DEFAULT_PATH
+        max_entries = getattr(config, "translation_memory_max_entries", TranslationMemory.DEFAULT_MAX_ENTRIES)
+
+        if self.memory is None or self.memory.db_path != db_path:
+            if self.memory is not None:
+                self.memory.close()
+            self.memory = TranslationMemory(db_path, max_entries)
+        self.memory.max_entries = max_entries
+
+        return self.memory
+
+    # 查询记忆库，命中的条目直接标记为已翻译
+    def on_text_filter(self, event: str, config: TaskConfig, data: CacheProject) -> None:
+        # 润色任务同样会触发该事件，此时不查询记忆库，否则原文润色模式下待润色的条目会被直接标记为已翻译
+        # 只有译文润色模式的结果是译文，记录交给润色任务的已翻译条目
+        if getattr(config, "task_mode", TaskType.TRANSLATION) != TaskType.TRANSLATION:
+            if getattr(config, "polishing_mode_selection", "") != "translated_text_polish":
+                self.pending_items = {}
+            else:
+                self.pending_items = {
+                    id(item): (item, item.translation_status)
+                    for item in data.items_iter()
+                    if item.translation_status == TranslationStatus.TRANSLATED
+                }
+            return
+
+        items = [item for item in data.items_iter() if item.translation_status == TranslationStatus.UNTRANSLATED]
+        self.pending_items = {id(item): (item, item.translation_status) for item in items}
+        if not items:
+            return
+
+        print("")
+        print("[TranslationMemory] 开始查询翻译记忆 ...")
+
+        try:
+            hits = self.get_memory(config).lookup(
+                (item.source_text for item in items),
+                config.source_language,
+                config.target_language,
+                model = None if getattr(config, "translation_memory_any_model", False) else config.model,
+                near = getattr(config, "translation_memory_near_match", False),
+            )
+        except Exception as e:
+            print(f"[[red]WARNING[/]] [TranslationMemory] 查询翻译记忆失败：{e}")
+            return
+
+        count = 0
+        for item in items:
+            hit = hits.get(item.source_text)
+            if hit is not None:
+                item.translated_text, item.model = hit
+                item.translation_status = TranslationStatus.TRANSLATED
+                self.pending_items.pop(id(item), None)
+                count = count + 1
+
+        print(f"[TranslationMemory] 翻译记忆命中 {count} / {len(items)} 个条目 ...")
+        print("")
+
+    # 预处理插件排除的条目不会交给模型翻译，其译文可能由插件在后处理时填充，不写入记忆库
+    # 润色流程不触发预处理事件，交给润色任务的条目只会被润色任务标记为已润色，无需筛选
+    def on_preproces_text(self, event: str, config: TaskConfig, data: CacheProject) -> None:
+        self.pending_items = {
+            key: (item, status)
+            for key, (item, status) in self.pending_items.items()
+            if item.translation_status == status
+        }
+
+    # 任务完成后写入本次由模型翻译或润色的条目
+    def on_task_completed(self, event: str, config: TaskConfig, data: CacheProject) -> None:
+        pending_items, self.pending_items = self.pending_items, {}
+
+        entries = []
+        for item, status in pending_items.values():
+            if event == "translation_completed" and status == TranslationStatus.UNTRANSLATED and item.translation_status == TranslationStatus.TRANSLATED:
+                text, model = item.translated_text, item.model
+            elif event == "polish_completed" and status == TranslationStatus.TRANSLATED and item.translation_status == TranslationStatus.POLISHED:
+                text, model = item.polished_text, item.model or config.model
+            else:
+                continue
+
+            # 跳过空白译文
+            if text and text.strip():
+                entries.append((item.source_text, text, model))
+
+        if not entries:
+            return
+
+        try:
+            count = self.get_memory(config).add(entries, config.source_language, config.target_language)
+        except Exception as e:
+            print(f"[[red]WARNING[/]] [TranslationMemory] 写入翻译记忆失败：{e}")
+            return
+
+        print(f"[TranslationMemory] 已写入 {count} 个条目到翻译记忆 ...")
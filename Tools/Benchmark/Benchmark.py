@@ -0,0 +1,447 @@
+"""翻译流程吞吐基准测试
+
+在本地启动模拟的 OpenAI / Anthropic 兼容接口，为各项目类型生成合成项目，
+以无界面的方式驱动 TaskExecutor 完成 读取 → 翻译 → 写出 的完整流程，
+并报告每秒行数、每秒请求数、限流等待时间、各阶段 CPU 时间与峰值内存。
+
+用法（在项目根目录执行）：
+    python Tools/Benchmark/Benchmark.py --types Txt Srt --files 4 --lines 500 --latency 0.2
+    python Tools/Benchmark/Benchmark.py --api-format anthropic --set response_stream_switch=true --output report.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+# 以项目根目录为工作目录与导入路径，与 AiNiee.py 一致
+ROOT_PATH = Path(__file__).resolve().parents[2]
+if str(ROOT_PATH) not in sys.path:
+    sys.path.insert(0, str(ROOT_PATH))
+
+from rich.console import Console
+from rich.table import Table
+
+from MockLLMServer import MockLLMServer, MockServerOptions
+from ProjectGenerator import ProjectGenerator
+
+
+# 各阶段耗时统计
+class StageProfiler:
+    """替换被测函数为计时包装，分阶段累计调用次数、线程 CPU 时间与墙钟时间
+
+    CPU 时间使用 time.thread_time()，只统计调用线程自身的消耗，不受其他线程等待网络的影响，
+    协程函数只统计墙钟时间
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.patches = []
+
+    # 包装 owner 上的函数 name，计入阶段 stage
+    def wrap(self, owner, name: str, stage: str) -> None:
+        original = owner.__dict__[name]
+        profiler = self
+
+        if asyncio.iscoroutinefunction(original):
+            async def wrapper(*args, **kwargs):
+                start_wall = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    profiler.record(stage, 0.0, time.perf_counter() - start_wall)
+        else:
+            def wrapper(*args, **kwargs):
+                start_cpu, start_wall = time.thread_time(), time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    profiler.record(stage, time.thread_time() - start_cpu, time.perf_counter() - start_wall)
+
+        setattr(owner, name, wrapper)
+        self.patches.append((owner, name, original))
+
+    # 记录一次调用
+    def record(self, stage: str, cpu_time: float, wall_time: float) -> None:
+        with self.lock:
+            stats = self.stats.setdefault(stage, {"count": 0, "cpu_time": 0.0, "wall_time": 0.0})
+            stats["count"] += 1
+            stats["cpu_time"] += cpu_time
+            stats["wall_time"] += wall_time
+
+    # 还原全部被包装的函数
+    def restore(self) -> None:
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches = []
+
+    # 获取统计
+    def get_stats(self) -> dict:
+        with self.lock:
+            return copy.deepcopy(self.stats)
+
+
+# 进程的峰值常驻内存（字节），不支持的平台返回 None
+def get_peak_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# 生成基准测试使用的配置
+def build_config(scenario: dict) -> dict:
+    from ModuleFolders.PromptBuilder.PromptBuilderEnum import PromptBuilderEnum
+
+    with open(ROOT_PATH / "Resource" / "platforms" / "preset.json", "r", encoding = "utf-8") as reader:
+        preset = json.load(reader)
+
+    target_platform = scenario["api_format"]
+    platform = copy.deepcopy(preset["platforms"][target_platform])
+    platform.update({
+        "api_url": scenario["api_url"],
+        "api_key": ",".join(f"bench-key-{i}" for i in range(scenario["keys"])),
+        "model": "mock-model",
+        "rpm_limit": scenario["rpm_limit"],
+        "tpm_limit": scenario["tpm_limit"],
+        "auto_complete": False,
+    })
+
+    config = {
+        "translation_project": scenario["project_type"],
+        "label_input_path": scenario["input_path"],
+        "label_input_exclude_rule": "",
+        "label_output_path": scenario["output_path"],
+        "polishing_output_path": scenario["output_path"],
+        "translation_memory_path": str(Path(scenario["work_path"]) / "translation_memory.db"),
+        "auto_set_output_path": False,
+        "output_filename_suffix": "_translated",
+        "bilingual_text_order": "translation_first",
+        "response_conversion_toggle": False,
+        "opencc_preset": "s2t",
+        "keep_original_encoding": False,
+        "proxy_url": "",
+        "proxy_enable": False,
+        "api_settings": {"translate": target_platform, "polish": target_platform, "format": target_platform},
+        "platforms": {target_platform: platform},
+        "source_language": "japanese",
+        "target_language": "chinese_simplified",
+        "pre_line_counts": 0,
+        "few_shot_and_example_switch": False,
+        "auto_process_text_code_segment": False,
+        "response_check_switch": {
+            "return_to_original_text_check": True,
+            "residual_original_text_check": True,
+            "newline_character_count_check": True,
+        },
+        "translation_prompt_selection": {"last_selected_id": PromptBuilderEnum.COMMON, "prompt_content": ""},
+        "translation_user_prompt_data": [],
+        "translation_example_switch": False,
+        "translation_example_data": [],
+        "characterization_switch": False,
+        "characterization_data": [],
+        "world_building_switch": False,
+        "world_building_content": "",
+        "writing_style_switch": False,
+        "writing_style_content": "",
+        "prompt_dictionary_switch": False,
+        "prompt_dictionary_data": [],
+        "exclusion_list_switch": False,
+        "exclusion_list_data": [],
+        "pre_translation_switch": False,
+        "pre_translation_data": [],
+        "post_translation_switch": False,
+        "post_translation_data": [],
+        "lines_limit_switch": True,
+        "tokens_limit_switch": False,
+        "lines_limit": scenario["lines_limit"],
+        "tokens_limit": 512,
+        "user_thread_counts": scenario["threads"],
+        "request_timeout": 120,
+        "round_limit": scenario["round_limit"],
+        "plugins_enable": {},
+    }
+
+    # 命令行指定的额外配置
+    config.update(scenario["overrides"])
+    return config
+
+
+# 在当前进程中执行一个测试场景，返回报告
+def run_scenario(scenario: dict) -> dict:
+    os.chdir(ROOT_PATH)
+
+    from Base.Base import Base
+    from Base.ConfigStore import ConfigStore
+    from Base.PluginManager import PluginManager
+    from ModuleFolders.Cache.CacheManager import CacheManager
+    from ModuleFolders.FileOutputer.FileOutputer import FileOutputer
+    from ModuleFolders.FileReader.FileReader import FileReader
+    from ModuleFolders.LLMRequester.LLMRequester import LLMRequester
+    from ModuleFolders.ResponseChecker.ResponseChecker import ResponseChecker
+    from ModuleFolders.ResponseExtractor.ResponseExtractor import ResponseExtractor
+    from ModuleFolders.TaskExecutor.TaskExecutor import TaskExecutor
+    from ModuleFolders.TaskExecutor.TranslatorTask import TranslatorTask
+    from ModuleFolders.TextProcessor.TextProcessor import TextProcessor
+
+    # 使用独立的配置文件，不影响用户配置
+    work_path = Path(scenario["work_path"])
+    Base.CONFIG_PATH = str(work_path / "config.json")
+    with open(Base.CONFIG_PATH, "w", encoding = "utf-8") as writer:
+        json.dump(build_config(scenario), writer, ensure_ascii = False, indent = 4)
+
+    if scenario["save_interval"] is not None:
+        CacheManager.SAVE_INTERVAL = scenario["save_interval"]
+
+    profiler = StageProfiler()
+    profiler.wrap(FileReader, "read_files", "read")
+    profiler.wrap(CacheManager, "generate_item_chunks", "chunk")
+    profiler.wrap(TranslatorTask, "prepare", "prepare")
+    profiler.wrap(LLMRequester, "sent_request", "request")
+    profiler.wrap(LLMRequester, "sent_request_async", "request")
+    profiler.wrap(ResponseExtractor, "text_extraction", "extract")
+    profiler.wrap(ResponseChecker, "check_response_content", "check")
+    profiler.wrap(ResponseChecker, "check_response_lines", "check")
+    profiler.wrap(TextProcessor, "restore_all", "restore")
+    profiler.wrap(CacheManager, "save_to_file", "save")
+    profiler.wrap(FileOutputer, "output_translated_content", "write")
+    profiler.wrap(TaskExecutor, "run_translation_queue", "translate")
+
+    output = contextlib.nullcontext() if scenario["verbose"] else open(os.devnull, "w", encoding = "utf-8")
+    try:
+        with output as stream, contextlib.redirect_stdout(stream or sys.stdout):
+            plugin_manager = PluginManager()
+            if scenario["plugins"]:
+                plugin_manager.load_plugins_from_directory(os.path.join(".", "PluginScripts"))
+
+                # 与插件设置页一致，未设置过的插件使用默认启用状态
+                plugins_enable = {name: plugin.default_enable for name, plugin in plugin_manager.get_plugins().items()}
+                plugins_enable.update(scenario["overrides"].get("plugins_enable", {}))
+                plugin_manager.update_plugins_enable(plugins_enable)
+
+            file_reader = FileReader()
+            file_writer = FileOutputer()
+            cache_manager = CacheManager()
+            task_executor = TaskExecutor(plugin_manager, cache_manager, file_reader, file_writer)
+
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+
+            project = file_reader.read_files(scenario["project_type"], scenario["input_path"], "", 1)
+            cache_manager.load_from_project(project)
+
+            # 直接在当前线程中执行翻译，不经过任务开始事件，需要手动启动定时保存
+            cache_manager.start_interval_saving(Base.EVENT.TASK_START, {})
+            try:
+                task_executor.translation_start_target(False)
+            finally:
+                cache_manager.save_to_file_stop_flag = True
+
+            total_wall, total_cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+    finally:
+        profiler.restore()
+
+        # 测试目录可能在退出前被删除，立即写入任务中对配置的修改
+        ConfigStore.get_instance(Base.CONFIG_PATH).flush()
+
+    stages = profiler.get_stats()
+    status = task_executor.project_status_data
+    limiter_stats = task_executor.request_limiter.get_stats()
+    translate_time = stages.get("translate", {}).get("wall_time", 0.0) or total_wall
+
+    return {
+        "project_type": scenario["project_type"],
+        "total_line": status.total_line,
+        "line": status.line,
+        "dedup_line": status.dedup_line,
+        "total_requests": status.total_requests,
+        "error_requests": status.error_requests,
+        "translate_time": translate_time,
+        "total_time": total_wall,
+        "total_cpu_time": total_cpu,
+        "lines_per_second": status.line / translate_time if translate_time > 0 else 0.0,
+        "requests_per_second": status.total_requests / translate_time if translate_time > 0 else 0.0,
+        "limiter_wait_time": limiter_stats["avg_wait_time"] * limiter_stats["acquired_count"],
+        "limiter_max_wait_time": limiter_stats["max_wait_time"],
+        "stages": stages,
+        "peak_rss": get_peak_rss(),
+    }
+
+
+# 在独立的子进程中执行测试场景，峰值内存与类级状态互不影响
+def run_scenario_isolated(scenario: dict) -> dict:
+    with ProcessPoolExecutor(max_workers = 1, mp_context = get_context("spawn")) as executor:
+        return executor.submit(run_scenario, scenario).result()
+
+
+# 解析 --set 指定的配置项
+def parse_overrides(items: list[str]) -> dict:
+    overrides = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = json.loads(value)
+        except ValueError:
+            overrides[key] = value
+    return overrides
+
+
+# 输出报告表格
+def print_report(console: Console, reports: list[dict]) -> None:
+    table = Table(title = "翻译流程基准测试", show_lines = False)
+    for column in (
+        "项目类型", "行数", "请求", "失败", "翻译耗时", "行/秒", "请求/秒", "限流等待",
+        "准备 CPU", "提取 CPU", "检查 CPU", "读取", "保存", "写出", "峰值内存",
+    ):
+        table.add_column(column, justify = "left" if column == "项目类型" else "right")
+
+    for report in reports:
+        if "error" in report:
+            table.add_row(report["project_type"], *["-"] * 14)
+            continue
+
+        stages = report["stages"]
+        stage_cpu = lambda name: f"{stages.get(name, {}).get("cpu_time", 0.0):.3f}s"
+        stage_wall = lambda name: f"{stages.get(name, {}).get("wall_time", 0.0):.3f}s"
+        peak_rss = report["peak_rss"]
+        table.add_row(
+            report["project_type"],
+            f"{report["line"]}/{report["total_line"]}",
+            str(report["total_requests"]),
+            str(report["error_requests"]),
+            f"{report["translate_time"]:.2f}s",
+            f"{report["lines_per_second"]:.1f}",
+            f"{report["requests_per_second"]:.2f}",
+            f"{report["limiter_wait_time"]:.2f}s",
+            stage_cpu("prepare"),
+            stage_cpu("extract"),
+            stage_cpu("check"),
+            stage_wall("read"),
+            stage_wall("save"),
+            stage_wall("write"),
+            f"{peak_rss / 1024 / 1024:.0f}MB" if peak_rss is not None else "-",
+        )
+
+    console.print(table)
+
+
+def main(argv: list[str] = None) -> list[dict]:
+    generator = ProjectGenerator()
+
+    parser = argparse.ArgumentParser(description = "翻译流程吞吐基准测试")
+    parser.add_argument("--types", nargs = "+", default = generator.get_supported_types(), choices = generator.get_supported_types(), help = "测试的项目类型")
+    parser.add_argument("--files", type = int, default = 2, help = "每个项目的文件数量")
+    parser.add_argument("--lines", type = int, default = 500, help = "每个文件的行数")
+    parser.add_argument("--seed", type = int, default = 0, help = "合成项目的随机种子")
+    parser.add_argument("--duplicate-rate", type = float, default = 0.1, help = "重复行比例")
+    parser.add_argument("--code-rate", type = float, default = 0.1, help = "包含游戏代码段的行比例")
+    parser.add_argument("--api-format", choices = ("openai", "anthropic"), default = "openai", help = "模拟的接口格式")
+    parser.add_argument("--latency", type = float, default = 0.5, help = "模拟接口的平均延迟（秒）")
+    parser.add_argument("--jitter", type = float, default = 0.2, help = "模拟接口延迟的浮动范围（秒）")
+    parser.add_argument("--error-rate", type = float, default = 0.0, help = "模拟接口返回 500 的概率")
+    parser.add_argument("--rate-limit-rate", type = float, default = 0.0, help = "模拟接口随机返回 429 的概率")
+    parser.add_argument("--server-rpm", type = int, default = 0, help = "模拟接口每分钟接受的请求数，超过时返回 429")
+    parser.add_argument("--malformed-rate", type = float, default = 0.0, help = "模拟接口返回格式错误译文的概率")
+    parser.add_argument("--keys", type = int, default = 1, help = "密钥数量")
+    parser.add_argument("--rpm-limit", type = int, default = 6000, help = "每个密钥的 RPM 限额")
+    parser.add_argument("--tpm-limit", type = int, default = 10000000, help = "每个密钥的 TPM 限额")
+    parser.add_argument("--threads", type = int, default = 16, help = "同时执行的任务数量，0 为按限额自动计算")
+    parser.add_argument("--lines-limit", type = int, default = 20, help = "每个任务的行数")
+    parser.add_argument("--round-limit", type = int, default = 10, help = "每行最多尝试的次数")
+    parser.add_argument("--save-interval", type = float, default = None, help = "缓存保存间隔（秒），默认与应用一致")
+    parser.add_argument("--set", dest = "overrides", action = "append", metavar = "KEY=VALUE", help = "额外的配置项，值按 JSON 解析，可以重复指定")
+    parser.add_argument("--no-plugins", action = "store_true", help = "不加载插件")
+    parser.add_argument("--no-isolate", action = "store_true", help = "在当前进程中执行全部场景，模拟接口会与被测流程争用 GIL")
+    parser.add_argument("--keep", action = "store_true", help = "保留生成的项目与输出文件")
+    parser.add_argument("--verbose", action = "store_true", help = "输出翻译日志")
+    parser.add_argument("--output", default = "", help = "将报告保存为 JSON 文件，便于对比不同版本")
+    args = parser.parse_args(argv)
+
+    console = Console()
+    generator = ProjectGenerator(args.seed, args.duplicate_rate, args.code_rate)
+    server = MockLLMServer(MockServerOptions(
+        latency = args.latency,
+        jitter = args.jitter,
+        error_rate = args.error_rate,
+        rate_limit_rate = args.rate_limit_rate,
+        rpm_limit = args.server_rpm,
+        malformed_rate = args.malformed_rate,
+        seed = args.seed,
+    )).start()
+    api_url = server.url + "/v1" if args.api_format == "openai" else server.url
+
+    root_path = Path(tempfile.mkdtemp(prefix = "ainiee_bench_"))
+    reports = []
+    try:
+        for project_type in args.types:
+            work_path = root_path / project_type
+            input_path = generator.generate(project_type, work_path / "input", args.files, args.lines)
+
+            scenario = {
+                "project_type": project_type,
+                "work_path": str(work_path),
+                "input_path": str(input_path),
+                "output_path": str(work_path / "output"),
+                "api_format": args.api_format,
+                "api_url": api_url,
+                "keys": args.keys,
+                "rpm_limit": args.rpm_limit,
+                "tpm_limit": args.tpm_limit,
+                "threads": args.threads,
+                "lines_limit": args.lines_limit,
+                "round_limit": args.round_limit,
+                "save_interval": args.save_interval,
+                "overrides": parse_overrides(args.overrides),
+                "plugins": not args.no_plugins,
+                "verbose": args.verbose,
+            }
+
+            console.print(f"[[green]INFO[/]] 正在测试 {project_type}，{args.files} 个文件 × {args.lines} 行 ...")
+            server.reset_stats()
+            try:
+                report = run_scenario(scenario) if args.no_isolate else run_scenario_isolated(scenario)
+            except Exception as e:
+                console.print(f"[[red]ERROR[/]] {project_type} 测试失败 - {type(e).__name__}: {e}")
+                if args.verbose:
+                    console.print_exception()
+                report = {"project_type": project_type, "error": f"{type(e).__name__}: {e}"}
+            report["server_stats"] = server.get_stats()
+            reports.append(report)
+    finally:
+        server.stop()
+        if args.keep:
+            console.print(f"[[green]INFO[/]] 测试文件已保留在 {root_path}")
+        else:
+            shutil.rmtree(root_path, ignore_errors = True)
+
+    print_report(console, reports)
+    for report in reports:
+        stats = report["server_stats"]
+        console.print(
+            f"{report["project_type"]} - 模拟接口收到 {stats["request_count"]} 个请求，"
+            + f"限流 {stats["rate_limited_count"]} 次，错误 {stats["error_count"]} 次，格式错误 {stats["malformed_count"]} 次"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding = "utf-8") as writer:
+            json.dump({"args": vars(args), "reports": reports}, writer, ensure_ascii = False, indent = 4)
+        console.print(f"[[green]INFO[/]] 报告已保存至 {args.output}")
+
+    return reports
+
+
+if __name__ == "__main__":
+    main()
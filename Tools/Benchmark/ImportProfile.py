@@ -0,0 +1,153 @@
+"""启动导入耗时分析
+
+在独立的子进程中以 python -X importtime 导入指定模块，按子系统汇总各模块自身的导入耗时，
+用于发现拖慢冷启动的依赖库，也可以设置耗时预算，超出预算时以非零退出码结束，便于在持续集成中检查。
+
+用法（在项目根目录执行）：
+    python Tools/Benchmark/ImportProfile.py
+    python Tools/Benchmark/ImportProfile.py --modules ModuleFolders.TaskExecutor.TaskExecutor --top 20
+    python Tools/Benchmark/ImportProfile.py --budget 1500 --output import_profile.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# 以项目根目录为工作目录与导入路径，与 AiNiee.py 一致
+ROOT_PATH = Path(__file__).resolve().parents[2]
+
+from rich.console import Console
+from rich.table import Table
+
+
+# 默认分析的模块，与命令行翻译流程启动时导入的核心模块一致
+DEFAULT_MODULES = (
+    "Base.Base",
+    "Base.PluginManager",
+    "ModuleFolders.Cache.CacheManager",
+    "ModuleFolders.FileReader.FileReader",
+    "ModuleFolders.FileOutputer.FileOutputer",
+    "ModuleFolders.TaskExecutor.TaskExecutor",
+)
+
+# 项目内按第二级名称划分子系统的顶层包
+PROJECT_PACKAGES = ("ModuleFolders", "PluginScripts", "UserInterface", "Widget")
+
+
+# 在子进程中导入模块，返回 -X importtime 的输出
+def run_importtime(modules: list[str], python: str) -> str:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (str(ROOT_PATH), env.get("PYTHONPATH", ""))))
+
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        cwd = ROOT_PATH,
+        env = env,
+        capture_output = True,
+        text = True,
+        encoding = "utf-8",
+        errors = "replace",
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors[-20:]))
+
+    return result.stderr
+
+
+# 解析 -X importtime 的输出，返回 [(模块名, 自身耗时, 累计耗时)]，耗时单位为微秒
+def parse_importtime(output: str) -> list[tuple[str, int, int]]:
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+
+        records.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return records
+
+
+# 获取模块所属的子系统，项目内的模块按功能目录划分，第三方库按顶层包划分
+def get_subsystem(module: str) -> str:
+    parts = module.split(".")
+    if parts[0] in PROJECT_PACKAGES and len(parts) > 1:
+        return f"{parts[0]}.{parts[1]}"
+    return parts[0]
+
+
+# 按子系统汇总自身耗时
+def aggregate(records: list[tuple[str, int, int]]) -> list[dict]:
+    subsystems = {}
+    for module, self_time, _ in records:
+        subsystem = subsystems.setdefault(get_subsystem(module), {"name": get_subsystem(module), "self_time": 0, "modules": 0})
+        subsystem["self_time"] += self_time
+        subsystem["modules"] += 1
+
+    return sorted(subsystems.values(), key = lambda item: item["self_time"], reverse = True)
+
+
+# 输出报告表格
+def print_report(console: Console, subsystems: list[dict], total: int, top: int) -> None:
+    table = Table(title = "启动导入耗时", show_lines = False)
+    for column in ("子系统", "模块数", "导入耗时", "占比"):
+        table.add_column(column, justify = "left" if column == "子系统" else "right")
+
+    for subsystem in subsystems[:top] if top > 0 else subsystems:
+        table.add_row(
+            subsystem["name"],
+            str(subsystem["modules"]),
+            f"{subsystem["self_time"] / 1000:.1f}ms",
+            f"{subsystem["self_time"] / max(total, 1) * 100:.1f}%",
+        )
+
+    console.print(table)
+    console.print(f"共导入 {sum(item["modules"] for item in subsystems)} 个模块，总耗时 {total / 1000:.1f}ms")
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description = "启动导入耗时分析")
+    parser.add_argument("--modules", nargs = "+", default = list(DEFAULT_MODULES), help = "导入的模块")
+    parser.add_argument("--python", default = sys.executable, help = "执行导入的 Python 解释器")
+    parser.add_argument("--top", type = int, default = 25, help = "显示耗时最多的子系统数量，0 为全部显示")
+    parser.add_argument("--budget", type = float, default = 0, help = "总导入耗时预算（毫秒），超出时以非零退出码结束，0 为不检查")
+    parser.add_argument("--output", default = "", help = "将报告保存为 JSON 文件，便于对比不同版本")
+    args = parser.parse_args(argv)
+
+    console = Console()
+    try:
+        records = parse_importtime(run_importtime(args.modules, args.python))
+    except RuntimeError as e:
+        console.print(f"[[red]ERROR[/]] 模块导入失败 ...\n{e}")
+        return 1
+
+    subsystems = aggregate(records)
+    total = sum(item["self_time"] for item in subsystems)
+    print_report(console, subsystems, total, args.top)
+
+    if args.output:
+        report = {
+            "args": vars(args),
+            "total_time": total,
+            "subsystems": subsystems,
+            "modules": [{"name": module, "self_time": self_time, "cumulative_time": cumulative} for module, self_time, cumulative in records],
+        }
+        with open(args.output, "w", encoding = "utf-8") as writer:
+            json.dump(report, writer, ensure_ascii = False, indent = 4)
+        console.print(f"[[green]INFO[/]] 报告已保存至 {args.output}")
+
+    if args.budget > 0 and total / 1000 > args.budget:
+        console.print(f"[[red]ERROR[/]] 导入耗时 {total / 1000:.1f}ms 超出预算 {args.budget:.1f}ms")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class MockServerOptions:
+    """模拟接口的行为参数"""
+
+    latency: float = 0.5  # 每个请求的平均延迟（秒）
+    jitter: float = 0.2  # 延迟的随机浮动范围（秒）
+    error_rate: float = 0.0  # 返回 500 的概率
+    rate_limit_rate: float = 0.0  # 随机返回 429 的概率
+    rpm_limit: int = 0  # 每分钟最多接受的请求数，超过时返回 429，0 为不限制
+    retry_after: float = 1.0  # 429 回复中的 Retry-After（秒）
+    malformed_rate: float = 0.0  # 返回格式错误译文的概率
+    stream_chunk_size: int = 16  # 流式回复每个分块的字符数
+    seed: int = 0
+
+
+# 本地模拟的 OpenAI / Anthropic 兼容接口
+class MockLLMServer:
+    """在本地端口上模拟大模型接口，用于测量翻译流程自身的吞吐
+
+    支持 OpenAI 的 /v1/chat/completions 与 Anthropic 的 /v1/messages，以及两者的流式回复，
+    译文由原文中的假名逐字替换得到，行号、换行与代码段保持不变，可以通过全部回复检查
+    """
+
+    # 提取最后一个 textarea 标签中的原文
+    TEXTAREA_REG = re.compile(r"<textarea.*?>(.*?)</textarea>", re.DOTALL)
+
+    # 译文中需要替换的假名
+    KANA_REG = re.compile(r"[぀-ヿ]")
+
+    def __init__(self, options: MockServerOptions = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.options = options or MockServerOptions()
+        self.random = random.Random(self.options.seed)
+        self.lock = threading.Lock()
+        self.request_times = deque()
+
+        self.server = ThreadingHTTPServer((host, port), self.create_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+        self.reset_stats()
+
+    # 接口地址
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # 在后台线程中启动
+    def start(self) -> "MockLLMServer":
+        self.thread = threading.Thread(target = self.server.serve_forever, name = "mock_llm_server", daemon = True)
+        self.thread.start()
+        return self
+
+    # 停止服务
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    # 重置统计
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats = {
+                "request_count": 0,
+                "success_count": 0,
+                "rate_limited_count": 0,
+                "error_count": 0,
+                "malformed_count": 0,
+            }
+            self.request_times.clear()
+
+    # 获取统计
+    def get_stats(self) -> dict:
+        with self.lock:
+            return dict(self.stats)
+
+    # 决定本次请求的结果，返回 HTTP 状态码与是否返回格式错误的译文
+    def decide(self) -> tuple[int, bool]:
+        now = time.time()
+        with self.lock:
+            self.stats["request_count"] += 1
+
+            # 滑动窗口内的请求数超过限额时限流
+            while self.request_times and now - self.request_times[0] >= 60.0:
+                self.request_times.popleft()
+            limited = self.options.rpm_limit > 0 and len(self.request_times) >= self.options.rpm_limit
+
+            if limited or self.random.random() < self.options.rate_limit_rate:
+                self.stats["rate_limited_count"] += 1
+                return 429, False
+            self.request_times.append(now)
+
+            if self.random.random() < self.options.error_rate:
+                self.stats["error_count"] += 1
+                return 500, False
+
+            malformed = self.random.random() < self.options.malformed_rate
+            self.stats["success_count"] += 1
+            if malformed:
+                self.stats["malformed_count"] += 1
+            return 200, malformed
+
+    # 本次请求的延迟
+    def get_latency(self) -> float:
+        with self.lock:
+            offset = self.random.uniform(-self.options.jitter, self.options.jitter)
+        return max(0.0, self.options.latency + offset)
+
+    # 根据请求消息生成译文
+    def translate(self, messages: list, malformed: bool) -> str:
+        content = ""
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                content = self.get_text(message.get("content"))
+                break
+
+        matches = self.TEXTAREA_REG.findall(content)
+        source = matches[-1].strip("\n") if matches else content
+        lines = self.KANA_REG.sub("译", source).split("\n")
+
+        # 格式错误时丢掉最后一行或去掉标签
+        if malformed:
+            if len(lines) > 1:
+                lines = lines[:-1]
+            else:
+                return "\n".join(lines)
+
+        return "<textarea>\n" + "\n".join(lines) + "\n</textarea>"
+
+    # 获取消息内容中的文本，兼容字符串与内容块列表
+    def get_text(self, content) -> str:
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+        return ""
+
+    # 粗略估算 Tokens 数量
+    def count_tokens(self, text: str) -> int:
+        return max(1, len(text) // 2)
+
+    # 创建请求处理器
+    def create_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path.endswith("/chat/completions"):
+                    api_format = "openai"
+                elif self.path.endswith("/messages"):
+                    api_format = "anthropic"
+                else:
+                    self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+
+                status, malformed = server.decide()
+                time.sleep(server.get_latency())
+
+                if status != 200:
+                    self.send_error_response(api_format, status)
+                    return
+
+                messages = body.get("messages", [])
+                text = server.translate(messages, malformed)
+                prompt_tokens = server.count_tokens(json.dumps(messages, ensure_ascii = False) + server.get_text(body.get("system", "")))
+                completion_tokens = server.count_tokens(text)
+                model = body.get("model", "mock")
+
+                if api_format == "openai":
+                    if body.get("stream"):
+                        self.send_openai_stream(model, text, prompt_tokens, completion_tokens, body.get("stream_options"))
+                    else:
+                        self.send_json(200, {
+                            "id": "chatcmpl-mock",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+                        })
+                else:
+                    if body.get("stream"):
+                        self.send_anthropic_stream(model, text, prompt_tokens, completion_tokens)
+                    else:
+                        self.send_json(200, {
+                            "id": "msg_mock",
+                            "type": "message",
+                            "role": "assistant",
+                            "model": model,
+                            "content": [{"type": "text", "text": text}],
+                            "stop_reason": "end_turn",
+                            "stop_sequence": None,
+                            "usage": {"input_tokens": prompt_tokens, "output_tokens": completion_tokens},
+                        })
+
+            def send_json(self, status: int, data: dict, headers: dict = None) -> None:
+                payload = json.dumps(data, ensure_ascii = False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def send_error_response(self, api_format: str, status: int) -> None:
+                headers = {"Retry-After": str(server.options.retry_after)} if status == 429 else {}
+                message = "rate limit exceeded" if status == 429 else "internal server error"
+                if api_format == "openai":
+                    data = {"error": {"message": message, "type": "mock_error", "code": status}}
+                else:
+                    error_type = "rate_limit_error" if status == 429 else "api_error"
+                    data = {"type": "error", "error": {"type": error_type, "message": message}}
+                self.send_json(status, data, headers)
+
+            def start_stream(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+
+            def send_event(self, data: dict, event: str = None) -> None:
+                payload = f"event: {event}\n" if event else ""
+                payload += f"data: {json.dumps(data, ensure_ascii = False)}\n\n"
+                self.wfile.write(payload.encode("utf-8"))
+                self.wfile.flush()
+
+            def iter_chunks(self, text: str):
+                size = max(1, server.options.stream_chunk_size)
+                for i in range(0, len(text), size):
+                    yield text[i:i + size]
+
+            def send_openai_stream(self, model: str, text: str, prompt_tokens: int, completion_tokens: int, stream_options: dict) -> None:
+                self.start_stream()
+                base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                for piece in self.iter_chunks(text):
+                    self.send_event(dict(base, choices = [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]))
+                self.send_event(dict(base, choices = [{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                if (stream_options or {}).get("include_usage"):
+                    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+                    self.send_event(dict(base, choices = [], usage = usage))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def send_anthropic_stream(self, model: str, text: str, prompt_tokens: int, completion_tokens: int) -> None:
+                self.start_stream()
+                self.send_event({
+                    "type": "message_start",
+                    "message": {
+                        "id": "msg_mock", "type": "message", "role": "assistant", "model": model, "content": [],
+                        "stop_reason": None, "stop_sequence": None,
+                        "usage": {"input_tokens": prompt_tokens, "output_tokens": 1},
+                    },
+                }, "message_start")
+                self.send_event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start")
+                for piece in self.iter_chunks(text):
+                    self.send_event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}}, "content_block_delta")
+                self.send_event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+                self.send_event({
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": completion_tokens},
+                }, "message_delta")
+                self.send_event({"type": "message_stop"}, "message_stop")
+
+        return Handler
@@ -0,0 +1,239 @@
+import json
+import random
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from ModuleFolders.Cache.CacheProject import ProjectType
+
+
+# 合成项目生成器
+class ProjectGenerator:
+    """为各项目类型生成 N 个文件 × M 行的合成日文项目
+
+    原文由常用词随机拼接而成，每行都包含假名，并按比例混入重复行、游戏代码段与多行文本，
+    覆盖去重、代码段处理与换行检查等流程，相同的种子总是生成相同的项目
+    """
+
+    WORDS = (
+        "今日", "は", "とても", "いい", "天気", "です", "ね", "魔法", "学校", "の", "先生", "と", "友達",
+        "一緒に", "行きましょう", "本当に", "ありがとう", "ございます", "少し", "待って", "ください",
+        "ここ", "どこ", "何", "でしょう", "か", "勇者", "が", "王様", "に", "会い", "ました", "森", "で",
+        "不思議な", "声", "を", "聞いた", "明日", "また", "来ます", "よ", "剣", "盾", "宝箱", "開ける",
+    )
+    ENDINGS = ("。", "！", "？", "……")
+    CODES = ("\\N[1]", "\\C[2]", "\\V[10]", "\\I[64]", "\\{")
+
+    def __init__(self, seed: int = 0, duplicate_rate: float = 0.1, code_rate: float = 0.1, multiline_rate: float = 0.05) -> None:
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.code_rate = code_rate
+        self.multiline_rate = multiline_rate
+
+        # 各项目类型的生成方法与文件后缀
+        self.generators = {
+            ProjectType.TXT: (self.write_txt, "txt"),
+            ProjectType.MD: (self.write_md, "md"),
+            ProjectType.SRT: (self.write_srt, "srt"),
+            ProjectType.VTT: (self.write_vtt, "vtt"),
+            ProjectType.LRC: (self.write_lrc, "lrc"),
+            ProjectType.MTOOL: (self.write_mtool, "json"),
+            ProjectType.PARATRANZ: (self.write_paratranz, "json"),
+            ProjectType.VNT: (self.write_vnt, "json"),
+            ProjectType.I18NEXT: (self.write_i18next, "json"),
+            ProjectType.TRANS: (self.write_trans, "trans"),
+            ProjectType.PO: (self.write_po, "po"),
+            ProjectType.RENPY: (self.write_renpy, "rpy"),
+            ProjectType.TPP: (self.write_tpp, "xlsx"),
+            ProjectType.EPUB: (self.write_epub, "epub"),
+            ProjectType.DOCX: (self.write_docx, "docx"),
+        }
+
+    # 支持生成的项目类型
+    def get_supported_types(self) -> list[str]:
+        return list(self.generators.keys())
+
+    # 生成项目，返回输入文件夹
+    def generate(self, project_type: str, root: Path, file_count: int, line_count: int) -> Path:
+        write, suffix = self.generators[project_type]
+        input_path = Path(root)
+        input_path.mkdir(parents = True, exist_ok = True)
+
+        rng = random.Random(f"{self.seed}-{project_type}")
+        for file_index in range(file_count):
+            # 纯文本类格式不支持多行条目
+            multiline = project_type in (ProjectType.SRT, ProjectType.VTT, ProjectType.PARATRANZ, ProjectType.I18NEXT, ProjectType.MTOOL)
+            lines = self.generate_lines(rng, line_count, multiline)
+            write(input_path / f"bench_{file_index:03d}.{suffix}", lines)
+
+        return input_path
+
+    # 生成一个文件的原文行
+    def generate_lines(self, rng: random.Random, line_count: int, multiline: bool) -> list[str]:
+        lines = []
+        for _ in range(line_count):
+            if lines and rng.random() < self.duplicate_rate:
+                lines.append(rng.choice(lines))
+                continue
+
+            line = self.generate_sentence(rng)
+            if rng.random() < self.code_rate:
+                line = rng.choice(self.CODES) + line
+            if multiline and rng.random() < self.multiline_rate:
+                line = line + "\n" + self.generate_sentence(rng)
+            lines.append(line)
+        return lines
+
+    # 生成一句原文，句首总是假名开头的词，保证每行都包含假名
+    def generate_sentence(self, rng: random.Random) -> str:
+        words = ["あの"] + [rng.choice(self.WORDS) for _ in range(rng.randint(3, 14))]
+        return "".join(words) + rng.choice(self.ENDINGS)
+
+    # 生成字幕时间轴
+    def get_timestamp(self, index: int, separator: str) -> str:
+        start, end = index * 3, index * 3 + 2
+        return (
+            f"{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60:02d}{separator}000 --> "
+            + f"{end // 3600:02d}:{end // 60 % 60:02d}:{end % 60:02d}{separator}000"
+        )
+
+    def write_txt(self, path: Path, lines: list[str]) -> None:
+        path.write_text("\n".join(lines) + "\n", encoding = "utf-8")
+
+    def write_md(self, path: Path, lines: list[str]) -> None:
+        content = [f"## {line}" if i % 20 == 0 else line for i, line in enumerate(lines)]
+        path.write_text("\n\n".join(content) + "\n", encoding = "utf-8")
+
+    def write_srt(self, path: Path, lines: list[str]) -> None:
+        blocks = [f"{i + 1}\n{self.get_timestamp(i, ',')}\n{line}\n" for i, line in enumerate(lines)]
+        path.write_text("\n".join(blocks), encoding = "utf-8")
+
+    def write_vtt(self, path: Path, lines: list[str]) -> None:
+        blocks = [f"{self.get_timestamp(i, '.')}\n{line}\n" for i, line in enumerate(lines)]
+        path.write_text("WEBVTT\n\n" + "\n".join(blocks), encoding = "utf-8")
+
+    def write_lrc(self, path: Path, lines: list[str]) -> None:
+        content = ["[ti:bench]"] + [f"[{i * 3 // 60:02d}:{i * 3 % 60:02d}.00]{line}" for i, line in enumerate(lines)]
+        path.write_text("\n".join(content) + "\n", encoding = "utf-8")
+
+    def write_mtool(self, path: Path, lines: list[str]) -> None:
+        path.write_text(json.dumps({line: line for line in lines}, ensure_ascii = False, indent = 4), encoding = "utf-8")
+
+    def write_paratranz(self, path: Path, lines: list[str]) -> None:
+        data = [{"key": f"key_{i}", "original": line, "translation": "", "stage": 0, "context": ""} for i, line in enumerate(lines)]
+        path.write_text(json.dumps(data, ensure_ascii = False, indent = 4), encoding = "utf-8")
+
+    def write_vnt(self, path: Path, lines: list[str]) -> None:
+        data = [{"name": "勇者", "message": line} if i % 3 == 0 else {"message": line} for i, line in enumerate(lines)]
+        path.write_text(json.dumps(data, ensure_ascii = False, indent = 4), encoding = "utf-8")
+
+    def write_i18next(self, path: Path, lines: list[str]) -> None:
+        data = {}
+        for i, line in enumerate(lines):
+            data.setdefault(f"section_{i // 50}", {})[f"key_{i}"] = line
+        path.write_text(json.dumps(data, ensure_ascii = False, indent = 4), encoding = "utf-8")
+
+    def write_trans(self, path: Path, lines: list[str]) -> None:
+        files = {}
+        for i in range(0, len(lines), 100):
+            chunk = lines[i:i + 100]
+            files[f"data/Map{i // 100 + 1:03d}.json"] = {
+                "data": [[line, ""] for line in chunk],
+                "tags": [None] * len(chunk),
+                "context": [[f"Map{i // 100 + 1:03d}/events/{j}/message"] for j in range(len(chunk))],
+                "parameters": [None] * len(chunk),
+                "indexIsLine": False,
+                "lineBreak": "\n",
+            }
+        data = {"project": {"gameTitle": "bench", "gameEngine": "rmmz", "files": files}}
+        path.write_text(json.dumps(data, ensure_ascii = False, indent = 4), encoding = "utf-8")
+
+    def write_po(self, path: Path, lines: list[str]) -> None:
+        content = ['msgid ""', 'msgstr ""', '"Content-Type: text/plain; charset=UTF-8\\n"', ""]
+        for i, line in enumerate(dict.fromkeys(lines)):
+            content.append(f"#: bench.py:{i + 1}")
+            content.append(f"msgid {json.dumps(line, ensure_ascii = False)}")
+            content.append('msgstr ""')
+            content.append("")
+        path.write_text("\n".join(content), encoding = "utf-8")
+
+    def write_renpy(self, path: Path, lines: list[str]) -> None:
+        content = []
+        for i, line in enumerate(lines):
+            text = line.replace('"', '\\"')
+            content.append(f"# game/script.rpy:{i + 1}")
+            content.append(f"translate chinese start_{i:06d}:")
+            content.append("")
+            content.append(f'    # e "{text}"')
+            content.append(f'    e "{text}"')
+            content.append("")
+        path.write_text("\n".join(content), encoding = "utf-8")
+
+    def write_tpp(self, path: Path, lines: list[str]) -> None:
+        # 可选依赖，仅在生成 T++ 项目时需要
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Original Text", "Initial", "Machine translation", "Better translation", "Best translation"])
+        for line in lines:
+            sheet.append([line])
+        workbook.save(path)
+
+    def write_epub(self, path: Path, lines: list[str]) -> None:
+        chapters = [lines[i:i + 200] for i in range(0, len(lines), 200)]
+        manifest = "\n".join(
+            f'<item id="chapter{i}" href="chapter{i}.xhtml" media-type="application/xhtml+xml"/>' for i in range(len(chapters))
+        )
+        spine = "\n".join(f'<itemref idref="chapter{i}"/>' for i in range(len(chapters)))
+
+        with zipfile.ZipFile(path, "w") as zipf:
+            zipf.writestr("mimetype", "application/epub+zip", compress_type = zipfile.ZIP_STORED)
+            zipf.writestr(
+                "META-INF/container.xml",
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                + '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+                + '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>'
+                + "</container>",
+            )
+            zipf.writestr(
+                "OEBPS/content.opf",
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                + '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">'
+                + '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>bench</dc:title><dc:language>ja</dc:language></metadata>'
+                + f"<manifest>{manifest}</manifest><spine>{spine}</spine></package>",
+            )
+            for i, chapter in enumerate(chapters):
+                body = "\n".join(f"<p>{escape(line).replace(chr(10), '<br/>')}</p>" for line in chapter)
+                zipf.writestr(
+                    f"OEBPS/chapter{i}.xhtml",
+                    '<?xml version="1.0" encoding="UTF-8"?>\n'
+                    + '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>bench</title></head>'
+                    + f"<body>\n{body}\n</body></html>",
+                )
+
+    def write_docx(self, path: Path, lines: list[str]) -> None:
+        namespace = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+        body = "".join(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in lines)
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zipf:
+            zipf.writestr(
+                "[Content_Types].xml",
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                + '<Default Extension="xml" ContentType="application/xml"/>'
+                + '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                + "</Types>",
+            )
+            zipf.writestr(
+                "_rels/.rels",
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+                + "</Relationships>",
+            )
+            zipf.writestr(
+                "word/document.xml",
+                f'<?xml version="1.0" encoding="UTF-8"?>\n<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>',
+            )
@@ -1,6 +1,10 @@
 import os
+import sys
 import PyInstaller.__main__
 
+sys.path.insert(0, os.path.abspath("."))
+from ModuleFolders.LLMRequester.LLMRequester import LLMRequester
+
 cmd = [
     "./AiNiee.py",
     "--icon=./Resource/Logo/Avatar.png",  # FILE.ico: apply the icon to a Windows executable.
@@ -24,6 +28,10 @@ for module_name in MODULES_TO_EXCLUDE:
     cmd.append(f"--exclude-module={module_name}")
     print(f"[INFO] Explicitly excluding module: {module_name}")
 
+# 请求器模块在运行时按名称导入，PyInstaller 无法自动发现，需要显式添加
+for module_name, _, _ in LLMRequester.REQUESTERS.values():
+    cmd.append(f"--hidden-import={module_name}")
+
 if os.path.exists("./requirements.txt"):
     with open("./requirements.txt", "r", encoding="utf-8") as reader:
         for line in reader:
@@ -1,4 +1,3 @@
-import threading
 import time
 from PyQt5.QtWidgets import QLayout, QWidget, QVBoxLayout
 from qfluentwidgets import (FlowLayout,FluentIcon as FIF)
@@ -34,6 +33,8 @@ class MonitoringPage(Base,QWidget):
         self.add_waveform_card(self.head_hbox)
         self.add_speed_card(self.head_hbox)
         self.add_stability_card(self.head_hbox)
+        self.add_dedup_card(self.head_hbox)
+        self.add_key_card(self.head_hbox)
 
         # 添加到主容器
         self.container.addWidget(self.head_hbox_container, 1)
@@ -151,6 +152,28 @@ class MonitoringPage(Base,QWidget):
         self.stability.setFixedSize(204, 204)
         parent.addWidget(self.stability)
 
+    # 去重率
+    def add_dedup_card(self, parent: QLayout) -> None:
+        self.dedup = DashboardCard(
+                title=self.tra("去重率"),
+                value="%",
+                unit="",
+                icon=FIF.COPY,
+            )
+        self.dedup.setFixedSize(204, 204)
+        parent.addWidget(self.dedup)
+
+    # 可用密钥
+    def add_key_card(self, parent: QLayout) -> None:
+        self.key = DashboardCard(
+                title=self.tra("可用密钥"),
+                value="0",
+                unit="Key",
+                icon=FIF.VPN,
+            )
+        self.key.setFixedSize(204, 204)
+        parent.addWidget(self.key)
+
 
     # 监控页面更新事件
     def data_update(self, event: int, data: dict) -> None:
@@ -158,7 +181,9 @@ class MonitoringPage(Base,QWidget):
             self.update_time(event, data)
             self.update_line(event, data)
             self.update_token(event, data)
+            self.update_dedup(event, data)
             self.update_stability(event, data)
+            self.update_key(event, data)
 
         self.update_task(event, data)
         self.update_status(event, data)
@@ -234,7 +259,14 @@ class MonitoringPage(Base,QWidget):
 
     # 更新实时任务数
     def update_task(self, event: int, data: dict) -> None:
-        task = len([t for t in threading.enumerate() if "translator" in t.name])
+        if data.get("active_tasks", None) is not None:
+            self.data["active_tasks"] = data.get("active_tasks")
+
+        # 执行中的任务数量由任务执行器随进度一并提供，任务结束后归零
+        if Base.work_status in (Base.STATUS.STOPING, Base.STATUS.TASKING):
+            task = self.data.get("active_tasks", 0)
+        else:
+            task = 0
         if task < 1000:
             self.task.set_unit("Task")
             self.task.set_value(f"{task}")
@@ -289,6 +321,36 @@ class MonitoringPage(Base,QWidget):
         self.stability.set_unit("%")
         self.stability.set_value(f"{stability_percent:.2f}")
 
+    # 更新去重率，即已完成的行中由重复原文回填的比例
+    def update_dedup(self, event: int, data: dict) -> None:
+        if data.get("dedup_line") is not None:
+            self.data["dedup_line"] = data["dedup_line"]
+
+        dedup_percent = self.data.get("dedup_line", 0) / max(1, self.data.get("line", 0)) * 100
+        self.dedup.set_unit("%")
+        self.dedup.set_value(f"{dedup_percent:.2f}")
+
+    # 更新密钥状态，悬停时显示各密钥的请求计数
+    def update_key(self, event: int, data: dict) -> None:
+        if data.get("key_stats") is not None:
+            self.data["key_stats"] = data["key_stats"]
+
+        key_stats = self.data.get("key_stats", [])
+        available = sum(1 for v in key_stats if v.get("quarantine_remaining", 0) <= 0)
+        self.key.set_unit("Key")
+        self.key.set_value(f"{available}/{len(key_stats)}")
+
+        lines = []
+        for v in key_stats:
+            line = (
+                f"{v.get("key")}  {self.tra("请求")} {v.get("request_count", 0)}  "
+                + f"{self.tra("成功")} {v.get("success_count", 0)}  {self.tra("失败")} {v.get("failure_count", 0)}"
+            )
+            if v.get("quarantine_remaining", 0) > 0:
+                line += f"  {self.tra("暂停")} {v.get("quarantine_remaining"):.0f}s ({v.get("last_status")})"
+            lines.append(line)
+        self.key.setToolTip("\n".join(lines))
+
     # 更新进度环
     def update_status(self, event: int, data: dict) -> None:
         if Base.work_status == Base.STATUS.STOPING:
@@ -145,12 +145,14 @@ class StartupPage(Base, QWidget):
             label_input_path = config.get("label_input_path", "./input")
             label_input_exclude_rule = config.get("label_input_exclude_rule", "")
             label_output_path = config.get("label_output_path", "./output")
+            reader_process_count = config.get("reader_process_count", 1)
 
             if mode == "new":
                 CacheProject = self.file_reader.read_files(
                     translation_project,
                     label_input_path,
-                    label_input_exclude_rule
+                    label_input_exclude_rule,
+                    reader_process_count
                 )
                 self.cache_manager.load_from_project(CacheProject)
             else:  # "continue"